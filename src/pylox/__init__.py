@@ -1,18 +1,146 @@
 import sys
+from argparse import ArgumentParser, Namespace
+from typing import TYPE_CHECKING
 
-from pylox.pylox import PyLox
+# The interpreter is imported on first use, so that the client started by
+# --client doesn't load it
+if TYPE_CHECKING:
+    from pylox.pylox import PyLox
+
+
+def build_arg_parser() -> ArgumentParser:
+    arg_parser = ArgumentParser(prog="pylox")
+    arg_parser.add_argument("file_path", nargs="?", default=None)
+    arg_parser.add_argument(
+        "--memoize",
+        action="store_true",
+        help="cache the results of functions proven to be pure",
+    )
+    arg_parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=1024,
+        help="maximum number of cached results per function",
+    )
+    arg_parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="print memoization hits and misses to stderr",
+    )
+    arg_parser.add_argument(
+        "--infer-types",
+        action="store_true",
+        help="skip the runtime type checks of operands proven to always pass them",
+    )
+    arg_parser.add_argument(
+        "--type-report",
+        action="store_true",
+        help="print how many type checks --infer-types eliminated to stderr",
+    )
+    arg_parser.add_argument(
+        "--line-buffered",
+        action="store_true",
+        help="write the output of print line by line instead of in blocks",
+    )
+    arg_parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="resolve variables while parsing instead of in a separate pass",
+    )
+    arg_parser.add_argument(
+        "--client",
+        action="store_true",
+        help="run the script in the server started by 'pylox serve' instead of "
+        "starting a new interpreter",
+    )
+    arg_parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=None,
+        help="Unix socket of the server used by --client",
+    )
+    profile_mode = arg_parser.add_mutually_exclusive_group()
+    profile_mode.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every Lox call and print a report to stderr",
+    )
+    profile_mode.add_argument(
+        "--sample-profile",
+        action="store_true",
+        help="sample the Lox call stack and print the hottest lines to stderr",
+    )
+    profile_mode.add_argument(
+        "--mem-profile",
+        action="store_true",
+        help="count Lox allocations by line and class and print a report to stderr",
+    )
+    arg_parser.add_argument(
+        "--sample-interval",
+        metavar="MS",
+        type=float,
+        default=5.0,
+        help="milliseconds between two samples of --sample-profile",
+    )
+    arg_parser.add_argument(
+        "--profile-output",
+        metavar="PREFIX",
+        default=None,
+        help="also write the profile to PREFIX.txt, PREFIX.collapsed and "
+        "PREFIX.pstats (--profile), PREFIX.lines (--sample-profile) or only "
+        "PREFIX.txt (--mem-profile)",
+    )
+    return arg_parser
+
+
+def pylox_from_args(args: Namespace) -> "PyLox":
+    from pylox.pylox import PyLox
+
+    return PyLox(
+        memoize=args.memoize,
+        memo_size=args.memo_size,
+        memo_stats=args.memo_stats,
+        infer_types=args.infer_types,
+        type_report=args.type_report,
+        profile=args.profile,
+        sample_profile=args.sample_profile,
+        mem_profile=args.mem_profile,
+        sample_interval=args.sample_interval / 1000,
+        profile_output=args.profile_output,
+        line_buffered=args.line_buffered,
+        single_pass=args.single_pass,
+    )
 
 
 def main():
-    pylox: PyLox = PyLox()
-    file_path: str | None = None
+    argv = sys.argv[1:]
+
+    if argv[:1] == ["serve"]:
+        from pylox import server
+
+        server.main(argv[1:])
+        return
+
+    if argv[:1] == ["lsp"]:
+        from pylox import lsp
+
+        lsp.main()
+        return
+
+    args = build_arg_parser().parse_args(argv)
+
+    if args.client:
+        from pylox import server
+
+        sys.exit(server.run_client(args.socket or server.default_socket_path(), argv))
+
+    run_args(args)
+
 
-    try:
-        file_path = sys.argv[1]
-    except IndexError:
-        file_path = None
+def run_args(args: Namespace):
+    pylox: PyLox = pylox_from_args(args)
 
-    if file_path is None:
+    if args.file_path is None:
         pylox.run_prompt()
     else:
-        pylox.run_file(file_path)
+        pylox.run_file(args.file_path)
@@ -0,0 +1,204 @@
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tracemalloc
+from argparse import SUPPRESS, ArgumentParser
+from contextlib import redirect_stdout
+from time import perf_counter
+
+
+# Each benchmark runs in a fresh worker process for every configuration, so
+# flags and interpreter state can't leak from one measurement into another.
+def run_worker(flags: list[str], file_path: str, warmup: int, runs: int) -> dict:
+    from pylox import build_arg_parser, pylox_from_args
+
+    args = build_arg_parser().parse_args([*flags, file_path])
+    times: list[float] = []
+    status = 0
+
+    def run_once() -> int:
+        pylox = pylox_from_args(args)
+        pylox.error_handler.had_error = False
+        pylox.error_handler.had_runtime_error = False
+
+        try:
+            pylox.run_file(file_path)
+        except SystemExit as exit:
+            return exit.code or 0
+
+        return 0
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for i in range(warmup + runs):
+            start = perf_counter()
+            status = run_once() or status
+            elapsed = perf_counter() - start
+
+            if i >= warmup:
+                times.append(elapsed)
+
+        # Tracing allocations slows everything down, so memory is measured
+        # on a separate run
+        tracemalloc.start()
+        run_once()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"times": times, "peak_memory": peak_memory, "status": status}
+
+
+def measure(
+    name: str,
+    flags: str,
+    file_path: str,
+    warmup: int,
+    runs: int,
+) -> dict:
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pylox.bench",
+            "--worker",
+            f"--flags={flags}",
+            "--warmup",
+            str(warmup),
+            "--runs",
+            str(runs),
+            file_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    result = {
+        "benchmark": os.path.splitext(os.path.basename(file_path))[0],
+        "config": name,
+        "flags": flags,
+    }
+
+    if process.returncode != 0:
+        result["error"] = process.stderr.strip().splitlines()[-1:]
+        return result
+
+    worker = json.loads(process.stdout)
+    times = worker["times"]
+
+    result.update(
+        {
+            "times": times,
+            "median": statistics.median(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "min": min(times),
+            "max": max(times),
+            "peak_memory": worker["peak_memory"],
+            "status": worker["status"],
+        }
+    )
+    return result
+
+
+def print_table(results: list[dict], configs: list[str]):
+    baselines = {
+        result["benchmark"]: result["median"]
+        for result in results
+        if result["config"] == configs[0] and "median" in result
+    }
+
+    print(
+        f"{'benchmark':<18} {'config':<14} {'median':>10} {'stdev':>9} "
+        f"{'min':>10} {'peak mem':>10} {'ratio':>7}"
+    )
+
+    for result in results:
+        prefix = f"{result['benchmark']:<18} {result['config']:<14}"
+
+        if "error" in result:
+            print(f"{prefix} failed: {' '.join(result['error'])}")
+            continue
+
+        baseline = baselines.get(result["benchmark"])
+        ratio = f"{result['median'] / baseline:>6.2f}x" if baseline else f"{'-':>7}"
+        failed = f"  (exit status {result['status']})" if result["status"] else ""
+
+        print(
+            f"{prefix} {result['median'] * 1000:>8.1f}ms "
+            f"{result['stdev'] / result['median'] * 100:>8.1f}% "
+            f"{result['min'] * 1000:>8.1f}ms "
+            f"{result['peak_memory'] / 1024 / 1024:>8.2f}MB "
+            f"{ratio}{failed}"
+        )
+
+
+def main():
+    arg_parser = ArgumentParser(
+        prog="pylox-bench",
+        description="Run the Lox benchmarks under one or more pylox configurations.",
+    )
+    arg_parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        help="benchmark names or .lox files (default: every file in --dir)",
+    )
+    arg_parser.add_argument("--dir", default="benchmarks")
+    arg_parser.add_argument("--warmup", type=int, default=1)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument(
+        "--config",
+        metavar="NAME=FLAGS",
+        action="append",
+        default=[],
+        help="pylox flags to compare, e.g. --config memo=--memoize "
+        "(repeatable, the first one is the baseline)",
+    )
+    arg_parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    arg_parser.add_argument("--worker", action="store_true", help=SUPPRESS)
+    arg_parser.add_argument("--flags", default="", help=SUPPRESS)
+    args = arg_parser.parse_args(sys.argv[1:])
+
+    if args.worker:
+        result = run_worker(
+            shlex.split(args.flags), args.benchmarks[0], args.warmup, args.runs
+        )
+        print(json.dumps(result))
+        return
+
+    configs: list[tuple[str, str]] = []
+
+    for config in args.config or ["default="]:
+        name, _, flags = config.partition("=")
+        configs.append((name, flags))
+
+    file_paths: list[str] = []
+
+    benchmarks = args.benchmarks or [
+        name for name in sorted(os.listdir(args.dir)) if name.endswith(".lox")
+    ]
+
+    for benchmark in benchmarks:
+        if not benchmark.endswith(".lox"):
+            benchmark = os.path.join(args.dir, f"{benchmark}.lox")
+        elif not os.path.exists(benchmark):
+            benchmark = os.path.join(args.dir, benchmark)
+
+        file_paths.append(benchmark)
+
+    results: list[dict] = []
+
+    for file_path in file_paths:
+        for name, flags in configs:
+            print(f"Running {file_path} [{name}]...", file=sys.stderr)
+            results.append(measure(name, flags, file_path, args.warmup, args.runs))
+
+    print_table(results, [name for name, _ in configs])
+
+    if args.json is not None:
+        with open(args.json, "w") as f_obj:
+            json.dump(results, f_obj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
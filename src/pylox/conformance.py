@@ -0,0 +1,393 @@
+import difflib
+import json
+import os
+import re
+import resource
+import shlex
+import subprocess
+import sys
+from argparse import SUPPRESS, ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+# The ways pylox can run a program, compared side by side. Each must print the
+# same output; the baseline keeps their timings apart.
+ENGINES = {
+    "tree-walk": "",
+    "single-pass": "--single-pass",
+    "infer-types": "--infer-types",
+    "memoize": "--memoize",
+}
+# Directories of the craftinginterpreters corpus written for other
+# interpreters: the chapter-by-chapter ones and clox's limits
+SKIPPED_DIRS = {"benchmark", "expressions", "scanning", "limit"}
+# Slowdowns under this many seconds are noise, however large the ratio
+MIN_SLOWDOWN = 0.005
+
+# Expectations are comments in the tests, as in the corpus' own runner
+EXPECT_OUTPUT = re.compile(r"// expect: ?(.*)")
+EXPECT_ERROR = re.compile(r"// (Error.*)")
+EXPECT_LINE_ERROR = re.compile(r"// \[((java|c) )?line (\d+)\] (Error.*)")
+EXPECT_RUNTIME_ERROR = re.compile(r"// expect runtime error: (.+)")
+NON_TEST = "// nontest"
+# What pylox prints for syntax and runtime errors
+SYNTAX_ERROR = re.compile(r"Line (\d+) \| (Error.*)")
+RUNTIME_ERROR = re.compile(r"\[Line (\d+)\] --> (.*)")
+
+
+class Expectations:
+    # What a test should print: its output, then either its syntax errors or
+    # the runtime error that stopped it, one line each
+    output: list[str]
+    errors: list[str]
+    runtime_error: str | None
+
+    def __init__(self, source: str):
+        self.output = []
+        self.errors = []
+        self.runtime_error = None
+
+        for line_number, line in enumerate(source.splitlines(), 1):
+            if match := EXPECT_OUTPUT.search(line):
+                self.output.append(match.group(1))
+            elif match := EXPECT_LINE_ERROR.search(line):
+                # Errors only clox reports are left out
+                if match.group(2) != "c":
+                    self.errors.append(f"[line {match.group(3)}] {match.group(4)}")
+            elif match := EXPECT_ERROR.search(line):
+                self.errors.append(f"[line {line_number}] {match.group(1)}")
+            elif match := EXPECT_RUNTIME_ERROR.search(line):
+                self.runtime_error = f"[line {line_number}] {match.group(1)}"
+
+    def transcript(self) -> list[str]:
+        if self.errors:
+            return self.output + self.errors
+
+        if self.runtime_error is not None:
+            return self.output + [f"runtime error {self.runtime_error}"]
+
+        return self.output
+
+
+def transcript(stdout: str, stderr: str) -> list[str]:
+    # pylox's output in the form of Expectations.transcript(). Lines pylox
+    # wouldn't print, like a Python traceback, are kept so they show up in
+    # the diff.
+    lines = stdout.splitlines()
+    runtime_error: list[str] = []
+
+    if lines and (match := RUNTIME_ERROR.fullmatch(lines[-1])):
+        lines.pop()
+        runtime_error.append(f"runtime error [line {match.group(1)}] {match.group(2)}")
+
+    for line in stderr.splitlines():
+        if match := SYNTAX_ERROR.fullmatch(line):
+            lines.append(f"[line {match.group(1)}] {match.group(2)}")
+        else:
+            lines.append(line)
+
+    return lines + runtime_error
+
+
+def run_worker(flags: list[str], file_path: str, report_fd: int):
+    # Runs one test in this process, which is fresh, so that it gets its own
+    # globals; the timing and peak memory go to report_fd, away from the
+    # test's output
+    from pylox import build_arg_parser, pylox_from_args
+
+    args = build_arg_parser().parse_args([*flags, file_path])
+    pylox = pylox_from_args(args)
+    status = 0
+    start = perf_counter()
+
+    try:
+        pylox.run_file(file_path)
+    except SystemExit as exit:
+        status = exit.code or 0
+
+    elapsed = perf_counter() - start
+    sys.stdout.flush()
+    # Peak resident size of the whole process, in KB on Linux
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    with os.fdopen(report_fd, "w") as f_obj:
+        json.dump({"time": elapsed, "memory": memory}, f_obj)
+
+    sys.exit(status)
+
+
+def run_test(engine: str, flags: str, name: str, file_path: str, timeout: float):
+    with open(file_path, "r") as f_obj:
+        expected = Expectations(f_obj.read())
+
+    read_fd, write_fd = os.pipe()
+
+    try:
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "pylox.conformance",
+                "--worker",
+                f"--flags={flags}",
+                f"--report-fd={write_fd}",
+                file_path,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            pass_fds=(write_fd,),
+        )
+    finally:
+        os.close(write_fd)
+
+    result = {"engine": engine, "test": name}
+
+    with os.fdopen(read_fd, "r") as report:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            result["failure"] = [f"timed out after {timeout:g}s"]
+            return result
+
+        measurements = report.read()
+
+    actual = transcript(stdout, stderr)
+    expected_lines = expected.transcript()
+    failure = list(
+        difflib.unified_diff(expected_lines, actual, "expected", "actual", lineterm="")
+    )
+
+    # pylox exits with 70 for syntax errors as well as runtime errors
+    should_fail = bool(expected.errors) or expected.runtime_error is not None
+
+    if not failure and (process.returncode != 0) != should_fail:
+        failure = [f"exit status {process.returncode}"]
+
+    if failure:
+        result["failure"] = failure
+
+    if measurements:
+        result.update(json.loads(measurements))
+
+    return result
+
+
+def find_tests(paths: list[str]) -> list[tuple[str, str]]:
+    # (name, path) of the tests under each path. They're named relative to the
+    # current directory, so running part of the corpus from the same place
+    # finds them in the baseline.
+    tests: list[tuple[str, str]] = []
+
+    for path in paths:
+        if os.path.isfile(path):
+            tests.append((os.path.relpath(path), path))
+            continue
+
+        for directory, dirs, files in os.walk(path):
+            dirs[:] = sorted(name for name in dirs if name not in SKIPPED_DIRS)
+
+            for file_name in sorted(files):
+                if not file_name.endswith(".lox"):
+                    continue
+
+                file_path = os.path.join(directory, file_name)
+
+                with open(file_path, "r") as f_obj:
+                    if NON_TEST in f_obj.read():
+                        continue
+
+                tests.append((os.path.relpath(file_path), file_path))
+
+    return tests
+
+
+def read_baseline(path: str) -> dict:
+    try:
+        with open(path, "r") as f_obj:
+            return json.load(f_obj)
+    except (OSError, ValueError):
+        return {}
+
+
+def print_report(
+    results: list[dict],
+    engines: list[str],
+    baseline: dict,
+    threshold: float,
+    verbose: bool,
+) -> bool:
+    # Prints failures, slowdowns against the baseline and a summary per
+    # engine; returns whether every test passed
+    ok = True
+
+    for engine in engines:
+        engine_results = [result for result in results if result["engine"] == engine]
+        engine_baseline = baseline.get(engine, {})
+        failed = 0
+        slower: list[str] = []
+        total_time = 0.0
+        peak_memory = 0
+
+        for result in engine_results:
+            name = result["test"]
+            time = result.get("time")
+
+            if time is not None:
+                total_time += time
+                peak_memory = max(peak_memory, result["memory"])
+
+            if "failure" in result:
+                failed += 1
+                print(f"FAIL [{engine}] {name}")
+
+                for line in result["failure"]:
+                    print(f"    {line}")
+
+                continue
+
+            previous = engine_baseline.get(name)
+
+            if previous is None or time is None:
+                continue
+
+            memory = result["memory"]
+            ratio = time / previous["time"] if previous["time"] else 1.0
+            memory_ratio = memory / previous["memory"] if previous["memory"] else 1.0
+            line = (
+                f"[{engine}] {name}: {time * 1000:.1f}ms ({ratio:.2f}x), "
+                f"{memory / 1024 / 1024:.1f}MB ({memory_ratio:.2f}x)"
+            )
+
+            if ratio > 1 + threshold and time - previous["time"] > MIN_SLOWDOWN:
+                slower.append(f"SLOWER {line}")
+            elif verbose:
+                print(line)
+
+        for line in slower:
+            print(line)
+
+        passed = len(engine_results) - failed
+        ok = ok and not failed
+        print(
+            f"{engine}: {passed} passed, {failed} failed, {len(slower)} slower "
+            f"than the baseline ({total_time:.2f}s in the tests, "
+            f"{peak_memory / 1024 / 1024:.1f}MB peak)"
+        )
+
+    return ok
+
+
+def main():
+    arg_parser = ArgumentParser(
+        prog="pylox-conformance",
+        description="Run a Lox test corpus with '// expect:' comments against "
+        "pylox, on every core and under each engine.",
+    )
+    arg_parser.add_argument(
+        "paths",
+        nargs="*",
+        help="test files or directories, such as craftinginterpreters' test/",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        metavar="NAME[=FLAGS]",
+        action="append",
+        default=[],
+        help=f"engine to run the tests under, one of {', '.join(ENGINES)} or a "
+        "name with pylox flags (repeatable, default: all of them)",
+    )
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="tests run at once (timings are steadier with 1)",
+    )
+    arg_parser.add_argument("--timeout", type=float, default=60.0)
+    arg_parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        default="conformance-baseline.json",
+        help="timings to compare against, per engine and test",
+    )
+    arg_parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the timings of the passing tests as the new baseline",
+    )
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="flag tests more than this fraction slower than the baseline",
+    )
+    arg_parser.add_argument(
+        "--verbose", action="store_true", help="also print every passing test"
+    )
+    arg_parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    arg_parser.add_argument("--worker", action="store_true", help=SUPPRESS)
+    arg_parser.add_argument("--flags", default="", help=SUPPRESS)
+    arg_parser.add_argument("--report-fd", type=int, help=SUPPRESS)
+    args = arg_parser.parse_args(sys.argv[1:])
+
+    if args.worker:
+        run_worker(shlex.split(args.flags), args.paths[0], args.report_fd)
+        return
+
+    if not args.paths:
+        arg_parser.error("no tests given")
+
+    engines: list[tuple[str, str]] = []
+
+    for engine in args.engine or list(ENGINES):
+        name, separator, flags = engine.partition("=")
+
+        if not separator:
+            if name not in ENGINES:
+                arg_parser.error(f"unknown engine '{name}'")
+
+            flags = ENGINES[name]
+
+        engines.append((name, flags))
+
+    tests = find_tests(args.paths)
+
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        futures = [
+            executor.submit(run_test, name, flags, test, file_path, args.timeout)
+            for name, flags in engines
+            for test, file_path in tests
+        ]
+        results = [future.result() for future in futures]
+
+    baseline = read_baseline(args.baseline)
+    ok = print_report(
+        results,
+        [name for name, _ in engines],
+        baseline,
+        args.threshold,
+        args.verbose,
+    )
+
+    if args.update_baseline:
+        for result in results:
+            if "failure" not in result and "time" in result:
+                baseline.setdefault(result["engine"], {})[result["test"]] = {
+                    "time": result["time"],
+                    "memory": result["memory"],
+                }
+
+        with open(args.baseline, "w") as f_obj:
+            json.dump(baseline, f_obj, indent=2, sort_keys=True)
+
+    if args.json is not None:
+        with open(args.json, "w") as f_obj:
+            json.dump(results, f_obj, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
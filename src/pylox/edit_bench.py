@@ -0,0 +1,172 @@
+import os
+import random
+import statistics
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+
+from pylox.error_handler import ErrorHandler
+from pylox.incremental import Document
+from pylox.interpreter import Interpreter
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.scanner import Scanner
+
+# Typed one character at a time at the start of a line, then erased the same
+# way, so the document goes through the broken states an editor sees
+SNIPPETS = [
+    "var counter = 0;\n",
+    'print "unterminated\n',
+    "fun helper(a, b) { return a + b; }\n",
+    "class Shape < Base { area() { return this.w * this.h; } }\n",
+    "if (total > 10) { total = total - 1; } else { print total; }\n",
+    '"two\nlines";\n',
+]
+# Typed anywhere in a line: comments that swallow the rest of it, and line
+# breaks
+INLINE_SNIPPETS = [
+    " // note",
+    " /* note",
+    "\n",
+    "\n\n  ",
+]
+
+
+class QuietErrorHandler(ErrorHandler):
+    def report(self, line: int, where: str, message: str):
+        self.had_error = True
+
+
+def full_pipeline(text: str):
+    # What an editor without the incremental front end runs on each keystroke
+    error_handler = QuietErrorHandler()
+    tokens = Scanner(text, error_handler).scan_tokens()
+    stmts = Parser(tokens, error_handler).parse()
+
+    if not error_handler.had_error:
+        Resolver(Interpreter(error_handler), error_handler).resolve(stmts)
+
+
+def snapshot(document: Document) -> tuple:
+    document.statements()
+    tokens = [
+        (token.token_type, token.lexeme, token.line)
+        for chunk in document.chunks
+        for token in chunk.tokens
+    ]
+    return tokens, [str(diagnostic) for diagnostic in document.diagnostics()]
+
+
+def keystrokes(text: str, rng: random.Random, count: int):
+    # Yields (start, end, text) edits, in the coordinates of the text as it
+    # is when each one is applied
+    line_starts = [0] + [i + 1 for i, c in enumerate(text) if c == "\n"]
+
+    while count > 0:
+        if rng.random() < 0.5:
+            offset = rng.choice(line_starts)
+            snippet = rng.choice(SNIPPETS)
+        else:
+            offset = rng.randrange(len(text) + 1)
+            snippet = rng.choice(INLINE_SNIPPETS)
+
+        for i, c in enumerate(snippet):
+            yield offset + i, offset + i, c
+
+        for i in range(len(snippet), 0, -1):
+            yield offset + i - 1, offset + i, ""
+
+        count -= 2 * len(snippet)
+
+
+def main():
+    arg_parser = ArgumentParser(
+        prog="pylox-edit-bench",
+        description="Measure how long the incremental front end takes to handle "
+        "a keystroke in a large file, against a full scan, parse and resolve.",
+    )
+    arg_parser.add_argument(
+        "files",
+        nargs="*",
+        help=".lox files to concatenate (default: every benchmark)",
+    )
+    arg_parser.add_argument("--dir", default="benchmarks")
+    arg_parser.add_argument(
+        "--copies", type=int, default=40, help="times the files are repeated"
+    )
+    arg_parser.add_argument("--edits", type=int, default=400)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare the document with a fresh parse after every edit",
+    )
+    args = arg_parser.parse_args(sys.argv[1:])
+
+    files = args.files or [
+        os.path.join(args.dir, name)
+        for name in sorted(os.listdir(args.dir))
+        if name.endswith(".lox")
+    ]
+    sources = []
+
+    for file_path in files:
+        with open(file_path) as f_obj:
+            sources.append(f_obj.read())
+
+    text = "\n".join(sources) * args.copies
+    rng = random.Random(args.seed)
+
+    start = perf_counter()
+    document = Document(text)
+    opened = perf_counter() - start
+    incremental: list[float] = []
+    # Edits that didn't leave a string or a block open to the end of the file
+    local: list[float] = []
+    full: list[float] = []
+    mismatches = 0
+
+    for i, (edit_start, edit_end, new_text) in enumerate(
+        keystrokes(text, rng, args.edits)
+    ):
+        start = perf_counter()
+        document.edit(edit_start, edit_end, new_text)
+        incremental.append(perf_counter() - start)
+
+        if document.reparsed < len(document.text) / 10:
+            local.append(incremental[-1])
+
+        # The full pipeline is much slower, so it's timed on some edits only
+        if i % 20 == 0:
+            start = perf_counter()
+            full_pipeline(document.text)
+            full.append(perf_counter() - start)
+
+        if args.check and snapshot(document) != snapshot(Document(document.text)):
+            mismatches += 1
+            print(f"edit {i} differs from a fresh parse", file=sys.stderr)
+
+    lines = text.count("\n") + 1
+    print(f"{lines} lines, {len(document.chunks)} declarations")
+    print(f"open:        {opened * 1000:8.1f}ms")
+
+    for name, times in (("incremental", incremental), ("local", local), ("full", full)):
+        if not times:
+            continue
+
+        times.sort()
+        print(
+            f"{name + ':':<12} {statistics.median(times) * 1000:8.2f}ms median "
+            f"{times[int(len(times) * 0.95)] * 1000:8.2f}ms p95 "
+            f"{times[-1] * 1000:8.2f}ms max ({len(times)} edits)"
+        )
+
+    if args.check:
+        print(f"{mismatches} edits differ from a fresh parse")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,22 @@ from pylox.token import Token
 from pylox.runtime_error import LoxRuntimeError
 
 
+class Cell:
+    # Holds a variable shared by its scope and the closures that capture it,
+    # when it can change after being captured. Environments store the cell in
+    # place of the value.
+    value: object
+
+    def __init__(self, value: object):
+        self.value = value
+
+
 class Environment:
     enclosing: Final
     values: dict[str, object]
 
-    def __init__(self, enclosing=None):
-        self.values = {}
+    def __init__(self, enclosing=None, values: dict[str, object] | None = None):
+        self.values = values if values is not None else {}
         self.enclosing = enclosing
 
     def define(self, name: str, value: object) -> None:
@@ -27,7 +37,13 @@ class Environment:
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
 
     def assign_at(self, distance: int, name: Token, value: object):
-        self.ancestor(distance).values[name.lexeme] = value
+        values = self.ancestor(distance).values
+        cell = values.get(name.lexeme)
+
+        if type(cell) is Cell:
+            cell.value = value
+        else:
+            values[name.lexeme] = value
 
     def get(self, name: Token) -> object:
         # Look for variable in current environment
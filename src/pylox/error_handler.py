@@ -22,6 +22,11 @@ class ErrorHandler:
         self.had_error = True
         self.had_runtime_error = True
 
+    def module_error(self, message: str):
+        # An error of an imported module, which comes with the module's path
+        print(message, file=sys.stderr)
+        self.had_error = True
+
     def report(self, line: int, where: str, message: str):
         print(f"Line {line} | Error{where}: {message}", file=sys.stderr)
         self.had_error = True
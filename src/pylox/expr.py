@@ -8,6 +8,7 @@ class Expr:
 class Assign(Expr):
     name: Token
     value: Expr
+    depth: int | None = None
 
     def __init__(self, name, value):
         self.name = name
@@ -21,6 +22,7 @@ class Binary(Expr):
     left: Expr
     operator: Token
     right: Expr
+    proven: object = None
 
     def __init__(self, left, operator, right):
         self.left = left
@@ -35,6 +37,7 @@ class Call(Expr):
     callee: Expr
     paren: Token
     arguments: list[Expr]
+    target: object = None
 
     def __init__(self, callee, paren, arguments):
         self.callee = callee
@@ -67,6 +70,32 @@ class Grouping(Expr):
         return visitor.visit_grouping_expr(self)
 
 
+class Index(Expr):
+    object: Expr
+    bracket: Token
+    index: Expr
+
+    def __init__(self, object, bracket, index):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+
+    def accept(self, visitor):
+        return visitor.visit_index_expr(self)
+
+
+class ListLiteral(Expr):
+    bracket: Token
+    elements: list[Expr]
+
+    def __init__(self, bracket, elements):
+        self.bracket = bracket
+        self.elements = elements
+
+    def accept(self, visitor):
+        return visitor.visit_listliteral_expr(self)
+
+
 class Literal(Expr):
     value: object
 
@@ -81,6 +110,7 @@ class Logical(Expr):
     left: Expr
     operator: Token
     right: Expr
+    proven: object = None
 
     def __init__(self, left, operator, right):
         self.left = left
@@ -91,6 +121,20 @@ class Logical(Expr):
         return visitor.visit_logical_expr(self)
 
 
+class MapLiteral(Expr):
+    brace: Token
+    keys: list[Expr]
+    values: list[Expr]
+
+    def __init__(self, brace, keys, values):
+        self.brace = brace
+        self.keys = keys
+        self.values = values
+
+    def accept(self, visitor):
+        return visitor.visit_mapliteral_expr(self)
+
+
 class Set(Expr):
     object: Expr
     name: Token
@@ -105,9 +149,26 @@ class Set(Expr):
         return visitor.visit_set_expr(self)
 
 
+class SetIndex(Expr):
+    object: Expr
+    bracket: Token
+    index: Expr
+    value: Expr
+
+    def __init__(self, object, bracket, index, value):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visit_setindex_expr(self)
+
+
 class Super(Expr):
     keyword: Token
     method: Token
+    depth: int | None = None
 
     def __init__(self, keyword, method):
         self.keyword = keyword
@@ -119,6 +180,7 @@ class Super(Expr):
 
 class This(Expr):
     keyword: Token
+    depth: int | None = None
 
     def __init__(self, keyword):
         self.keyword = keyword
@@ -130,6 +192,7 @@ class This(Expr):
 class Unary(Expr):
     operator: Token
     right: Expr
+    proven: object = None
 
     def __init__(self, operator, right):
         self.operator = operator
@@ -141,6 +204,7 @@ class Unary(Expr):
 
 class Variable(Expr):
     name: Token
+    depth: int | None = None
 
     def __init__(self, name):
         self.name = name
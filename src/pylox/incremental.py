@@ -0,0 +1,430 @@
+from bisect import bisect_right
+from typing import Final
+
+from pylox.error_handler import ErrorHandler
+from pylox.expr import Assign, Expr, Variable
+from pylox.interpreter import Interpreter
+from pylox.lox_native import registry
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.scanner import Scanner
+from pylox.stmt import Class, Function, Stmt, Var
+from pylox.token import Token
+
+
+class Diagnostic:
+    ERROR: Final[int] = 1
+    WARNING: Final[int] = 2
+
+    # Lines start at 1 and columns at 0, like the rest of pylox
+    line: Final[int]
+    column: Final[int]
+    length: Final[int]
+    message: Final[str]
+    severity: Final[int]
+
+    def __init__(self, line: int, column: int, length: int, message: str, severity):
+        self.line = line
+        self.column = column
+        self.length = length
+        self.message = message
+        self.severity = severity
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Diagnostic) and vars(self) == vars(other)
+
+    def __str__(self):
+        return f"Line {self.line}:{self.column} | {self.message}"
+
+
+class Diagnostics(ErrorHandler):
+    # Collects errors instead of printing them, with where they start in the
+    # scanned source
+    errors: list[tuple[int, int, int, str]]
+    scanner: "ChunkScanner | None" = None
+
+    def __init__(self):
+        self.errors = []
+
+    def error(self, token: Token | int, message: str):
+        self.had_error = True
+
+        if isinstance(token, Token):
+            offset = self.scanner.offsets[token]
+            self.errors.append((offset, len(token.lexeme), token.line, message))
+        else:
+            # The scanner only knows the line, and where the bad token starts
+            self.errors.append((self.scanner.start, 1, token, message))
+
+
+class ChunkScanner(Scanner):
+    # Also records where each token starts, and whether the source ends in
+    # an unterminated string or in a comment, which would both go on into
+    # the text that follows
+    offsets: dict[Token, int]
+    # The line each token starts on, token.line being where it ends
+    start_lines: dict[Token, int]
+    start_line: int = 1
+    open_string: bool = False
+    open_comment: bool = False
+
+    def __init__(self, source: str, error_handler: ErrorHandler, line: int):
+        super().__init__(source, error_handler)
+        self.line = line
+        self.offsets = {}
+        self.start_lines = {}
+
+    def scan_tokens(self) -> list[Token]:
+        tokens = super().scan_tokens()
+        self.offsets[tokens[-1]] = len(self.source)
+        return tokens
+
+    def scan_token(self):
+        self.start_line = self.line
+        super().scan_token()
+
+        if self.is_at_end() and self.source[self.start : self.start + 2] in (
+            "//",
+            "/*",
+        ):
+            self.open_comment = True
+
+    def add_token(self, token_type, literal=None, lexeme=None):
+        super().add_token(token_type, literal, lexeme)
+        self.offsets[self.tokens[-1]] = self.start
+        self.start_lines[self.tokens[-1]] = self.start_line
+
+    def string(self):
+        count = len(self.tokens)
+        super().string()
+
+        if len(self.tokens) == count:
+            self.open_string = True
+
+
+class ChunkResolver(Resolver):
+    # Also collects the global variables a chunk reads or assigns
+    globals: list[Token]
+
+    def __init__(self, interpreter, error_handler: ErrorHandler):
+        super().__init__(interpreter, error_handler)
+        self.globals = []
+
+    def resolve_local(self, expr: Expr, name: Token, assigned: bool = False):
+        super().resolve_local(expr, name, assigned)
+
+        if isinstance(expr, (Variable, Assign)) and not any(
+            name.lexeme in scope for scope in self.scopes
+        ):
+            self.globals.append(name)
+
+
+class Chunk:
+    # A top-level declaration of a document, followed by the whitespace and
+    # comments up to the next one. Errors and variable uses are kept relative
+    # to the chunk, so that edits before it only move start and line; the
+    # lines of its tokens are fixed up when the statements are asked for.
+    start: int
+    line: int
+    shift: int = 0
+    tokens: Final[list[Token]]
+    stmt: Final[Stmt | None]
+    # The top-level name it declares, if any
+    name: Final[str | None]
+    # (offset, length, line, message), relative to the chunk
+    errors: Final[list[tuple[int, int, int, str]]]
+    # The globals it uses, as (name, offset, length, line)
+    uses: Final[list[tuple[str, int, int, int]]]
+    undefined: list[tuple[str, int, int, int]]
+    # What the resolver found, as in Interpreter
+    _closures: Final[dict[Function, tuple[list[tuple[str, int]], tuple[str, ...]]]]
+    _cells: Final[set[Stmt]]
+
+    def __init__(self, start: int, line: int, tokens: list[Token], stmt: Stmt | None):
+        self.start = start
+        self.line = line
+        self.tokens = tokens
+        self.stmt = stmt
+        self.name = None
+
+        if isinstance(stmt, (Var, Function, Class)):
+            self.name = stmt.name.lexeme
+
+        self.errors = []
+        self.uses = []
+        self.undefined = []
+        self._closures = {}
+        self._cells = set()
+
+    # Called by the resolver, like on the interpreter
+    def resolve(self, expr: Expr, depth: int):
+        expr.depth = depth
+
+    def resolve_closure(
+        self,
+        function: Function,
+        captures: list[tuple[str, int]],
+        cells: list[str],
+    ):
+        self._closures[function] = (captures, tuple(cells))
+
+    def resolve_cell(self, declaration: Stmt):
+        self._cells.add(declaration)
+
+    def check(self, definitions: dict[str, int]):
+        self.undefined = [
+            use
+            for use in self.uses
+            if use[0] not in definitions and use[0] not in registry
+        ]
+
+
+class Document:
+    # Source text kept scanned, parsed and resolved across edits, for
+    # editors. An edit is applied to the chunks it touches (and the one
+    # before, whose last token may join the edited text) and the rest are
+    # reused as they are. When the new text doesn't end cleanly, in an open
+    # string, a comment running to its end or a declaration cut short, it
+    # would have taken in what follows in a full parse, so the range grows
+    # until it does. Only chunks using a
+    # global whose definition appeared or disappeared are checked again.
+    text: str
+    chunks: list[Chunk]
+    # How many chunks declare each top-level name
+    definitions: dict[str, int]
+    users: dict[str, set[Chunk]]
+    # Characters scanned and parsed again by the last edit
+    reparsed: int = 0
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.definitions = {}
+        self.users = {}
+        self.chunks = self.parse(0, len(text), 1)[0]
+        self.update_names([], self.chunks)
+
+    def edit(self, start: int, end: int, text: str):
+        # Replaces text[start:end], offsets are in the text before the edit
+        chunks = self.chunks
+        delta = len(text) - (end - start)
+        lines = text.count("\n") - self.text.count("\n", start, end)
+        self.text = self.text[:start] + text + self.text[end:]
+
+        first = max(bisect_right(chunks, start, key=Document.chunk_start) - 2, 0)
+        last = max(bisect_right(chunks, end, key=Document.chunk_start) - 1, 0)
+        region_start = chunks[first].start
+        line = chunks[first].line
+        new_chunks: list[Chunk] = []
+        self.reparsed = 0
+        step = 1
+
+        while True:
+            if last + 1 < len(chunks):
+                region_end = chunks[last + 1].start + delta
+            else:
+                region_end = len(self.text)
+
+            parsed, clean = self.parse(region_start, region_end, line)
+            self.reparsed += region_end - region_start
+
+            if clean or last + 1 == len(chunks):
+                new_chunks += parsed
+                break
+
+            # The declarations before the last one stay as they are, only the
+            # last one goes on into the next chunks
+            new_chunks += parsed[:-1]
+            region_start = parsed[-1].start
+            line = parsed[-1].line
+            last = min(last + step, len(chunks) - 1)
+            step *= 2
+
+        for chunk in chunks[last + 1 :]:
+            chunk.start += delta
+            chunk.line += lines
+            chunk.shift += lines
+
+        removed = chunks[first : last + 1]
+        chunks[first : last + 1] = new_chunks
+        self.update_names(removed, new_chunks)
+
+    @staticmethod
+    def chunk_start(chunk: Chunk) -> int:
+        return chunk.start
+
+    def parse(self, start: int, end: int, line: int) -> tuple[list[Chunk], bool]:
+        # Scans, parses and resolves text[start:end] into chunks, and tells
+        # whether it ended cleanly
+        diagnostics = Diagnostics()
+        scanner = ChunkScanner(self.text[start:end], diagnostics, line)
+        diagnostics.scanner = scanner
+        tokens = scanner.scan_tokens()
+        scan_errors = diagnostics.errors
+        diagnostics.errors = []
+
+        parser = Parser(tokens, diagnostics)
+        chunks: list[Chunk] = []
+        offsets: list[int] = []
+        # Whether the last declaration parsed without errors
+        complete = True
+
+        while not parser.is_at_end():
+            begin = parser.current
+            stmt = parser.declaration()
+            offset = 0 if not chunks else scanner.offsets[tokens[begin]]
+            chunk_line = line if not chunks else scanner.start_lines[tokens[begin]]
+            chunk = Chunk(
+                start + offset, chunk_line, tokens[begin : parser.current], stmt
+            )
+            complete = not diagnostics.errors
+            self.add_errors(chunk, offset, diagnostics.errors)
+            diagnostics.errors = []
+            chunks.append(chunk)
+            offsets.append(offset)
+
+        if not chunks:
+            chunks.append(Chunk(start, line, [], None))
+            offsets.append(0)
+
+        for error in scan_errors:
+            i = bisect_right(offsets, error[0]) - 1
+            self.add_errors(chunks[i], offsets[i], [error])
+
+        for chunk, offset in zip(chunks, offsets):
+            # Like a full run, declarations that don't parse aren't resolved
+            if chunk.errors:
+                continue
+
+            resolver = ChunkResolver(chunk, diagnostics)
+            resolver.resolve(chunk.stmt)
+            self.add_errors(chunk, offset, diagnostics.errors)
+            diagnostics.errors = []
+
+            for token in resolver.globals:
+                chunk.uses.append(
+                    (
+                        token.lexeme,
+                        scanner.offsets[token] - offset,
+                        len(token.lexeme),
+                        token.line - chunk.line,
+                    )
+                )
+
+        return chunks, complete and not scanner.open_string and not scanner.open_comment
+
+    def add_errors(
+        self, chunk: Chunk, offset: int, errors: list[tuple[int, int, int, str]]
+    ):
+        for error_offset, length, line, message in errors:
+            chunk.errors.append(
+                (error_offset - offset, length, line - chunk.line, message)
+            )
+
+    def update_names(self, removed: list[Chunk], added: list[Chunk]):
+        names = {chunk.name for chunk in removed + added if chunk.name is not None}
+        defined = {name for name in names if name in self.definitions}
+
+        for chunk in removed:
+            if chunk.name is not None:
+                self.definitions[chunk.name] -= 1
+
+                if not self.definitions[chunk.name]:
+                    del self.definitions[chunk.name]
+
+            for use in chunk.uses:
+                self.users[use[0]].discard(chunk)
+
+        for chunk in added:
+            if chunk.name is not None:
+                self.definitions[chunk.name] = self.definitions.get(chunk.name, 0) + 1
+
+            for use in chunk.uses:
+                self.users.setdefault(use[0], set()).add(chunk)
+
+        changed = {
+            name for name in names if (name in self.definitions) != (name in defined)
+        }
+        checked = set(added)
+
+        for name in changed:
+            checked.update(self.users.get(name, ()))
+
+        for chunk in checked:
+            chunk.check(self.definitions)
+
+    def diagnostics(self) -> list[Diagnostic]:
+        diagnostics: list[Diagnostic] = []
+
+        for chunk in self.chunks:
+            for offset, length, line, message in chunk.errors:
+                diagnostics.append(
+                    self.diagnostic(
+                        chunk, offset, length, line, message, Diagnostic.ERROR
+                    )
+                )
+
+            for name, offset, length, line in chunk.undefined:
+                diagnostics.append(
+                    self.diagnostic(
+                        chunk,
+                        offset,
+                        length,
+                        line,
+                        f"Undefined variable '{name}'.",
+                        Diagnostic.WARNING,
+                    )
+                )
+
+        return diagnostics
+
+    def diagnostic(
+        self,
+        chunk: Chunk,
+        offset: int,
+        length: int,
+        line: int,
+        message: str,
+        severity: int,
+    ) -> Diagnostic:
+        offset += chunk.start
+        column = offset - self.text.rfind("\n", 0, offset) - 1
+        return Diagnostic(chunk.line + line, column, length, message, severity)
+
+    def offset(self, line: int, column: int) -> int:
+        # Offset of a line (starting at 1) and column in the text
+        i = max(bisect_right(self.chunks, line, key=Document.chunk_line) - 1, 0)
+        chunk = self.chunks[i]
+        offset = self.text.rfind("\n", 0, chunk.start) + 1
+
+        for _ in range(line - chunk.line):
+            offset = self.text.find("\n", offset) + 1
+
+            if offset == 0:
+                return len(self.text)
+
+        return min(offset + column, len(self.text))
+
+    @staticmethod
+    def chunk_line(chunk: Chunk) -> int:
+        return chunk.line
+
+    def statements(self) -> list[Stmt]:
+        stmts: list[Stmt] = []
+
+        for chunk in self.chunks:
+            if chunk.shift:
+                for token in chunk.tokens:
+                    token.line += chunk.shift
+
+                chunk.shift = 0
+
+            if chunk.stmt is not None:
+                stmts.append(chunk.stmt)
+
+        return stmts
+
+    def resolve_into(self, interpreter: Interpreter):
+        # Gives the interpreter what the resolver found, to run statements()
+        for chunk in self.chunks:
+            interpreter._closures.update(chunk._closures)
+            interpreter._cells.update(chunk._cells)
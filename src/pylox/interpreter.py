@@ -1,7 +1,8 @@
-from typing import Final
+from operator import add, ge, gt, le, lt, mul, sub, truediv
+from typing import Callable, Final
 
 from pylox.visitor import Visitor
-from pylox.environment import Environment
+from pylox.environment import Cell, Environment
 from pylox.error_handler import ErrorHandler
 from pylox.expr import (
     Expr,
@@ -12,71 +13,317 @@ from pylox.expr import (
     Literal,
     Logical,
     Grouping,
+    Index,
+    ListLiteral,
+    MapLiteral,
     Set,
+    SetIndex,
     Super,
     This,
     Unary,
     Variable,
 )
+from pylox.lox_array import LoxArray
 from pylox.lox_callable import LoxCallable
 from pylox.lox_class import LoxClass
-from pylox.lox_exceptions import LoxReturnException
+from pylox.lox_exceptions import LoxNativeError, LoxReturnException
 from pylox.lox_instance import LoxInstance
+from pylox.lox_map import LoxMap
+from pylox.lox_native import LoxModule, LoxNative, registry
+from pylox.lox_rope import LoxRope
+from pylox import natives  # noqa: F401
 from pylox.lox_function import LoxFunction
+from pylox.line_table import LineTable
+from pylox.memo_cache import MemoCache, MemoStats
+from pylox import modules
+from pylox.output import Output
 from pylox.runtime_error import LoxRuntimeError
-from pylox.stmt import Stmt, Block, Break, Class, Function, Return, Var, If, While
+from pylox.stmt import (
+    Stmt,
+    Block,
+    Break,
+    Class,
+    For,
+    Function,
+    Return,
+    Var,
+    If,
+    Import,
+    While,
+)
 from pylox.token import Token
 from pylox.token_type import TokenType
+from pylox.type_analyzer import LoxType
+
+# The binary operators, for operands proven to be numbers
+UNCHECKED_OPERATORS: Final = {
+    TokenType.MINUS: sub,
+    TokenType.SLASH: truediv,
+    TokenType.STAR: mul,
+    TokenType.PLUS: add,
+    TokenType.GREATER: gt,
+    TokenType.GREATER_EQUAL: ge,
+    TokenType.LESS: lt,
+    TokenType.LESS_EQUAL: le,
+}
 
 
 class Interpreter(Visitor):
     error_handler: ErrorHandler
     _globals: Final[Environment] = Environment()
-    _locals: Final[dict[Expr, int]]
+    # The modules that ran, in the globals like everything they declare
+    _imported: Final[set[str]] = set()
+    # What the resolver found for closures: the variables each function
+    # captures with their distance from where it's created, its parameters
+    # that live in cells, and the other declarations that do
+    _closures: Final[dict[Function, tuple[list[tuple[str, int]], tuple[str, ...]]]]
+    _cells: Final[set[Stmt]]
     environment: Environment = _globals
     is_repl: bool
-
-    class Clock(LoxCallable):
-        def __init__(self):
-            from time import time
-
-            super().__init__()
-            self.start_time = time()
-
-        @property
-        def arity(self):
-            return 0
-
-        def call(self):
-            from time import time
-
-            return time() - self.start_time
-
-        def __str__(self):
-            return "<native fn>"
-
-    _globals.define("clock", Clock())
+    output: Output
+    pure_functions: set[Function]
+    memo_size: int
+    memo_stats: dict[Function, MemoStats]
+    hooks: list[Callable[[str, Expr | Stmt | None, object], None]] | None = None
+    frames: list[list] | None = None
+    # Whether the instrumented methods are installed, and whether a profiler
+    # asked for the frames and so needs them for good
+    instrumented: bool = False
+    tracks_frames: bool = False
+    line_table: LineTable | None = None
+    scheduler: object | None = None
+    task: object | None = None
 
     class LoxBreakException(RuntimeError):
         pass
 
-    def __init__(self, error_handler: ErrorHandler, is_repl: bool = False):
+    def __init__(
+        self,
+        error_handler: ErrorHandler,
+        is_repl: bool = False,
+        output: Output | None = None,
+    ):
         self.error_handler = error_handler
         self.is_repl = is_repl
-        self._locals = {}
+        self.output = output if output is not None else Output(line_buffered=is_repl)
+        self._closures = {}
+        self._cells = set()
+        self.pure_functions = set()
+        self.memo_size = 0
+        self.memo_stats = {}
+
+        for name, value in registry.items():
+            if name not in self._globals.values:
+                self._globals.define(name, value)
+
+    def define_native(self, value: LoxNative | LoxModule):
+        self._globals.define(value.name, value)
+
+    def memoize(self, pure_functions: set[Function], memo_size: int):
+        self.pure_functions = pure_functions
+        self.memo_size = memo_size
 
     def interpret(self, stmts: list[Stmt]):
         try:
             for stmt in stmts:
                 self.execute(stmt)
         except LoxRuntimeError as err:
+            if self.hooks:
+                self.emit("exception", None, err)
+
+            # What was printed before the error comes before it
+            self.output.flush()
             self.error_handler.runtime_error(err)
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.finish()
+
+            self.output.flush()
+
+    def fork(self) -> "Interpreter":
+        # An interpreter for another task of the same program: it shares the
+        # globals, what the resolver found, the output, the memo caches and the
+        # hooks, but has its own current environment and call stack
+        interpreter = Interpreter(self.error_handler, self.is_repl, self.output)
+        interpreter._closures = self._closures
+        interpreter._cells = self._cells
+        interpreter.pure_functions = self.pure_functions
+        interpreter.memo_size = self.memo_size
+        interpreter.memo_stats = self.memo_stats
+
+        for hook in self.hooks or []:
+            interpreter.add_hook(hook)
+
+        return interpreter
 
     def execute(self, stmt: Stmt):
         stmt.accept(self)
 
+    def add_hook(self, hook: Callable[[str, Expr | Stmt | None, object], None]):
+        # Hooks are called as hook(event, node, arg) with the events:
+        #   "statement"  before a statement runs, arg is its line
+        #   "call"       before a call, node is the Call and arg the callee
+        #   "return"     after a call, arg is the returned value
+        #   "exception"  when a runtime error leaves a call (or the program)
+        #   "alloc"      when an instance, class, function or bound method
+        #                is created, arg is the new object
+        if self.hooks is None:
+            self.hooks = []
+
+        self.hooks.append(hook)
+        self.instrument()
+
+    def remove_hook(self, hook: Callable[[str, Expr | Stmt | None, object], None]):
+        if not self.hooks or hook not in self.hooks:
+            raise ValueError("hook is not installed")
+
+        self.hooks.remove(hook)
+
+        if not self.hooks and not self.tracks_frames:
+            self.uninstrument()
+
+    def track_frames(self) -> list[list]:
+        self.tracks_frames = True
+        self.instrument()
+        return self.frames
+
+    def instrument(self):
+        # Switch this instance onto the instrumented path, which keeps a
+        # shadow stack of [name, line] frames for the active Lox calls and
+        # reports events to the hooks. The instrumented methods shadow the
+        # regular ones on the instance, so interpreters without hooks or
+        # frame tracking run the plain methods.
+        if self.instrumented:
+            return
+
+        self.instrumented = True
+
+        if self.frames is None:
+            self.frames = [["<module>", 0]]
+            self.line_table = LineTable()
+
+        self.execute = self.execute_instrumented
+        self.visit_call_expr = self.visit_call_expr_instrumented
+        self.visit_class_stmt = self.visit_class_stmt_instrumented
+        self.visit_function_stmt = self.visit_function_stmt_instrumented
+        self.visit_get_expr = self.visit_get_expr_instrumented
+        self.visit_super_expr = self.visit_super_expr_instrumented
+        self.preempt()
+
+    def uninstrument(self):
+        # Back onto the regular methods. The frames are kept, calls that
+        # started instrumented still pop theirs when they return.
+        for name in (
+            "execute",
+            "visit_call_expr",
+            "visit_class_stmt",
+            "visit_function_stmt",
+            "visit_get_expr",
+            "visit_super_expr",
+        ):
+            self.__dict__.pop(name, None)
+
+        self.instrumented = False
+        self.preempt()
+
+    def preempt(self):
+        # The scheduler of a program with tasks wraps execute() as well, to
+        # switch tasks between statements, so the wrapper goes around the
+        # one that was just installed
+        if self.scheduler is not None:
+            self.scheduler.preempt(self, self.task)
+
+    def emit(self, event: str, node: Expr | Stmt | None, arg: object):
+        for hook in self.hooks:
+            hook(event, node, arg)
+
+    def execute_instrumented(self, stmt: Stmt):
+        line = self.line_table.line_of(stmt)
+
+        if line is not None:
+            self.frames[-1][1] = line
+
+        if self.hooks:
+            self.emit("statement", stmt, line)
+
+        stmt.accept(self)
+
+    def visit_class_stmt_instrumented(self, stmt: Class):
+        Interpreter.visit_class_stmt(self, stmt)
+
+        if self.hooks:
+            class_: LoxClass = self.declared_value(stmt.name)
+            self.emit("alloc", stmt, class_)
+
+            for method in class_.methods.values():
+                self.emit("alloc", stmt, method)
+
+    def visit_function_stmt_instrumented(self, stmt: Function):
+        Interpreter.visit_function_stmt(self, stmt)
+
+        if self.hooks:
+            self.emit("alloc", stmt, self.declared_value(stmt.name))
+
+    def declared_value(self, name: Token) -> object:
+        value = self.environment.get(name)
+        return value.value if type(value) is Cell else value
+
+    def visit_get_expr_instrumented(self, expr: Get):
+        obj: object = self.evaluate(expr.object)
+
+        if isinstance(obj, LoxInstance):
+            value = obj.get_property(expr.name)
+
+            # Fields are returned as they are, methods are bound on each access
+            if self.hooks and expr.name.lexeme not in obj._fields:
+                self.emit("alloc", expr, value)
+
+            return value
+
+        if isinstance(obj, LoxModule):
+            return obj.get_property(expr.name)
+
+        raise LoxRuntimeError(expr.name, "Only instances have properties.")
+
+    def visit_super_expr_instrumented(self, expr: Super):
+        method = Interpreter.visit_super_expr(self, expr)
+
+        if self.hooks:
+            self.emit("alloc", expr, method)
+
+        return method
+
     def resolve(self, expr: Expr, depth: int):
-        self._locals[expr] = depth
+        # Kept on the node, which the interpreter has at hand when it runs
+        expr.depth = depth
+
+    def resolve_closure(
+        self,
+        function: Function,
+        captures: list[tuple[str, int]],
+        cells: list[str],
+    ):
+        self._closures[function] = (captures, tuple(cells))
+
+    def resolve_cell(self, declaration: Stmt):
+        self._cells.add(declaration)
+
+    def make_function(
+        self,
+        declaration: Function,
+        environment: Environment,
+        is_initializer: bool,
+    ) -> LoxFunction:
+        # The closure only holds the variables the function uses from the
+        # enclosing scopes (variables that can change as the cells they share
+        # with their scope), so it doesn't keep whole scope chains alive
+        captures, cells = self._closures.get(declaration, ((), ()))
+        closure = Environment()
+
+        for name, distance in captures:
+            closure.values[name] = environment.get_at(distance, name)
+
+        return LoxFunction(declaration, closure, is_initializer, cells)
 
     def execute_block(self, stmts: list[Stmt], environment: Environment):
         previous = self.environment
@@ -90,6 +337,12 @@ class Interpreter(Visitor):
             self.environment = previous
 
     def visit_block_stmt(self, stmt: Block) -> None:
+        if not stmt.scoped:
+            for statement in stmt.statements:
+                self.execute(statement)
+
+            return None
+
         self.execute_block(stmt.statements, Environment(self.environment))
         return None
 
@@ -104,50 +357,107 @@ class Interpreter(Visitor):
                     stmt.superclass.name, "Superclass must be a class."
                 )
 
-        self.environment.define(stmt.name.lexeme, None)
+        cell: Cell | None = None
+
+        if stmt in self._cells:
+            cell = Cell(None)
+            self.environment.define(stmt.name.lexeme, cell)
+        else:
+            self.environment.define(stmt.name.lexeme, None)
+
+        environment = self.environment
 
         if stmt.superclass is not None:
             environment = Environment(self.environment)
-            self.environment.define("super", superclass)
+            environment.define("super", superclass)
 
         methods = {}
 
         for method in stmt.methods:
-            function = LoxFunction(
+            function = self.make_function(
                 method,
-                self.environment,
+                environment,
                 method.name.lexeme == "init",
             )
             methods[method.name.lexeme] = function
 
         class_ = LoxClass(stmt.name.lexeme, superclass, methods)
 
-        if superclass is not None:
-            environment = self.environment.enclosing
-
-        self.environment.assign(stmt.name, class_)
+        if cell is not None:
+            cell.value = class_
+        else:
+            self.environment.assign(stmt.name, class_)
 
     def visit_expression_stmt(self, stmt: Stmt) -> None:
         evaluated_expr = self.evaluate(stmt.expression)
 
         if self.is_repl:
-            print(self.stringify(evaluated_expr))
+            self.output.write(self.stringify(evaluated_expr))
         return None
 
     def visit_function_stmt(self, stmt: Function):
-        function: LoxFunction = LoxFunction(stmt, self.environment, False)
-        self.environment.define(stmt.name.lexeme, function)
+        cell: Cell | None = None
+
+        # A function that captures itself needs its cell before it exists
+        if stmt in self._cells:
+            cell = Cell(None)
+            self.environment.define(stmt.name.lexeme, cell)
+
+        function: LoxFunction = self.make_function(stmt, self.environment, False)
+
+        if stmt in self.pure_functions:
+            stats = self.memo_stats.get(stmt)
+
+            if stats is None:
+                stats = MemoStats(stmt.name.lexeme)
+                self.memo_stats[stmt] = stats
+
+            function.enable_memo(MemoCache(self.memo_size, stats))
+
+        if cell is not None:
+            cell.value = function
+        else:
+            self.environment.define(stmt.name.lexeme, function)
+
         return None
 
     def visit_if_stmt(self, stmt: If) -> None:
-        if self.is_truthy(self.evaluate(stmt.condition)):
+        condition: object = self.evaluate(stmt.condition)
+
+        # Conditions proven to be booleans aren't tested for truth
+        if stmt.proven is None:
+            condition = self.is_truthy(condition)
+
+        if condition:
             self.execute(stmt.then_branch)
         elif stmt.else_branch is not None:
             self.execute(stmt.else_branch)
 
+    def visit_import_stmt(self, stmt: Import) -> None:
+        # A module runs the first time it's imported
+        if stmt.module in self._imported:
+            return
+
+        module = modules.registry.get(stmt.module)
+
+        if module is None:
+            raise LoxRuntimeError(stmt.path, "Module isn't loaded.")
+
+        self._imported.add(stmt.module)
+        self._closures.update(module._closures)
+        self._cells.update(module._cells)
+        # The REPL only echoes its own expressions
+        is_repl = self.is_repl
+        self.is_repl = False
+
+        try:
+            self.execute_block(module.stmts, self._globals)
+        finally:
+            self.is_repl = is_repl
+
     def visit_print_stmt(self, stmt: Stmt) -> None:
         value: object = self.evaluate(stmt.expression)
-        print(self.stringify(value))
+        self.output.write(self.stringify(value))
         return None
 
     def visit_return_stmt(self, stmt: Return) -> None:
@@ -163,16 +473,101 @@ class Interpreter(Visitor):
 
     def visit_logical_expr(self, expr: Logical) -> object:
         left: object = self.evaluate(expr.left)
+        truthy = left if expr.proven is not None else self.is_truthy(left)
 
         if expr.operator.token_type == TokenType.OR:
-            if self.is_truthy(left):
+            if truthy:
                 return left
         else:
-            if not self.is_truthy(left):
+            if not truthy:
                 return left
 
         return self.evaluate(expr.right)
 
+    def visit_listliteral_expr(self, expr: ListLiteral):
+        return [self.evaluate(element) for element in expr.elements]
+
+    def visit_mapliteral_expr(self, expr: MapLiteral):
+        lox_map = LoxMap()
+
+        for key, value in zip(expr.keys, expr.values):
+            # The key first, Python would evaluate the value before it
+            map_key = self.map_key(expr.brace, self.evaluate(key))
+            lox_map.entries[map_key] = self.evaluate(value)
+
+        return lox_map
+
+    def visit_index_expr(self, expr: Index):
+        obj: object = self.evaluate(expr.object)
+        index: object = self.evaluate(expr.index)
+
+        if isinstance(obj, list):
+            return obj[self.list_index(expr.bracket, obj, index)]
+
+        if isinstance(obj, LoxMap):
+            key = self.map_key(expr.bracket, index)
+
+            if key not in obj.entries:
+                raise LoxRuntimeError(
+                    expr.bracket, f"Undefined key '{self.stringify(index)}'."
+                )
+
+            return obj.entries[key]
+
+        if isinstance(obj, LoxArray):
+            return obj[self.list_index(expr.bracket, obj, index)]
+
+        raise LoxRuntimeError(
+            expr.bracket, "Only lists, maps and arrays can be indexed."
+        )
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        obj: object = self.evaluate(expr.object)
+        index: object = self.evaluate(expr.index)
+
+        if isinstance(obj, list):
+            position = self.list_index(expr.bracket, obj, index)
+            value: object = self.evaluate(expr.value)
+            obj[position] = value
+            return value
+
+        if isinstance(obj, LoxMap):
+            key = self.map_key(expr.bracket, index)
+            value: object = self.evaluate(expr.value)
+            obj.entries[key] = value
+            return value
+
+        if isinstance(obj, LoxArray):
+            position = self.list_index(expr.bracket, obj, index)
+            value: object = self.evaluate(expr.value)
+
+            if not isinstance(value, float):
+                raise LoxRuntimeError(expr.bracket, "Array elements must be numbers.")
+
+            obj[position] = value
+            return value
+
+        raise LoxRuntimeError(
+            expr.bracket, "Only lists, maps and arrays can be indexed."
+        )
+
+    def list_index(self, bracket: Token, obj: list | LoxArray, index: object) -> int:
+        if not isinstance(index, float) or not index.is_integer():
+            raise LoxRuntimeError(bracket, "List index must be an integer.")
+
+        if not 0 <= index < len(obj):
+            raise LoxRuntimeError(bracket, "List index out of range.")
+
+        return int(index)
+
+    def map_key(self, token: Token, key: object) -> object:
+        try:
+            return LoxMap.to_key(key)
+        except TypeError:
+            raise LoxRuntimeError(
+                token, "Map keys must be numbers, strings, booleans, nil or instances."
+            )
+
     def visit_set_expr(self, expr: Set):
         obj: object = self.evaluate(expr.object)
 
@@ -184,9 +579,13 @@ class Interpreter(Visitor):
         return value
 
     def visit_super_expr(self, expr: Super):
-        distance: int = self._locals.get(expr)
+        distance: int = expr.depth
         superclass: LoxClass = self.environment.get_at(distance, "super")
         obj: LoxInstance = self.environment.get_at(distance - 1, "this")
+
+        # In a function nested in the method, 'this' was captured with 'super'
+        if obj is None:
+            obj = self.environment.get_at(distance, "this")
         method: LoxFunction = superclass.find_method(expr.method.lexeme)
 
         if method is None:
@@ -205,7 +604,7 @@ class Interpreter(Visitor):
     def visit_assign_expr(self, expr: Assign):
         value: object = self.evaluate(expr.value)
 
-        distance = self._locals.get(expr)
+        distance = expr.depth
 
         if distance is not None:
             self.environment.assign_at(distance, expr.name, value)
@@ -217,10 +616,19 @@ class Interpreter(Visitor):
     def visit_binary_expr(self, expr: Binary):
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
+        proven = expr.proven
+
+        # The type analyzer proved both operands are numbers, or strings for
+        # '+', so they aren't checked
+        if proven is not None:
+            if proven is LoxType.STRING:
+                return LoxRope.concat(left, right)
+
+            return UNCHECKED_OPERATORS[expr.operator.token_type](left, right)
 
         match expr.operator.token_type:
             case TokenType.MINUS:
-                self.check_number_operands(expr.operator, right, right)
+                self.check_number_operands(expr.operator, left, right)
                 return left - right
             case TokenType.SLASH:
                 self.check_number_operands(expr.operator, left, right)
@@ -230,6 +638,10 @@ class Interpreter(Visitor):
                 return left * right
             case TokenType.PLUS:
                 self.check_number_string_operands(expr.operator, left, right)
+
+                if isinstance(left, (str, LoxRope)):
+                    return LoxRope.concat(left, right)
+
                 return left + right
             case TokenType.GREATER:
                 self.check_number_operands(expr.operator, left, right)
@@ -250,22 +662,70 @@ class Interpreter(Visitor):
 
     def visit_call_expr(self, expr: Call):
         callee: object = self.evaluate(expr.callee)
-        args: list[object] = []
+        args: list[object] = [self.evaluate(arg) for arg in expr.arguments]
+        target = callee.declaration if type(callee) is LoxFunction else callee
 
-        for arg in expr.arguments:
-            args.append(self.evaluate(arg))
+        # A call site always passes the same number of arguments, so a callee
+        # checked once is fine from then on
+        if target is not expr.target or target is None:
+            self.check_call(expr, callee, len(args))
+            expr.target = target
 
+        try:
+            return callee.call(self, args)
+        except LoxNativeError as err:
+            raise LoxRuntimeError(expr.paren, err.message)
+
+    def check_call(self, expr: Call, callee: object, count: int):
         if not isinstance(callee, LoxCallable):
             raise LoxRuntimeError(expr.paren, "Can only call functions and classes.")
 
-        function: LoxCallable = callee
-
-        if len(args) != function.arity:
+        if count != callee.arity:
             raise LoxRuntimeError(
-                expr.paren, f"Expected {function.arity} arguments, but got {len(args)}."
+                expr.paren, f"Expected {callee.arity} arguments, but got {count}."
             )
 
-        return function.call(self, args)
+    def visit_call_expr_instrumented(self, expr: Call):
+        # Same checks as visit_call_expr(), plus the frame and hook bookkeeping
+        # around the call itself
+        callee: object = self.evaluate(expr.callee)
+        args: list[object] = [self.evaluate(arg) for arg in expr.arguments]
+        self.check_call(expr, callee, len(args))
+        function: LoxCallable = callee
+        self.frames[-1][1] = expr.paren.line
+
+        if isinstance(function, LoxFunction):
+            frame = [function.declaration.name.lexeme, function.declaration.name.line]
+        else:
+            frame = [str(getattr(function, "name", function)), expr.paren.line]
+
+        self.frames.append(frame)
+
+        if self.hooks:
+            self.emit("call", expr, function)
+
+        try:
+            value = function.call(self, args)
+        except LoxNativeError as err:
+            err = LoxRuntimeError(expr.paren, err.message)
+
+            if self.hooks:
+                self.emit("exception", expr, err)
+            raise err
+        except LoxRuntimeError as err:
+            if self.hooks:
+                self.emit("exception", expr, err)
+            raise
+        finally:
+            self.frames.pop()
+
+        if self.hooks:
+            if isinstance(function, LoxClass):
+                self.emit("alloc", expr, value)
+
+            self.emit("return", expr, value)
+
+        return value
 
     def visit_get_expr(self, expr: Get):
         obj: object = self.evaluate(expr.object)
@@ -273,6 +733,9 @@ class Interpreter(Visitor):
         if isinstance(obj, LoxInstance):
             return obj.get_property(expr.name)
 
+        if isinstance(obj, LoxModule):
+            return obj.get_property(expr.name)
+
         raise LoxRuntimeError(expr.name, "Only instances have properties.")
 
     def visit_unary_expr(self, expr: Unary):
@@ -280,19 +743,30 @@ class Interpreter(Visitor):
 
         match expr.operator.token_type:
             case TokenType.MINUS:
+                if expr.proven is not None:
+                    return -right
+
                 self.check_number_operand(expr.operator, right)
                 return -1 * right
             case TokenType.BANG:
+                if expr.proven is not None:
+                    return not right
+
                 return not self.is_truthy(right)
 
     def visit_variable_expr(self, expr: Variable):
         return self.lookup_variable(expr.name, expr)
 
     def lookup_variable(self, name: Token, expr: Expr):
-        distance = self._locals.get(expr)
+        distance = expr.depth
 
         if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
+            value = self.environment.get_at(distance, name.lexeme)
+
+            if type(value) is Cell:
+                return value.value
+
+            return value
         else:
             return self._globals.get(name)
 
@@ -302,18 +776,90 @@ class Interpreter(Visitor):
         if stmt.initializer is not None:
             value = self.evaluate(stmt.initializer)
 
+        if stmt in self._cells:
+            value = Cell(value)
+
         self.environment.define(stmt.name.lexeme, value)
 
     def visit_while_stmt(self, stmt: While) -> None:
+        condition = stmt.condition
+        body = stmt.body
+
         try:
-            while self.is_truthy(self.evaluate(stmt.condition)):
-                try:
-                    self.execute(stmt.body)
-                except Exception:
-                    pass
+            if stmt.proven is not None:
+                while self.evaluate(condition):
+                    self.execute(body)
+            else:
+                while self.is_truthy(self.evaluate(condition)):
+                    self.execute(body)
         except Interpreter.LoxBreakException:
             return
 
+    def visit_for_stmt(self, stmt: For) -> None:
+        previous = self.environment
+
+        try:
+            if stmt.initializer is not None:
+                self.environment = Environment(previous)
+                self.execute(stmt.initializer)
+
+            if stmt.counted:
+                self.count(stmt)
+            else:
+                self.loop(stmt)
+        except Interpreter.LoxBreakException:
+            return
+        finally:
+            self.environment = previous
+
+    def loop(self, stmt: For):
+        condition = stmt.condition
+        increment = stmt.increment
+        # Conditions proven to be booleans aren't tested for truth
+        proven = stmt.proven is not None
+
+        while True:
+            if condition is not None:
+                value = self.evaluate(condition)
+
+                if not (value if proven else self.is_truthy(value)):
+                    return
+
+            self.execute(stmt.body)
+
+            if increment is not None:
+                self.evaluate(increment)
+
+    def count(self, stmt: For):
+        # The resolver found that only the increment assigns the variable, so
+        # it's counted here and stored for the body to read, without going
+        # through the condition and the increment
+        values = self.environment.values
+        name = stmt.initializer.name.lexeme
+        i = values[name]
+
+        if type(i) is not float:
+            self.loop(stmt)
+            return
+
+        body = stmt.body
+        operator = stmt.condition.operator
+        limit = stmt.condition.right
+        inclusive = operator.token_type == TokenType.LESS_EQUAL
+
+        while True:
+            bound = self.evaluate(limit)
+
+            if type(bound) is not float:
+                self.check_number_operands(operator, i, bound)
+
+            if not self.is_truthy(i <= bound if inclusive else i < bound):
+                return
+
+            self.execute(body)
+            i += 1.0
+            values[name] = i
+
     def visit_break_stmt(self, stmt: Break) -> None:
         raise Interpreter.LoxBreakException()
 
@@ -321,6 +867,15 @@ class Interpreter(Visitor):
         return expr.accept(self)
 
     def is_equal(self, left: object, right: object) -> bool:
+        # Interned strings and shared objects are equal by identity
+        if left is right:
+            return True
+
+        # Lists, like maps and instances, are only equal to themselves, and
+        # so are booleans, which Python finds equal to 1 and 0
+        if type(left) in (list, bool) or type(right) in (list, bool):
+            return False
+
         return left == right
 
     def is_truthy(self, value: object) -> bool:
@@ -333,7 +888,7 @@ class Interpreter(Visitor):
         return True
 
     def check_number_operand(self, operator: Token, operand: object):
-        if isinstance(operand, float):
+        if isinstance(operand, (float, LoxArray)):
             return
 
         raise LoxRuntimeError(operator, "Operand must be a number.")
@@ -347,8 +902,26 @@ class Interpreter(Visitor):
         if isinstance(left, float) and isinstance(right, float):
             return
 
+        # Arrays are only looked for once the common case has failed
+        if isinstance(left, LoxArray) or isinstance(right, LoxArray):
+            self.check_array_operands(operator, left, right)
+            return
+
         raise LoxRuntimeError(operator, "Operands must be numbers.")
 
+    def check_array_operands(self, operator: Token, left: object, right: object):
+        if not isinstance(left, (float, LoxArray)) or not isinstance(
+            right, (float, LoxArray)
+        ):
+            raise LoxRuntimeError(operator, "Operands must be numbers or arrays.")
+
+        if (
+            isinstance(left, LoxArray)
+            and isinstance(right, LoxArray)
+            and len(left) != len(right)
+        ):
+            raise LoxRuntimeError(operator, "Arrays must have the same length.")
+
     def check_number_string_operands(
         self,
         operator: Token,
@@ -358,7 +931,11 @@ class Interpreter(Visitor):
         if isinstance(left, float) and isinstance(right, float):
             return
 
-        if isinstance(left, str) and isinstance(right, str):
+        if isinstance(left, (str, LoxRope)) and isinstance(right, (str, LoxRope)):
+            return
+
+        if isinstance(left, LoxArray) or isinstance(right, LoxArray):
+            self.check_array_operands(operator, left, right)
             return
 
         raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
@@ -376,4 +953,14 @@ class Interpreter(Visitor):
         if isinstance(value, bool):
             return str(value).lower()
 
+        if isinstance(value, list):
+            return f"[{', '.join(self.stringify(element) for element in value)}]"
+
+        if isinstance(value, LoxMap):
+            entries = ", ".join(
+                f"{self.stringify(LoxMap.from_key(key))}: {self.stringify(item)}"
+                for key, item in value.entries.items()
+            )
+            return f"{{{entries}}}"
+
         return str(value)
@@ -0,0 +1,44 @@
+from pylox.expr import Expr
+from pylox.stmt import Stmt
+from pylox.token import Token
+
+
+# Statements don't store where they come from, so their line is taken from
+# the first token found inside them and remembered for the next lookup
+class LineTable:
+    lines: dict[Expr | Stmt, int | None]
+
+    def __init__(self):
+        self.lines = {}
+
+    def line_of(self, node: Expr | Stmt) -> int | None:
+        try:
+            return self.lines[node]
+        except KeyError:
+            line = self.find_line(node)
+            self.lines[node] = line
+            return line
+
+    def find_line(self, node) -> int | None:
+        children = []
+
+        for value in vars(node).values():
+            if isinstance(value, Token):
+                return value.line
+
+            if isinstance(value, (Expr, Stmt)):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(value)
+
+        for child in children:
+            if isinstance(child, Token):
+                return child.line
+
+            if child is not None:
+                line = self.line_of(child)
+
+                if line is not None:
+                    return line
+
+        return None
@@ -0,0 +1,233 @@
+import atexit
+import operator
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def divide(left: float, right: float) -> float:
+    # IEEE semantics, like NumPy, instead of ZeroDivisionError
+    try:
+        return left / right
+    except ZeroDivisionError:
+        if left == 0 or left != left:
+            return float("nan")
+
+        return float("inf") if (left > 0) == (str(right)[0] != "-") else float("-inf")
+
+
+class SharedBlock(SharedMemory):
+    # Arrays keep views on the block for as long as the process runs, so it
+    # is only unmapped when the process exits
+    def close(self):
+        pass
+
+
+# Blocks this process has mapped, by name. The ones it created are removed
+# when it exits.
+attached: dict[str, SharedBlock] = {}
+created: list[SharedBlock] = []
+
+
+@atexit.register
+def unlink_created():
+    for block in created:
+        block.unlink()
+
+
+def attach_shared(name: str, offset: int, length: int) -> "LoxArray":
+    block = attached.get(name)
+
+    if block is None:
+        try:
+            block = SharedBlock(name, track=False)
+        except TypeError:
+            # Python < 3.13
+            block = SharedBlock(name)
+
+        attached[name] = block
+
+    return LoxArray(LoxArray.view(block, offset, length), block, offset)
+
+
+# Numeric array of float64 values. The data is a NumPy array when NumPy is
+# installed, so operators run vectorized, and an array('d') (or a memoryview
+# of shared memory) otherwise.
+class LoxArray:
+    # Arrays are mutable, so memoized calls must not cache on them
+    __hash__ = None
+
+    shm: SharedBlock | None = None
+    offset: int = 0
+
+    def __init__(self, data, shm: SharedBlock | None = None, offset: int = 0):
+        self.data = data
+        self.shm = shm
+        self.offset = offset
+
+    @staticmethod
+    def view(block: SharedBlock, offset: int, length: int):
+        if numpy is not None:
+            return numpy.ndarray(
+                length, dtype=numpy.float64, buffer=block.buf, offset=offset * 8
+            )
+
+        return block.buf.cast("d")[offset : offset + length]
+
+    def share(self):
+        # Moves the data to shared memory, so worker processes map it instead
+        # of receiving a copy, and see each other's writes
+        length = len(self.data)
+        block = SharedBlock(create=True, size=max(length * 8, 1))
+        created.append(block)
+        attached[block.name] = block
+
+        data = LoxArray.view(block, 0, length)
+        data[:] = self.data
+        self.data, self.shm, self.offset = data, block, 0
+
+    def __reduce__(self):
+        if self.shm is None:
+            self.share()
+
+        return attach_shared, (self.shm.name, self.offset, len(self.data))
+
+    @staticmethod
+    def from_values(values) -> "LoxArray":
+        if numpy is not None:
+            return LoxArray(numpy.array(values, dtype=numpy.float64))
+
+        return LoxArray(array("d", values))
+
+    @staticmethod
+    def zeros(length: int) -> "LoxArray":
+        if numpy is not None:
+            return LoxArray(numpy.zeros(length, dtype=numpy.float64))
+
+        return LoxArray(array("d", bytes(8 * length)))
+
+    @staticmethod
+    def load(file_path: str) -> "LoxArray":
+        if numpy is not None:
+            # Mapped copy-on-write, so nothing is read until it's used and
+            # writes don't reach the file
+            return LoxArray(numpy.memmap(file_path, dtype=numpy.float64, mode="c"))
+
+        data = array("d")
+
+        with open(file_path, "rb") as f_obj:
+            f_obj.seek(0, 2)
+            length = f_obj.tell() // data.itemsize
+            f_obj.seek(0)
+            data.fromfile(f_obj, length)
+
+        return LoxArray(data)
+
+    def save(self, file_path: str):
+        with open(file_path, "wb") as f_obj:
+            f_obj.write(self.data)
+
+    def slice(self, start: int, end: int) -> "LoxArray":
+        # A view with NumPy or shared memory, a copy with array('d')
+        start, end, _ = slice(start, end).indices(len(self.data))
+
+        if self.shm is not None:
+            return LoxArray(self.data[start:end], self.shm, self.offset + start)
+
+        return LoxArray(self.data[start:end])
+
+    def sum(self) -> float:
+        return float(self.data.sum()) if numpy is not None else float(sum(self.data))
+
+    def min(self) -> float:
+        return float(self.data.min()) if numpy is not None else min(self.data)
+
+    def max(self) -> float:
+        return float(self.data.max()) if numpy is not None else max(self.data)
+
+    def mean(self) -> float:
+        return self.sum() / len(self.data)
+
+    def to_list(self) -> list[float]:
+        return [float(value) for value in self.data]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> float:
+        return float(self.data[index])
+
+    def __setitem__(self, index: int, value: float):
+        self.data[index] = value
+
+    def elementwise(self, other: object, op: Callable, reflected: bool = False):
+        if numpy is not None:
+            right = other.data if isinstance(other, LoxArray) else other
+            left, right = (right, self.data) if reflected else (self.data, right)
+
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                result = op(left, right)
+
+            return LoxArray(numpy.asarray(result, dtype=numpy.float64))
+
+        if isinstance(other, LoxArray):
+            pairs = zip(self.data, other.data)
+        else:
+            pairs = ((value, other) for value in self.data)
+
+        if reflected:
+            return LoxArray(array("d", (op(right, left) for left, right in pairs)))
+
+        return LoxArray(array("d", (op(left, right) for left, right in pairs)))
+
+    def __add__(self, other):
+        return self.elementwise(other, operator.add)
+
+    def __radd__(self, other):
+        return self.elementwise(other, operator.add, True)
+
+    def __sub__(self, other):
+        return self.elementwise(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self.elementwise(other, operator.sub, True)
+
+    def __mul__(self, other):
+        return self.elementwise(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self.elementwise(other, operator.mul, True)
+
+    def __truediv__(self, other):
+        return self.elementwise(other, operator.truediv if numpy else divide)
+
+    def __rtruediv__(self, other):
+        return self.elementwise(other, operator.truediv if numpy else divide, True)
+
+    # Comparisons give 1 where they hold and 0 elsewhere, so the result can
+    # be used as a mask
+    def __lt__(self, other):
+        return self.elementwise(other, operator.lt)
+
+    def __le__(self, other):
+        return self.elementwise(other, operator.le)
+
+    def __gt__(self, other):
+        return self.elementwise(other, operator.gt)
+
+    def __ge__(self, other):
+        return self.elementwise(other, operator.ge)
+
+    def __str__(self):
+        values = []
+
+        for value in self.data:
+            text = str(float(value))
+            values.append(text[:-2] if text.endswith(".0") else text)
+
+        return f"array([{', '.join(values)}])"
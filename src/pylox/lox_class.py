@@ -8,15 +8,22 @@ from pylox.lox_instance import LoxInstance
 class LoxClass(LoxCallable):
     name: Final[str]
     methods: Final[dict[str, LoxFunction]]
+    # Looked up once, methods don't change after the class is created
+    initializer: Final[LoxFunction | None]
+    arity: int = 0
 
     def __init__(self, name: str, superclass, methods: dict[str, LoxFunction]):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        self.initializer = self.find_method("init")
+
+        if self.initializer is not None:
+            self.arity = self.initializer.arity
 
     def call(self, interpreter, args: list[object]):
         instance: LoxInstance = LoxInstance(self)
-        initializer: LoxFunction = self.find_method("init")
+        initializer = self.initializer
 
         if initializer is not None:
             initializer.bind(instance).call(interpreter, args)
@@ -30,14 +37,5 @@ class LoxClass(LoxCallable):
         if self.superclass is not None:
             return self.superclass.find_method(name)
 
-    @property
-    def arity(self) -> int:
-        initializer: LoxFunction = self.find_method("init")
-
-        if initializer is None:
-            return 0
-
-        return initializer.arity
-
     def __str__(self):
         return self.name
@@ -7,3 +7,11 @@ class LoxReturnException(RuntimeError):
     def __init__(self, value: object | None):
         super().__init__()
         self.value = value
+
+
+class LoxNativeError(RuntimeError):
+    message: Final[str]
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
@@ -1,8 +1,9 @@
 from typing import Final
 
-from pylox.environment import Environment
+from pylox.environment import Cell, Environment
 from pylox.lox_callable import LoxCallable
 from pylox.lox_exceptions import LoxReturnException
+from pylox.memo_cache import MemoCache
 from pylox.stmt import Function
 
 
@@ -10,31 +11,55 @@ class LoxFunction(LoxCallable):
     declaration: Final[Function]
     closure: Final[Environment]
     is_initializer: Final[bool]
+    # Parameters captured by closures that can change them
+    cells: Final[tuple[str, ...]]
+    memo: MemoCache | None = None
 
     def __init__(
         self,
         declaration: Function,
         closure: Environment,
         is_initializer: bool,
+        cells: tuple[str, ...] = (),
     ):
         self.declaration = declaration
         self.closure = closure
         self.is_initializer = is_initializer
+        self.cells = cells
 
     def bind(self, instance):
-        environment = Environment(self.closure)
-        environment.define("this", instance)
+        environment = Environment(self.closure, {"this": instance})
         return LoxFunction(
             self.declaration,
             environment,
             self.is_initializer,
+            self.cells,
         )
 
+    def __reduce__(self):
+        # Without the memo cache, which shadows call() with a closure
+        return LoxFunction, (
+            self.declaration,
+            self.closure,
+            self.is_initializer,
+            self.cells,
+        )
+
+    def enable_memo(self, memo: MemoCache):
+        # Shadow call() on the instance, so functions without a cache
+        # don't pay for the check
+        uncached = self.call
+        self.memo = memo
+        self.call = lambda interpreter, args: memo.call(uncached, interpreter, args)
+
     def call(self, interpreter, args: list[object]):
-        environment: Environment = Environment(self.closure)
+        # Arguments are bound by position, the call site checked their number
+        environment: Environment = Environment(
+            self.closure, dict(zip(self.declaration.layout, args))
+        )
 
-        for i, param in enumerate(self.declaration.params):
-            environment.define(param.lexeme, args[i])
+        for name in self.cells:
+            environment.values[name] = Cell(environment.values[name])
 
         try:
             interpreter.execute_block(self.declaration.body, environment)
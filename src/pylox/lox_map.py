@@ -0,0 +1,78 @@
+import sys
+
+from pylox.lox_instance import LoxInstance
+from pylox.lox_rope import LoxRope
+
+
+class LoxMap:
+    # True == 1.0 and False == 0.0 in Python, so booleans are stored under
+    # their own keys to keep them apart from numbers
+    class BoolKey:
+        def __init__(self, value: bool):
+            self.value = value
+
+        def __reduce__(self):
+            # Keys are compared by identity, so unpickling has to give back
+            # the same two objects
+            return LoxMap.to_key, (self.value,)
+
+        def __repr__(self):
+            return str(self.value).lower()
+
+    TRUE_KEY = BoolKey(True)
+    FALSE_KEY = BoolKey(False)
+
+    entries: dict[object, object]
+
+    def __init__(self):
+        # Python dicts keep insertion order, which is also the order keys()
+        # returns them in
+        self.entries = {}
+
+    @staticmethod
+    def to_key(value: object) -> object:
+        if value is True:
+            return LoxMap.TRUE_KEY
+
+        if value is False:
+            return LoxMap.FALSE_KEY
+
+        if value is None or isinstance(value, (float, str, LoxInstance)):
+            return value
+
+        if isinstance(value, LoxRope):
+            return value.flatten()
+
+        raise TypeError("map keys must be numbers, strings, booleans, nil or instances")
+
+    @staticmethod
+    def from_key(key: object) -> object:
+        if isinstance(key, LoxMap.BoolKey):
+            return key.value
+
+        return key
+
+    def get(self, key: object) -> object:
+        return self.entries[LoxMap.to_key(key)]
+
+    def set(self, key: object, value: object):
+        self.entries[LoxMap.to_key(key)] = value
+
+    def has(self, key: object) -> bool:
+        return LoxMap.to_key(key) in self.entries
+
+    def remove(self, key: object) -> object:
+        return self.entries.pop(LoxMap.to_key(key), None)
+
+    def keys(self) -> list[object]:
+        return [LoxMap.from_key(key) for key in self.entries]
+
+    def values(self) -> list[object]:
+        return list(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __sizeof__(self):
+        # Include the table, so memory reports see what the map really holds
+        return object.__sizeof__(self) + sys.getsizeof(self.entries)
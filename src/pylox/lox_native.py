@@ -0,0 +1,178 @@
+import inspect
+from types import ModuleType
+from typing import Callable, Final
+
+from pylox.lox_callable import LoxCallable
+from pylox.lox_exceptions import LoxNativeError
+from pylox.runtime_error import LoxRuntimeError
+from pylox.token import Token
+
+
+class LoxNative(LoxCallable):
+    name: Final[str]
+    function: Final[Callable]
+    takes_interpreter: Final[bool]
+    pure: Final[bool]
+    module: Final[str | None]
+    # A plain attribute rather than a property, so calls don't pay for a
+    # lookup through the descriptor
+    arity: int = 0
+
+    def __init__(
+        self,
+        name: str,
+        arity: int,
+        function: Callable,
+        takes_interpreter: bool = False,
+        pure: bool = False,
+        module: str | None = None,
+    ):
+        self.name = name
+        self.arity = arity
+        self.function = function
+        self.takes_interpreter = takes_interpreter
+        self.pure = pure
+        self.module = module
+
+    def call(self, interpreter, args: list[object]):
+        try:
+            if self.takes_interpreter:
+                return self.function(interpreter, *args)
+
+            return self.function(*args)
+        except (ArithmeticError, LookupError, TypeError, ValueError) as err:
+            # Reported as a runtime error at the call site
+            raise LoxNativeError(f"{self.name}: {err}")
+
+    def __reduce__(self):
+        # Sent to other processes by name, they have the same registry
+        return find_native, (self.module, self.name)
+
+    def __str__(self):
+        return "<native fn>"
+
+
+class LoxModule:
+    name: Final[str]
+    members: Final[dict[str, object]]
+
+    def __init__(self, name: str, members: dict[str, object] | None = None):
+        self.name = name
+        self.members = members if members is not None else {}
+
+    def get_property(self, name: Token):
+        if name.lexeme in self.members:
+            return self.members[name.lexeme]
+
+        raise LoxRuntimeError(
+            name, f"Undefined property '{name.lexeme}' in module '{self.name}'."
+        )
+
+    def __reduce__(self):
+        return find_native, (None, self.name)
+
+    def __str__(self):
+        return f"<module {self.name}>"
+
+
+# Natives and modules defined in every interpreter's globals
+registry: dict[str, LoxNative | LoxModule] = {}
+
+
+def find_native(module: str | None, name: str) -> LoxNative | LoxModule:
+    if module is not None:
+        return registry[module].members[name]
+
+    return registry[name]
+
+
+def lox_native(
+    name: str | None = None,
+    arity: int | None = None,
+    *,
+    interpreter: bool = False,
+    pure: bool = False,
+    module: LoxModule | None = None,
+) -> Callable[[Callable], LoxNative]:
+    # Exposes a Python function to Lox, either as a global or as a member of
+    # a module. The function receives the Lox values as positional arguments,
+    # preceded by the interpreter if it asks for it, and must return a Lox
+    # value. Pure natives can be called from memoized functions.
+    def decorator(function: Callable) -> LoxNative:
+        native_arity = arity
+
+        if native_arity is None:
+            native_arity = len(inspect.signature(function).parameters)
+
+            if interpreter:
+                native_arity -= 1
+
+        native = LoxNative(
+            name or function.__name__,
+            native_arity,
+            function,
+            interpreter,
+            pure,
+            module.name if module is not None else None,
+        )
+
+        if module is not None:
+            module.members[native.name] = native
+        else:
+            registry[native.name] = native
+
+        return native
+
+    return decorator
+
+
+def lox_module(
+    name: str,
+    namespace: ModuleType | dict | type | None = None,
+    names: list[str] | None = None,
+    pure: bool = False,
+) -> LoxModule:
+    # Exposes a whole Python namespace (a module, a class or a dict) to Lox.
+    # Numbers are converted to Lox numbers, functions whose arity can't be
+    # found from their signature are skipped.
+    module = LoxModule(name)
+    registry[name] = module
+
+    if namespace is None:
+        return module
+
+    members = namespace if isinstance(namespace, dict) else vars(namespace)
+
+    for member_name in names if names is not None else list(members):
+        if member_name.startswith("_"):
+            continue
+
+        value = members[member_name]
+
+        if isinstance(value, bool) or value is None or isinstance(value, str):
+            module.members[member_name] = value
+        elif isinstance(value, (int, float)):
+            module.members[member_name] = float(value)
+        elif callable(value):
+            try:
+                arity = len(inspect.signature(value).parameters)
+            except (TypeError, ValueError):
+                continue
+
+            module.members[member_name] = LoxNative(
+                member_name, arity, to_lox_number(value), pure=pure, module=name
+            )
+
+    return module
+
+
+def to_lox_number(function: Callable) -> Callable:
+    def call(*args):
+        value = function(*args)
+
+        if isinstance(value, int) and not isinstance(value, bool):
+            return float(value)
+
+        return value
+
+    return call
@@ -0,0 +1,66 @@
+from typing import Final
+
+
+# A string built by concatenation. Appending to the most recent rope built on
+# a buffer adds to that buffer in place, so building a string in a loop is
+# linear instead of quadratic. Ropes behave like the string they stand for and
+# are only joined when the text is needed.
+class LoxRope:
+    # Shorter results are cheaper to concatenate right away
+    THRESHOLD: Final[int] = 256
+
+    parts: list[str]
+    count: int
+    length: int
+
+    def __init__(self, parts: list[str], count: int, length: int):
+        # The rope is the first count parts of a buffer other ropes may share
+        self.parts = parts
+        self.count = count
+        self.length = length
+
+    @staticmethod
+    def concat(left: "str | LoxRope", right: "str | LoxRope") -> "str | LoxRope":
+        if isinstance(right, LoxRope):
+            right = right.flatten()
+
+        if isinstance(left, str):
+            if len(left) + len(right) < LoxRope.THRESHOLD:
+                return left + right
+
+            return LoxRope([left, right], 2, len(left) + len(right))
+
+        parts = left.parts
+
+        if left.count != len(parts):
+            # The buffer was already extended from this rope, so start a new one
+            parts = parts[: left.count]
+
+        parts.append(right)
+        return LoxRope(parts, len(parts), left.length + len(right))
+
+    def flatten(self) -> str:
+        if self.count != 1:
+            # Ropes built on the old buffer keep it, this one no longer needs it
+            self.parts = ["".join(self.parts[: self.count])]
+            self.count = 1
+
+        return self.parts[0]
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LoxRope):
+            return self.length == other.length and self.flatten() == other.flatten()
+
+        if isinstance(other, str):
+            return self.length == len(other) and self.flatten() == other
+
+        return False
+
+    def __hash__(self):
+        return hash(self.flatten())
+
+    def __str__(self):
+        return self.flatten()
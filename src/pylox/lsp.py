@@ -0,0 +1,183 @@
+import json
+import sys
+from typing import BinaryIO
+
+from pylox.incremental import Diagnostic, Document
+
+
+# Minimal language server over stdio: it keeps an incremental Document for
+# each open file and publishes its diagnostics after every change. Positions
+# are counted in UTF-16 code units, as LSP clients expect by default.
+class LanguageServer:
+    reader: BinaryIO
+    writer: BinaryIO
+    documents: dict[str, Document]
+    shutdown: bool = False
+
+    def __init__(self, reader: BinaryIO, writer: BinaryIO):
+        self.reader = reader
+        self.writer = writer
+        self.documents = {}
+
+    def run(self) -> int:
+        while True:
+            message = self.read()
+
+            if message is None:
+                return 1
+
+            if message.get("method") == "exit":
+                return 0 if self.shutdown else 1
+
+            self.handle(message)
+
+    def read(self) -> dict | None:
+        length = 0
+
+        while True:
+            line = self.reader.readline()
+
+            if not line:
+                return None
+
+            line = line.strip()
+
+            if not line:
+                break
+
+            name, _, value = line.decode("ascii").partition(":")
+
+            if name.lower() == "content-length":
+                length = int(value)
+
+        return json.loads(self.reader.read(length))
+
+    def send(self, message: dict):
+        body = json.dumps({"jsonrpc": "2.0", **message}).encode()
+        self.writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        self.writer.flush()
+
+    def handle(self, message: dict):
+        method = message.get("method")
+        params = message.get("params") or {}
+
+        match method:
+            case "initialize":
+                result = {
+                    "capabilities": {
+                        # Open and close notifications, incremental changes
+                        "textDocumentSync": {"openClose": True, "change": 2},
+                    },
+                    "serverInfo": {"name": "pylox"},
+                }
+            case "shutdown":
+                self.shutdown = True
+                result = None
+            case "textDocument/didOpen":
+                item = params["textDocument"]
+                self.documents[item["uri"]] = Document(item["text"])
+                self.publish(item["uri"])
+                return
+            case "textDocument/didChange":
+                uri = params["textDocument"]["uri"]
+
+                for change in params["contentChanges"]:
+                    self.change(self.documents[uri], change)
+
+                self.publish(uri)
+                return
+            case "textDocument/didClose":
+                uri = params["textDocument"]["uri"]
+                del self.documents[uri]
+                self.send(
+                    {
+                        "method": "textDocument/publishDiagnostics",
+                        "params": {"uri": uri, "diagnostics": []},
+                    }
+                )
+                return
+            case _:
+                if "id" in message:
+                    self.send(
+                        {
+                            "id": message["id"],
+                            "error": {
+                                "code": -32601,
+                                "message": f"Unsupported method {method}",
+                            },
+                        }
+                    )
+
+                return
+
+        if "id" in message:
+            self.send({"id": message["id"], "result": result})
+
+    def change(self, document: Document, change: dict):
+        if "range" not in change:
+            document.edit(0, len(document.text), change["text"])
+            return
+
+        start = self.offset(document, change["range"]["start"])
+        end = self.offset(document, change["range"]["end"])
+        document.edit(start, end, change["text"])
+
+    def offset(self, document: Document, position: dict) -> int:
+        line_start = document.offset(position["line"] + 1, 0)
+        character = position["character"]
+        line_end = document.text.find("\n", line_start)
+
+        if line_end == -1:
+            line_end = len(document.text)
+
+        text = document.text[line_start:line_end]
+
+        if not text.isascii():
+            # Characters outside the BMP take two UTF-16 code units
+            units = 0
+
+            for i, c in enumerate(text):
+                if units >= character:
+                    return line_start + i
+
+                units += 2 if ord(c) > 0xFFFF else 1
+
+        return line_start + min(character, len(text))
+
+    def publish(self, uri: str):
+        document = self.documents[uri]
+        diagnostics = [
+            {
+                "range": {
+                    "start": self.position(document, diagnostic, 0),
+                    "end": self.position(document, diagnostic, diagnostic.length),
+                },
+                "severity": diagnostic.severity,
+                "source": "pylox",
+                "message": diagnostic.message,
+            }
+            for diagnostic in document.diagnostics()
+        ]
+        self.send(
+            {
+                "method": "textDocument/publishDiagnostics",
+                "params": {"uri": uri, "diagnostics": diagnostics},
+            }
+        )
+
+    def position(self, document: Document, diagnostic: Diagnostic, extra: int) -> dict:
+        line_start = document.offset(diagnostic.line, 0)
+        text = document.text[line_start : line_start + diagnostic.column + extra]
+        # Multi-line tokens (strings) are cut at the end of their first line
+        text = text.partition("\n")[0]
+        character = len(text)
+
+        if not text.isascii():
+            character += sum(1 for c in text if ord(c) > 0xFFFF)
+
+        return {"line": diagnostic.line - 1, "character": character}
+
+
+def main():
+    server = LanguageServer(sys.stdin.buffer, sys.stdout.buffer)
+    sys.exit(server.run())
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Callable, Final
+
+
+class MemoStats:
+    name: Final[str]
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __str__(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+
+        return (
+            f"{self.name}: {self.hits} hits, {self.misses} misses, "
+            f"{self.evictions} evictions ({ratio:.1f}% hit rate)"
+        )
+
+
+class MemoCache:
+    max_size: Final[int]
+    entries: OrderedDict
+    stats: MemoStats
+
+    def __init__(self, max_size: int, stats: MemoStats):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.stats = stats
+
+    def call(self, function: Callable, interpreter, args: list[object]):
+        # The type is part of the key, since True == 1.0 in Python but not in Lox
+        key = tuple((type(arg), arg) for arg in args)
+
+        try:
+            if key in self.entries:
+                self.stats.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        except TypeError:
+            # Unhashable argument, nothing to cache on
+            return function(interpreter, args)
+
+        self.stats.misses += 1
+        value = function(interpreter, args)
+        self.entries[key] = value
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+        return value
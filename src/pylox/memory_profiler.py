@@ -0,0 +1,248 @@
+import sys
+import tracemalloc
+import weakref
+from typing import Final, TextIO
+
+from pylox.environment import Environment
+from pylox.lox_function import LoxFunction
+from pylox.lox_instance import LoxInstance
+from pylox.lox_map import LoxMap
+
+# The memory profiler that is running, for memoryReport()
+active: "MemoryProfiler | None" = None
+
+
+# Allocation profiler for Lox objects. Like Profiler, it only instruments
+# anything between start() and stop(): the constructors of instances,
+# environments, functions and maps are swapped for wrappers that record the
+# allocation at the current Lox line and follow the object with a weak
+# reference to keep live counts.
+class MemoryProfiler:
+    class Site:
+        def __init__(self):
+            self.total = 0
+            self.live = 0
+            self.peak = 0
+            self.size = 0
+
+    KINDS: Final[list[tuple[type, str]]] = [
+        (LoxInstance, "instance"),
+        (Environment, "environment"),
+        (LoxFunction, "function"),
+        (LoxMap, "map"),
+    ]
+
+    # Sites by (kind, class, frame name, line)
+    sites: dict[tuple[str, str, str, int], Site]
+    # Totals by kind, and by class for instances and bound methods
+    kinds: dict[str, Site]
+    classes: dict[str, Site]
+    live: dict[weakref.ref, tuple[Site, ...]]
+    traced_memory: tuple[int, int] | None = None
+
+    def __init__(self):
+        self.sites = {}
+        self.kinds = {}
+        self.classes = {}
+        self.live = {}
+        self.frames: list[list] = [["<module>", 0]]
+        self.binding: list[LoxInstance] = []
+        self.patched: list[tuple[type, str, object]] = []
+        self.started_tracemalloc = False
+
+    def install(self, interpreter):
+        self.frames = interpreter.track_frames()
+
+    def start(self):
+        global active
+
+        active = self
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+        for class_, kind in MemoryProfiler.KINDS:
+            init = class_.__dict__["__init__"]
+            self.patched.append((class_, "__init__", init))
+            class_.__init__ = self.instrument(init, kind)
+
+        bind = LoxFunction.__dict__["bind"]
+        self.patched.append((LoxFunction, "bind", bind))
+        binding = self.binding
+
+        # Functions created while binding are bound methods of the instance
+        def profiled_bind(function, instance):
+            binding.append(instance)
+
+            try:
+                return bind(function, instance)
+            finally:
+                binding.pop()
+
+        LoxFunction.bind = profiled_bind
+
+    def stop(self):
+        global active
+
+        for class_, name, method in reversed(self.patched):
+            setattr(class_, name, method)
+
+        self.patched.clear()
+
+        if tracemalloc.is_tracing():
+            self.traced_memory = tracemalloc.get_traced_memory()
+
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+        if active is self:
+            active = None
+
+    def instrument(self, init, kind: str):
+        profiler = self
+
+        def profiled_init(obj, *args, **kwargs):
+            init(obj, *args, **kwargs)
+            profiler.record(obj, kind)
+
+        return profiled_init
+
+    def record(self, obj: object, kind: str):
+        class_name = "-"
+
+        if kind == "instance":
+            class_name = obj._class.name
+        elif kind == "function":
+            if self.binding:
+                kind = "bound method"
+                class_name = self.binding[-1]._class.name
+
+        name, line = self.frames[-1]
+        key = (kind, class_name, name, line)
+        site = self.sites.get(key)
+
+        if site is None:
+            site = MemoryProfiler.Site()
+            self.sites[key] = site
+
+        sites = [site, self.site(self.kinds, kind)]
+
+        if class_name != "-":
+            sites.append(self.site(self.classes, class_name))
+
+        size = self.size_of(obj)
+
+        for entry in sites:
+            entry.total += 1
+            entry.live += 1
+            entry.size += size
+            entry.peak = max(entry.peak, entry.live)
+
+        self.live[weakref.ref(obj, self.release)] = tuple(sites)
+
+    def release(self, ref: weakref.ref):
+        for site in self.live.pop(ref, ()):
+            site.live -= 1
+
+    def site(self, sites: dict[str, Site], key: str) -> Site:
+        site = sites.get(key)
+
+        if site is None:
+            site = MemoryProfiler.Site()
+            sites[key] = site
+
+        return site
+
+    def size_of(self, obj: object) -> int:
+        # The object, its attribute dict and the dicts it holds (fields,
+        # variables, map entries)
+        attributes = vars(obj)
+        size = sys.getsizeof(obj) + sys.getsizeof(attributes)
+
+        for value in attributes.values():
+            if type(value) is dict:
+                size += sys.getsizeof(value)
+
+        return size
+
+    def live_sizes(self) -> dict[int, int]:
+        # Current sizes of the live objects, by id of their sites, since
+        # fields and variables are added after the allocation
+        sizes: dict[int, int] = {}
+
+        for ref, sites in list(self.live.items()):
+            obj = ref()
+
+            if obj is None:
+                continue
+
+            size = self.size_of(obj)
+
+            for site in sites:
+                sizes[id(site)] = sizes.get(id(site), 0) + size
+
+        return sizes
+
+    def report(self, out: TextIO = sys.stderr, limit: int | None = 20):
+        sizes = self.live_sizes()
+        total = sum(site.total for site in self.kinds.values())
+        live = sum(site.live for site in self.kinds.values())
+        print(f"{total} Lox allocations, {live} still live", file=out)
+
+        traced_memory = self.traced_memory
+
+        if tracemalloc.is_tracing():
+            traced_memory = tracemalloc.get_traced_memory()
+
+        if traced_memory is not None:
+            current, peak = traced_memory
+            print(
+                f"tracemalloc: {current / 1024:.1f} KB current, "
+                f"{peak / 1024:.1f} KB peak",
+                file=out,
+            )
+
+        for title, sites in (("kind", self.kinds), ("class", self.classes)):
+            if not sites:
+                continue
+
+            print(file=out)
+            print(
+                f"{title:<20} {'total':>10} {'live':>8} {'peak live':>10} "
+                f"{'live KB':>10} {'avg bytes':>10}",
+                file=out,
+            )
+
+            for name, site in sorted(
+                sites.items(), key=lambda item: item[1].total, reverse=True
+            ):
+                print(f"{name:<20} {self.format_site(site, sizes)}", file=out)
+
+        print(file=out)
+        print(
+            f"{'kind':<14} {'class':<12} {'total':>10} {'live':>8} "
+            f"{'peak live':>10} {'live KB':>10} {'avg bytes':>10}  site",
+            file=out,
+        )
+
+        rows = sorted(self.sites.items(), key=lambda item: item[1].total, reverse=True)
+
+        for (kind, class_name, name, line), site in rows[:limit]:
+            print(
+                f"{kind:<14} {class_name:<12} {self.format_site(site, sizes)}  "
+                f"{name} line {line}",
+                file=out,
+            )
+
+    def format_site(self, site: Site, sizes: dict[int, int]) -> str:
+        average = site.size / site.total if site.total else 0.0
+        return (
+            f"{site.total:>10} {site.live:>8} {site.peak:>10} "
+            f"{sizes.get(id(site), 0) / 1024:>10.1f} {average:>10.0f}"
+        )
+
+    def dump(self, prefix: str):
+        with open(f"{prefix}.txt", "w") as f_obj:
+            self.report(f_obj, limit=None)
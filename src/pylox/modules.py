@@ -0,0 +1,280 @@
+import os
+import pickle
+from concurrent.futures.process import BrokenProcessPool
+from typing import Final
+
+from pylox.error_handler import ErrorHandler
+from pylox.expr import Expr
+from pylox.parser import Parser
+from pylox.scanner import Scanner
+from pylox.stmt import Function, Import, Stmt
+
+# Compiled modules are kept in this directory next to their source
+CACHE_DIR = "__loxcache__"
+# Changed whenever cached modules can't be read by this version any more
+MAGIC = 1
+# Modules are only sent to worker processes when there's at least this much
+# source to compile in one go, below that starting the workers costs more
+PARALLEL_SIZE = 256 * 1024
+
+
+class Module:
+    # A file imported with 'import "path";', scanned, parsed and resolved.
+    # Its top-level declarations are globals, so it's resolved on its own,
+    # whoever imports it.
+    path: Final[str]
+    # Modification time and size of the source it was compiled from
+    stamp: Final[tuple[int, int]]
+    stmts: list[Stmt]
+    # The modules it imports
+    imports: list[str]
+    # What the resolver found, as in Interpreter
+    _closures: Final[dict[Function, tuple[list[tuple[str, int]], tuple[str, ...]]]]
+    _cells: Final[set[Stmt]]
+
+    def __init__(self, path: str, stamp: tuple[int, int]):
+        self.path = path
+        self.stamp = stamp
+        self.stmts = []
+        self.imports = []
+        self._closures = {}
+        self._cells = set()
+
+    # Called by the resolver, like on the interpreter
+    def resolve(self, expr: Expr, depth: int):
+        expr.depth = depth
+
+    def resolve_closure(
+        self,
+        function: Function,
+        captures: list[tuple[str, int]],
+        cells: list[str],
+    ):
+        self._closures[function] = (captures, tuple(cells))
+
+    def resolve_cell(self, declaration: Stmt):
+        self._cells.add(declaration)
+
+
+class ModuleErrors(ErrorHandler):
+    # Collects the errors of a module, with its path, to be reported by the
+    # program importing it, which may be in another process
+    path: Final[str]
+    messages: list[str]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.messages = []
+
+    def report(self, line: int, where: str, message: str):
+        self.had_error = True
+        self.messages.append(f"{self.path}: Line {line} | Error{where}: {message}")
+
+
+# Modules compiled or read from the cache by this process, by path
+registry: dict[str, Module] = {}
+
+
+def stamp_of(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def cache_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, name + ".pickle")
+
+
+def locate(imports: list[Import], directory: str, error_handler: ErrorHandler):
+    # Finds the files imported by a module in directory, and reports the
+    # ones that don't exist
+    for stmt in imports:
+        stmt.module = os.path.normpath(os.path.join(directory, stmt.path.literal))
+
+        if not os.path.isfile(stmt.module):
+            error_handler.error(stmt.path, "Can't find this module.")
+
+
+def compile_module(path: str) -> tuple[Module | None, list[str]]:
+    # The resolver imports the interpreter, which imports this module
+    from pylox.resolver import Resolver
+
+    errors = ModuleErrors(path)
+
+    try:
+        stamp = stamp_of(path)
+
+        with open(path, "r") as f_obj:
+            source = f_obj.read()
+    except OSError as err:
+        return None, [f"{path}: {err.strerror}."]
+
+    module = Module(path, stamp)
+    tokens = Scanner(source, errors).scan_tokens()
+    parser = Parser(tokens, errors)
+    module.stmts = parser.parse()
+
+    if not errors.had_error:
+        locate(parser.imports, os.path.dirname(path), errors)
+        Resolver(module, errors).resolve(module.stmts)
+
+    if errors.had_error:
+        return None, errors.messages
+
+    module.imports = list(dict.fromkeys(stmt.module for stmt in parser.imports))
+    return module, []
+
+
+def write_cache(module: Module) -> bytes | None:
+    # Returns the cached module, or None if it can't be pickled (a tree too
+    # deep for pickle). Failing to write it only means compiling it again.
+    try:
+        payload = pickle.dumps((MAGIC, module.stamp, module))
+    except RecursionError:
+        return None
+
+    path = cache_path(module.path)
+    temp_path = f"{path}.{os.getpid()}"
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(temp_path, "wb") as f_obj:
+            f_obj.write(payload)
+
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+    return payload
+
+
+def read_cache(path: str, stamp: tuple[int, int]) -> Module | None:
+    try:
+        with open(cache_path(path), "rb") as f_obj:
+            magic, cached_stamp, module = pickle.load(f_obj)
+    except Exception:
+        # Unpickling a cache written by another version of pylox can fail in
+        # many ways, such as a class that moved; it's compiled again instead
+        return None
+
+    if magic != MAGIC or cached_stamp != stamp:
+        return None
+
+    return module
+
+
+def compile_in_worker(path: str) -> tuple[bytes | None, list[str]]:
+    # Compiles and caches a module in a worker process, sending it back
+    # pickled. None without errors stands for a module that can't be
+    # pickled, compiled again by the parent.
+    module, errors = compile_module(path)
+
+    if module is None:
+        return None, errors
+
+    return write_cache(module), []
+
+
+def load(paths: list[str], error_handler: ErrorHandler) -> bool:
+    # Brings the modules in paths, and those they import, into the registry:
+    # from the registry itself if their source hasn't changed, or from the
+    # cache on disk, or by compiling them, in worker processes when there's
+    # enough to compile. Returns False if any of them has errors.
+    loaded: set[str] = set()
+    wave = list(dict.fromkeys(paths))
+    ok = True
+
+    while wave:
+        compiled = compile_all(wave, error_handler)
+        loaded.update(wave)
+        wave = []
+
+        for module in compiled:
+            if module is None:
+                ok = False
+                continue
+
+            for path in module.imports:
+                if path not in loaded and path not in wave:
+                    wave.append(path)
+
+    return ok
+
+
+def compile_all(paths: list[str], error_handler: ErrorHandler) -> list[Module | None]:
+    modules: dict[str, Module | None] = {}
+    missing: list[str] = []
+
+    for path in paths:
+        try:
+            stamp = stamp_of(path)
+        except OSError:
+            missing.append(path)
+            continue
+
+        module = registry.get(path)
+
+        if module is None or module.stamp != stamp:
+            module = read_cache(path, stamp)
+
+        if module is not None:
+            registry[path] = module
+            modules[path] = module
+        else:
+            missing.append(path)
+
+    size = 0
+
+    for path in missing:
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+
+    if len(missing) > 1 and size >= PARALLEL_SIZE and (os.cpu_count() or 1) > 1:
+        # Imported to start the workers only when they're needed
+        from pylox import process_pool
+
+        pool = process_pool.get_executor()
+
+        try:
+            futures = [pool.submit(compile_in_worker, path) for path in missing]
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory...), they're all compiled
+            # here instead, like modules that can't be pickled
+            process_pool.discard_executor()
+            results = [(None, [])] * len(missing)
+
+        for path, (payload, errors) in zip(missing, results):
+            if payload is not None:
+                module = pickle.loads(payload)[2]
+            elif not errors:
+                module, errors = compile_module(path)
+            else:
+                module = None
+
+            modules[path] = finish(path, module, errors, error_handler)
+    else:
+        for path in missing:
+            module, errors = compile_module(path)
+
+            if module is not None:
+                write_cache(module)
+
+            modules[path] = finish(path, module, errors, error_handler)
+
+    return [modules[path] for path in paths]
+
+
+def finish(
+    path: str, module: Module | None, errors: list[str], error_handler: ErrorHandler
+) -> Module | None:
+    for message in errors:
+        error_handler.module_error(message)
+
+    if module is not None:
+        registry[path] = module
+
+    return module
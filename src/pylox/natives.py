@@ -0,0 +1,339 @@
+import asyncio
+import math
+from concurrent.futures import Future
+from time import sleep as sleep_, time
+
+from pylox.lox_array import LoxArray
+from pylox.lox_class import LoxClass
+from pylox.lox_function import LoxFunction
+from pylox.lox_map import LoxMap
+from pylox.lox_native import lox_module, lox_native
+from pylox.lox_rope import LoxRope
+from pylox import memory_profiler
+from pylox.scheduler import LoxChannel, LoxTask, Scheduler
+
+start_time: float = time()
+
+
+def to_index(value: object) -> int:
+    if not isinstance(value, float) or not value.is_integer():
+        raise ValueError("index must be an integer")
+
+    return int(value)
+
+
+def check_map(value: object) -> LoxMap:
+    if not isinstance(value, LoxMap):
+        raise TypeError("expected a map")
+
+    return value
+
+
+def check_list(value: object) -> list:
+    if not isinstance(value, list):
+        raise TypeError("expected a list")
+
+    return value
+
+
+def check_string(value: object) -> str:
+    if isinstance(value, LoxRope):
+        return value.flatten()
+
+    if not isinstance(value, str):
+        raise TypeError("expected a string")
+
+    return value
+
+
+def check_array(value: object) -> LoxArray:
+    if not isinstance(value, LoxArray):
+        raise TypeError("expected an array")
+
+    return value
+
+
+def check_running(interpreter, scheduler: Scheduler, value: str):
+    # Tasks and channels outlive their program in the REPL, where each line
+    # runs in a new interpreter with its own scheduler, if any
+    if interpreter.scheduler is not scheduler:
+        raise ValueError(f"{value} belongs to a program that has ended")
+
+
+def check_not_empty(value: LoxArray) -> LoxArray:
+    if not len(check_array(value)):
+        raise ValueError("empty array")
+
+    return value
+
+
+@lox_native("clock", 0)
+def clock():
+    return time() - start_time
+
+
+# Lists, maps and arrays can change between two calls, so it isn't pure
+@lox_native("len", 1)
+def length(value):
+    if not isinstance(value, (list, str, LoxMap, LoxArray, LoxRope)):
+        raise TypeError("expected a list, a map, an array or a string")
+
+    return float(len(value))
+
+
+@lox_native("append", 2)
+def append(items, value):
+    check_list(items).append(value)
+    return None
+
+
+@lox_native("pop", 1)
+def pop(items):
+    if not check_list(items):
+        raise IndexError("pop from empty list")
+
+    return items.pop()
+
+
+@lox_native("slice", 3)
+def slice_(items, start, end):
+    if not isinstance(items, LoxArray):
+        check_list(items)
+
+    start, end = to_index(start), to_index(end)
+
+    # Checked like a[i], Python would wrap negative indices around and clamp
+    # the ones past the end
+    if not 0 <= start <= end <= len(items):
+        raise ValueError("slice out of range")
+
+    if isinstance(items, LoxArray):
+        return items.slice(start, end)
+
+    return items[start:end]
+
+
+@lox_native("sort", 1)
+def sort(items):
+    check_list(items)
+
+    if not all(isinstance(item, float) for item in items):
+        if not all(isinstance(item, (str, LoxRope)) for item in items):
+            raise TypeError("can only sort lists of numbers or lists of strings")
+
+        items[:] = [check_string(item) for item in items]
+
+    items.sort()
+    return None
+
+
+@lox_native("has", 2)
+def has(entries, key):
+    return check_map(entries).has(key)
+
+
+@lox_native("remove", 2)
+def remove(entries, key):
+    return check_map(entries).remove(key)
+
+
+@lox_native("keys", 1)
+def keys(entries):
+    return check_map(entries).keys()
+
+
+@lox_native("values", 1)
+def values(entries):
+    return check_map(entries).values()
+
+
+@lox_native("array", 1)
+def array(value):
+    if isinstance(value, float):
+        if value < 0:
+            raise ValueError("length must not be negative")
+
+        return LoxArray.zeros(to_index(value))
+
+    if not all(isinstance(item, float) for item in check_list(value)):
+        raise TypeError("arrays can only hold numbers")
+
+    return LoxArray.from_values(value)
+
+
+@lox_native("toList", 1)
+def to_list(value):
+    return check_array(value).to_list()
+
+
+# Arrays can be written between two calls, so the reductions aren't pure
+@lox_native("sum", 1)
+def sum_(value):
+    return check_array(value).sum()
+
+
+@lox_native("min", 1)
+def min_(value):
+    return check_not_empty(value).min()
+
+
+@lox_native("max", 1)
+def max_(value):
+    return check_not_empty(value).max()
+
+
+@lox_native("mean", 1)
+def mean(value):
+    return check_not_empty(value).mean()
+
+
+@lox_native("loadArray", 1)
+def load_array(file_path):
+    try:
+        return LoxArray.load(check_string(file_path))
+    except OSError as err:
+        raise ValueError(err.strerror)
+
+
+@lox_native("saveArray", 2)
+def save_array(value, file_path):
+    try:
+        check_array(value).save(check_string(file_path))
+    except OSError as err:
+        raise ValueError(err.strerror)
+
+    return None
+
+
+@lox_native("spawn", 1, interpreter=True)
+def spawn(interpreter, function):
+    if not isinstance(function, LoxFunction) or function.arity != 0:
+        raise TypeError("expected a function without parameters")
+
+    return Scheduler.of(interpreter).spawn(interpreter, function)
+
+
+@lox_native("join", 1, interpreter=True)
+def join(interpreter, task):
+    if isinstance(task, Future):
+        # A future of submit()
+        from pylox import process_pool
+
+        return process_pool.result(task)
+
+    if not isinstance(task, LoxTask):
+        raise TypeError("expected a task")
+
+    if task.done.done():
+        return task.done.result()
+
+    check_running(interpreter, task.scheduler, "task")
+    return interpreter.scheduler.suspend(
+        interpreter.task, task.done, lambda: not task.done.done()
+    )
+
+
+@lox_native("sleep", 1, interpreter=True)
+def sleep(interpreter, seconds):
+    if not isinstance(seconds, float) or seconds < 0:
+        raise ValueError("expected a non-negative number of seconds")
+
+    # Without tasks there is nothing else to run in the meantime
+    if interpreter.scheduler is None:
+        sleep_(seconds)
+        return None
+
+    interpreter.scheduler.suspend(interpreter.task, asyncio.sleep(seconds))
+    return None
+
+
+@lox_native("channel", 1, interpreter=True)
+def channel(interpreter, size):
+    scheduler = Scheduler.of(interpreter)
+
+    if to_index(size) < 0:
+        raise ValueError("size must not be negative")
+
+    return LoxChannel(scheduler, int(size))
+
+
+@lox_native("send", 2, interpreter=True)
+def send(interpreter, channel, value):
+    if not isinstance(channel, LoxChannel):
+        raise TypeError("expected a channel")
+
+    check_running(interpreter, channel.scheduler, "channel")
+    interpreter.scheduler.suspend(
+        interpreter.task, channel.queue.put(value), channel.queue.full
+    )
+    return None
+
+
+@lox_native("receive", 1, interpreter=True)
+def receive(interpreter, channel):
+    if not isinstance(channel, LoxChannel):
+        raise TypeError("expected a channel")
+
+    check_running(interpreter, channel.scheduler, "channel")
+    return interpreter.scheduler.suspend(
+        interpreter.task, channel.queue.get(), channel.queue.empty
+    )
+
+
+def check_worker_function(function, arity: int) -> LoxFunction | LoxClass:
+    if not isinstance(function, (LoxFunction, LoxClass)):
+        raise TypeError("expected a function")
+
+    if function.arity != arity:
+        raise ValueError(f"expected a function with {arity} parameters")
+
+    return function
+
+
+@lox_native("parallelMap", 2, interpreter=True)
+def parallel_map(interpreter, function, items):
+    # Imported here, the process pool needs the interpreter to be loaded
+    from pylox import process_pool
+
+    return process_pool.parallel_map(
+        interpreter, check_worker_function(function, 1), check_list(items)
+    )
+
+
+@lox_native("submit", 2, interpreter=True)
+def submit(interpreter, function, args):
+    from pylox import process_pool
+
+    return process_pool.submit(
+        interpreter, check_worker_function(function, len(check_list(args))), args
+    )
+
+
+@lox_native("memoryReport", 0, interpreter=True)
+def memory_report(interpreter):
+    # Does nothing unless the program runs with --mem-profile
+    if memory_profiler.active is not None:
+        interpreter.output.flush()
+        memory_profiler.active.report()
+
+    return None
+
+
+lox_module(
+    "math",
+    math,
+    [
+        "ceil",
+        "cos",
+        "e",
+        "exp",
+        "floor",
+        "inf",
+        "pi",
+        "pow",
+        "sin",
+        "sqrt",
+        "tan",
+    ],
+    pure=True,
+)
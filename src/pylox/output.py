@@ -0,0 +1,57 @@
+import sys
+from typing import Final, TextIO
+
+
+class Output:
+    # Where print writes to: a text stream (stdout when there is none, looked
+    # up on each flush so redirections apply) or a list that receives one
+    # string per printed line. Lines are buffered and written in blocks of
+    # about buffer_size characters, or one at a time when line_buffered is set.
+    target: Final[TextIO | list[str] | None]
+    buffer_size: Final[int]
+    lines: list[str]
+    size: int = 0
+
+    def __init__(
+        self,
+        target: TextIO | list[str] | None = None,
+        buffer_size: int = 65536,
+        line_buffered: bool = False,
+    ):
+        self.target = target
+        self.buffer_size = buffer_size
+        self.lines = []
+
+        if line_buffered:
+            # Shadow write() on the instance, so buffered output doesn't pay
+            # for the check
+            self.write = self.write_line
+
+    def write(self, line: str):
+        self.lines.append(line)
+        self.size += len(line) + 1
+
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def write_line(self, line: str):
+        self.lines.append(line)
+        self.flush()
+
+    def flush(self):
+        lines = self.lines
+
+        if not lines:
+            return
+
+        self.lines = []
+        self.size = 0
+
+        if isinstance(self.target, list):
+            self.target.extend(lines)
+            return
+
+        target = self.target if self.target is not None else sys.stdout
+        lines.append("")
+        target.write("\n".join(lines))
+        target.flush()
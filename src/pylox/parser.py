@@ -8,9 +8,13 @@ from pylox.expr import (
     Call,
     Get,
     Grouping,
+    Index,
+    ListLiteral,
     Literal,
     Logical,
+    MapLiteral,
     Set,
+    SetIndex,
     Super,
     This,
     Variable,
@@ -22,8 +26,10 @@ from pylox.stmt import (
     Break,
     Class,
     Expression,
+    For,
     Function,
     If,
+    Import,
     Print,
     Return,
     Var,
@@ -40,10 +46,14 @@ class Parser:
     current: int = 0
     loop_depth = 0
     error_handler: ErrorHandler
+    # The import statements found, for the modules to be loaded before the
+    # program runs
+    imports: list[Import]
 
     def __init__(self, tokens: list[Token], error_handler: ErrorHandler):
         self.tokens = tokens
         self.error_handler = error_handler
+        self.imports = []
 
     def parse(self) -> list[Stmt]:
         statements: list[Stmt] = []
@@ -91,6 +101,9 @@ class Parser:
         if self.match(TokenType.IF):
             return self.if_statement()
 
+        if self.match(TokenType.IMPORT):
+            return self.import_statement()
+
         if self.match(TokenType.PRINT):
             return self.print_statement()
 
@@ -108,7 +121,7 @@ class Parser:
 
         return self.expression_statement()
 
-    def for_statement(self):
+    def for_statement(self) -> For:
         try:
             self.loop_depth += 1
 
@@ -135,19 +148,7 @@ class Parser:
             self.consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
 
             body: Stmt = self.statement()
-
-            if increment is not None:
-                body = Block([body, Expression(increment)])
-
-            if condition is None:
-                condition = Literal(True)
-
-            body = While(condition, body)
-
-            if initializer is not None:
-                body = Block([initializer, body])
-
-            return body
+            return For(initializer, condition, increment, body)
         finally:
             self.loop_depth -= 1
 
@@ -164,6 +165,14 @@ class Parser:
 
         return If(condition, then_branch, else_branch)
 
+    def import_statement(self) -> Import:
+        keyword: Token = self.previous()
+        path: Token = self.consume(TokenType.STRING, "Expect module path.")
+        self.consume(TokenType.SEMICOLON, "Expect ';' after module path.")
+        stmt = Import(keyword, path)
+        self.imports.append(stmt)
+        return stmt
+
     def print_statement(self) -> Print:
         value: Expr = self.expression()
         self.consume(TokenType.SEMICOLON, "Expect ';' after value.")
@@ -259,6 +268,8 @@ class Parser:
                 return Assign(name, value)
             elif isinstance(expr, Get):
                 return Set(expr.object, expr.name, value)
+            elif isinstance(expr, Index):
+                return SetIndex(expr.object, expr.bracket, expr.index, value)
 
             self.error(equals, "Invalid assignment target.")
 
@@ -365,6 +376,11 @@ class Parser:
                     "Expect property name after '.'.",
                 )
                 expr = Get(expr, name)
+            elif self.match(TokenType.LEFT_BRACKET):
+                bracket: Token = self.previous()
+                index: Expr = self.expression()
+                self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after index.")
+                expr = Index(expr, bracket, index)
             else:
                 break
 
@@ -402,8 +418,45 @@ class Parser:
             self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
             return Grouping(expr)
 
+        if self.match(TokenType.LEFT_BRACKET):
+            return self.list_literal()
+
+        if self.match(TokenType.LEFT_BRACE):
+            return self.map_literal()
+
         raise self.error(self.peek(), "Expect expression.")
 
+    def list_literal(self) -> ListLiteral:
+        bracket: Token = self.previous()
+        elements: list[Expr] = []
+
+        if not self.check(TokenType.RIGHT_BRACKET):
+            while True:
+                elements.append(self.expression())
+
+                if not self.match(TokenType.COMMA):
+                    break
+
+        self.consume(TokenType.RIGHT_BRACKET, "Expect ']' after list elements.")
+        return ListLiteral(bracket, elements)
+
+    def map_literal(self) -> MapLiteral:
+        brace: Token = self.previous()
+        keys: list[Expr] = []
+        values: list[Expr] = []
+
+        if not self.check(TokenType.RIGHT_BRACE):
+            while True:
+                keys.append(self.expression())
+                self.consume(TokenType.COLON, "Expect ':' after map key.")
+                values.append(self.expression())
+
+                if not self.match(TokenType.COMMA):
+                    break
+
+        self.consume(TokenType.RIGHT_BRACE, "Expect '}' after map entries.")
+        return MapLiteral(brace, keys, values)
+
     def syncronize(self):
         self.advance()
 
@@ -418,6 +471,7 @@ class Parser:
                     | TokenType.VAR
                     | TokenType.FOR
                     | TokenType.IF
+                    | TokenType.IMPORT
                     | TokenType.WHILE
                     | TokenType.PRINT
                     | TokenType.RETURN
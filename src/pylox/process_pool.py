@@ -0,0 +1,143 @@
+import io
+import math
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pylox.error_handler import ErrorHandler
+from pylox.interpreter import Interpreter
+from pylox.lox_callable import LoxCallable
+from pylox.runtime_error import LoxRuntimeError
+from pylox.scheduler import LoxChannel, LoxTask
+
+# Started on first use and shared by every interpreter of the process
+executor: ProcessPoolExecutor | None = None
+workers: int = os.cpu_count() or 1
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global executor
+
+    if executor is None:
+        # Spawned rather than forked, the parent may be running task threads
+        executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    return executor
+
+
+def discard_executor():
+    # A worker that dies, killed or out of memory, breaks the whole pool; the
+    # next use starts a new one
+    global executor
+
+    if executor is not None:
+        executor.shutdown(wait=False)
+        executor = None
+
+
+def broken_pool() -> ValueError:
+    # Reported as a runtime error at the call of the native
+    discard_executor()
+    return ValueError("a worker process died")
+
+
+def result(future: Future) -> object:
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        raise broken_pool()
+
+
+class Packer(pickle.Pickler):
+    def reducer_override(self, obj):
+        # Tasks, channels and futures belong to this process, a worker gets
+        # nil in their place
+        if isinstance(obj, (Future, LoxTask, LoxChannel)):
+            return type(None), ()
+
+        return NotImplemented
+
+
+def pack(
+    interpreter: Interpreter, function: LoxCallable, calls: list[list[object]]
+) -> bytes:
+    # The function goes with its closure, a copy of the globals, what the
+    # resolver found for the whole program (depths are on the nodes) and the
+    # arguments, all in one pickle so nodes and objects shared between them
+    # stay shared. It's done right away, the executor would only pickle it
+    # later from another thread. Natives are sent by name and arrays through
+    # shared memory.
+    buffer = io.BytesIO()
+
+    try:
+        Packer(buffer).dump(
+            (
+                function,
+                interpreter._globals,
+                interpreter._closures,
+                interpreter._cells,
+                calls,
+            )
+        )
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError) as err:
+        raise ValueError(f"can't send the function to a worker process ({err})")
+
+    return buffer.getvalue()
+
+
+def run_in_worker(payload: bytes) -> list[object]:
+    function, globals_, closures, cells, calls = pickle.loads(payload)
+    interpreter = Interpreter(ErrorHandler())
+    interpreter._globals = globals_
+    interpreter.environment = globals_
+    interpreter._closures = closures
+    interpreter._cells = cells
+
+    try:
+        return [function.call(interpreter, args) for args in calls]
+    except LoxRuntimeError as err:
+        # Reported by the parent at the call of the native
+        raise ValueError(f"{err.message} (line {err.token.line} in a worker)")
+    finally:
+        interpreter.output.flush()
+
+
+def run_one_in_worker(payload: bytes) -> object:
+    return run_in_worker(payload)[0]
+
+
+def submit(interpreter: Interpreter, function: LoxCallable, args: list) -> Future:
+    payload = pack(interpreter, function, [args])
+
+    try:
+        future = get_executor().submit(run_one_in_worker, payload)
+    except BrokenProcessPool:
+        raise broken_pool()
+
+    # Keeps shared arrays alive until the worker has mapped them
+    future.args = args
+    return future
+
+
+def parallel_map(interpreter: Interpreter, function: LoxCallable, items: list) -> list:
+    if not items:
+        return []
+
+    # A few chunks per worker, to balance the load without paying for a
+    # round trip per item
+    size = math.ceil(len(items) / (workers * 4))
+    payloads = [
+        pack(interpreter, function, [[item] for item in items[i : i + size]])
+        for i in range(0, len(items), size)
+    ]
+
+    try:
+        pool = get_executor()
+        chunks = [pool.submit(run_in_worker, payload) for payload in payloads]
+        return [value for chunk in chunks for value in chunk.result()]
+    except BrokenProcessPool:
+        raise broken_pool()
@@ -0,0 +1,286 @@
+import marshal
+import sys
+from time import perf_counter
+from typing import Final, TextIO
+
+from pylox.lox_callable import LoxCallable
+from pylox.lox_class import LoxClass
+from pylox.lox_function import LoxFunction
+
+
+# Deterministic profiler for Lox calls. Nothing is instrumented until
+# start() is called: the call() methods of every callable class are swapped
+# for timed wrappers and restored by stop(), so the interpreter runs its
+# regular code when profiling is off.
+class Profiler:
+    class Entry:
+        def __init__(self):
+            self.primitive_calls = 0
+            self.calls = 0
+            self.exclusive = 0.0
+            self.inclusive = 0.0
+
+    class Frame:
+        def __init__(self, key: tuple, path: str, site: tuple | None):
+            self.key = key
+            self.path = path
+            self.site = site
+            self.start = 0.0
+            self.children = 0.0
+
+    filename: Final[str]
+    entries: dict[tuple, Entry]
+    callers: dict[tuple, dict[tuple, Entry]]
+    call_sites: dict[tuple, Entry]
+    collapsed: dict[str, float]
+
+    def __init__(self, filename: str = "<stdin>"):
+        self.filename = filename
+        self.entries = {}
+        self.callers = {}
+        self.call_sites = {}
+        self.collapsed = {}
+        self.stack: list[Profiler.Frame] = []
+        self.lines: list[int] = []
+        self.active: dict[tuple, int] = {}
+        self.patched: list[tuple[type, object]] = []
+
+    def install(self, interpreter):
+        # Remember the line of the innermost call expression being evaluated,
+        # so the callee can attribute itself to its call site
+        visit_call_expr = interpreter.visit_call_expr
+        lines = self.lines
+
+        def profiled_visit_call_expr(expr):
+            lines.append(expr.paren.line)
+
+            try:
+                return visit_call_expr(expr)
+            finally:
+                lines.pop()
+
+        interpreter.visit_call_expr = profiled_visit_call_expr
+
+    def start(self):
+        root = Profiler.Frame(self.root_key(), "<module>", None)
+        entry = self.entry(self.entries, root.key)
+        entry.calls += 1
+        entry.primitive_calls += 1
+        self.active[root.key] = 1
+        self.stack.append(root)
+        root.start = perf_counter()
+
+        for class_ in self.callable_classes():
+            call = class_.__dict__["call"]
+            self.patched.append((class_, call))
+            class_.call = self.instrument(call)
+
+    def stop(self):
+        for class_, call in reversed(self.patched):
+            class_.call = call
+
+        self.patched.clear()
+
+        while self.stack:
+            self.leave(self.stack[-1], perf_counter())
+
+    def callable_classes(self) -> list[type]:
+        classes = []
+        pending = [LoxCallable]
+
+        while pending:
+            class_ = pending.pop()
+            pending.extend(class_.__subclasses__())
+
+            if "call" in class_.__dict__:
+                classes.append(class_)
+
+        return classes
+
+    def instrument(self, call):
+        profiler = self
+
+        def profiled_call(callee, interpreter, args):
+            profiler.enter(callee)
+
+            try:
+                return call(callee, interpreter, args)
+            finally:
+                profiler.leave(profiler.stack[-1], perf_counter())
+
+        return profiled_call
+
+    def enter(self, callee):
+        key = self.key(callee)
+        parent = self.stack[-1]
+        site = (key, self.lines[-1] if self.lines else 0)
+        frame = Profiler.Frame(key, f"{parent.path};{key[2]}", site)
+
+        self.active[key] = self.active.get(key, 0) + 1
+        self.active[site] = self.active.get(site, 0) + 1
+
+        entry = self.entry(self.entries, key)
+        entry.calls += 1
+        self.entry(self.call_sites, site).calls += 1
+        self.entry(self.callers.setdefault(key, {}), parent.key).calls += 1
+
+        if self.active[key] == 1:
+            entry.primitive_calls += 1
+            self.callers[key][parent.key].primitive_calls += 1
+
+        # Started last, so the bookkeeping above isn't billed to the callee
+        self.stack.append(frame)
+        frame.start = perf_counter()
+
+    def leave(self, frame: Frame, now: float):
+        self.stack.pop()
+
+        elapsed = now - frame.start
+        exclusive = elapsed - frame.children
+        key = frame.key
+
+        entry = self.entry(self.entries, key)
+        entry.exclusive += exclusive
+        self.collapsed[frame.path] = self.collapsed.get(frame.path, 0.0) + exclusive
+
+        self.active[key] = self.active.get(key, 1) - 1
+
+        # Recursive calls are already included in the outermost call
+        if self.active[key] == 0:
+            entry.inclusive += elapsed
+
+        if not self.stack:
+            return
+
+        parent = self.stack[-1]
+        parent.children += elapsed
+
+        caller = self.callers[key][parent.key]
+        caller.exclusive += exclusive
+
+        if self.active[key] == 0:
+            caller.inclusive += elapsed
+
+        self.active[frame.site] -= 1
+
+        if self.active[frame.site] == 0:
+            self.call_sites[frame.site].inclusive += elapsed
+
+    def entry(self, entries: dict, key) -> Entry:
+        entry = entries.get(key)
+
+        if entry is None:
+            entry = Profiler.Entry()
+            entries[key] = entry
+
+        return entry
+
+    def root_key(self) -> tuple:
+        return (self.filename, 0, "<module>")
+
+    def key(self, callee) -> tuple:
+        if isinstance(callee, LoxFunction):
+            name = callee.declaration.name
+            return (self.filename, name.line, name.lexeme)
+
+        if isinstance(callee, LoxClass):
+            initializer = callee.find_method("init")
+            line = initializer.declaration.name.line if initializer else 0
+            return (self.filename, line, callee.name)
+
+        return ("~", 0, str(getattr(callee, "name", callee)))
+
+    def report(self, out: TextIO = sys.stderr, limit: int | None = None):
+        rows = sorted(
+            self.entries.items(),
+            key=lambda item: item[1].inclusive,
+            reverse=True,
+        )
+
+        print(
+            f"{'calls':>12} {'tottime':>10} {'cumtime':>10} {'percall':>10}  function",
+            file=out,
+        )
+
+        for key, entry in rows[:limit]:
+            calls = (
+                str(entry.calls)
+                if entry.calls == entry.primitive_calls
+                else f"{entry.calls}/{entry.primitive_calls}"
+            )
+            per_call = (
+                entry.inclusive / entry.primitive_calls
+                if entry.primitive_calls
+                else 0.0
+            )
+
+            print(
+                f"{calls:>12} {entry.exclusive:>10.6f} {entry.inclusive:>10.6f} "
+                f"{per_call:>10.6f}  {self.label(key)}",
+                file=out,
+            )
+
+        print(f"\n{'calls':>12} {'cumtime':>10}  call site", file=out)
+
+        sites = sorted(
+            self.call_sites.items(),
+            key=lambda item: item[1].inclusive,
+            reverse=True,
+        )
+
+        for (key, line), entry in sites[:limit]:
+            print(
+                f"{entry.calls:>12} {entry.inclusive:>10.6f}  "
+                f"{self.label(key)} called from line {line}",
+                file=out,
+            )
+
+    def label(self, key: tuple) -> str:
+        filename, line, name = key
+
+        if filename == "~":
+            return f"<native fn {name}>"
+
+        return f"{name} ({filename}:{line})"
+
+    def dump(self, prefix: str):
+        self.dump_stats(f"{prefix}.pstats")
+        self.dump_collapsed(f"{prefix}.collapsed")
+
+        with open(f"{prefix}.txt", "w") as f_obj:
+            self.report(f_obj)
+
+    def dump_stats(self, file_path: str):
+        # Same layout as cProfile, so the file can be loaded with pstats
+        stats = {}
+
+        for key, entry in self.entries.items():
+            callers = {
+                caller: (
+                    edge.primitive_calls,
+                    edge.calls,
+                    edge.exclusive,
+                    edge.inclusive,
+                )
+                for caller, edge in self.callers.get(key, {}).items()
+            }
+            stats[key] = (
+                entry.primitive_calls,
+                entry.calls,
+                entry.exclusive,
+                entry.inclusive,
+                callers,
+            )
+
+        with open(file_path, "wb") as f_obj:
+            marshal.dump(stats, f_obj)
+
+    def dump_collapsed(self, file_path: str):
+        # One "frame;frame;frame microseconds" line per stack, as expected by
+        # flamegraph.pl and speedscope
+        with open(file_path, "w") as f_obj:
+            for path, elapsed in sorted(self.collapsed.items()):
+                micros = round(elapsed * 1_000_000)
+
+                if micros > 0:
+                    f_obj.write(f"{path} {micros}\n")
@@ -0,0 +1,364 @@
+from pylox.expr import (
+    Expr,
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Index,
+    ListLiteral,
+    Literal,
+    Logical,
+    MapLiteral,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from pylox.lox_native import LoxModule, LoxNative, registry
+from pylox.stmt import (
+    Stmt,
+    Block,
+    Break,
+    Class,
+    Expression,
+    For,
+    Function,
+    If,
+    Import,
+    Print,
+    Return,
+    Var,
+    While,
+)
+from pylox.token import Token
+from pylox.visitor import Visitor
+
+
+# Finds the function declarations whose result only depends on their
+# arguments, so that calls to them can be memoized. A function is pure if it
+# doesn't print, doesn't set fields, doesn't assign variables declared outside
+# of it, only reads outer variables which are never reassigned and only calls
+# other pure functions.
+class PurityAnalyzer(Visitor):
+    class Binding:
+        def __init__(self, function: Function | None = None):
+            self.function = function
+            self.assigned = False
+
+    class FunctionInfo:
+        def __init__(self, declaration: Function | None, scope_index: int):
+            self.declaration = declaration
+            self.scope_index = scope_index
+            self.impure = declaration is None
+            # Non-local references, either a binding or a global name
+            self.reads: list = []
+            self.calls: list = []
+
+    scopes: list[dict[str, Binding]]
+    globals: dict[str, Binding]
+    functions: list[FunctionInfo]
+    current: FunctionInfo | None
+
+    def __init__(self):
+        self.scopes = []
+        self.globals = {}
+        self.functions = []
+        self.current = None
+
+    def analyze(self, stmts: list[Stmt]) -> set[Function]:
+        self.resolve(stmts)
+
+        pure: dict[Function, PurityAnalyzer.FunctionInfo] = {
+            info.declaration: info
+            for info in self.functions
+            if not info.impure and all(self.is_constant(r) for r in info.reads)
+        }
+
+        # Calls can be mutually recursive, so drop impure callers until
+        # nothing changes
+        changed = True
+
+        while changed:
+            changed = False
+
+            for declaration, info in list(pure.items()):
+                for callee in info.calls:
+                    binding = self.lookup_global(callee)
+
+                    if binding is None and self.is_pure_native(callee):
+                        continue
+
+                    if (
+                        binding is None
+                        or binding.assigned
+                        or binding.function not in pure
+                    ):
+                        del pure[declaration]
+                        changed = True
+                        break
+
+        return set(pure)
+
+    def is_constant(self, reference) -> bool:
+        binding = self.lookup_global(reference)
+        return binding is not None and not binding.assigned
+
+    def is_pure_native(self, name) -> bool:
+        # A global name, or a (module, member) pair
+        if isinstance(name, tuple):
+            module = registry.get(name[0])
+            native = (
+                module.members.get(name[1]) if isinstance(module, LoxModule) else None
+            )
+        else:
+            native = registry.get(name) if isinstance(name, str) else None
+
+        return isinstance(native, LoxNative) and native.pure
+
+    def lookup_global(self, reference) -> Binding | None:
+        if isinstance(reference, str):
+            return self.globals.get(reference)
+
+        if isinstance(reference, tuple):
+            return self.globals.get(reference[0])
+
+        return reference
+
+    def visit_block_stmt(self, stmt: Block):
+        self.begin_scope()
+        self.resolve(stmt.statements)
+        self.end_scope()
+
+    def visit_break_stmt(self, stmt: Break):
+        return
+
+    def visit_class_stmt(self, stmt: Class):
+        self.mark_impure()
+        self.declare(stmt.name, PurityAnalyzer.Binding())
+
+        if stmt.superclass is not None:
+            self.resolve(stmt.superclass)
+            self.begin_scope()
+            self.scopes[-1]["super"] = PurityAnalyzer.Binding()
+
+        self.begin_scope()
+        self.scopes[-1]["this"] = PurityAnalyzer.Binding()
+
+        # Methods are never memoized, but they are still walked to find the
+        # variables they assign
+        for method in stmt.methods:
+            self.resolve_function(method, None)
+
+        self.end_scope()
+
+        if stmt.superclass is not None:
+            self.end_scope()
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self.resolve(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function):
+        # A nested declaration creates a new closure on every call
+        self.mark_impure()
+        self.declare(stmt.name, PurityAnalyzer.Binding(stmt))
+        self.resolve_function(stmt, stmt)
+
+    def visit_if_stmt(self, stmt: If):
+        self.resolve(stmt.condition)
+        self.resolve(stmt.then_branch)
+
+        if stmt.else_branch is not None:
+            self.resolve(stmt.else_branch)
+
+    def visit_import_stmt(self, stmt: Import):
+        # Runs the module the first time
+        self.mark_impure()
+
+    def visit_print_stmt(self, stmt: Print):
+        self.mark_impure()
+        self.resolve(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            self.resolve(stmt.value)
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is not None:
+            self.resolve(stmt.initializer)
+
+        self.declare(stmt.name, PurityAnalyzer.Binding())
+
+    def visit_for_stmt(self, stmt: For):
+        if stmt.initializer is not None:
+            self.begin_scope()
+            self.resolve(stmt.initializer)
+
+        if stmt.condition is not None:
+            self.resolve(stmt.condition)
+
+        self.resolve(stmt.body)
+
+        if stmt.increment is not None:
+            self.resolve(stmt.increment)
+
+        if stmt.initializer is not None:
+            self.end_scope()
+
+    def visit_while_stmt(self, stmt: While):
+        self.resolve(stmt.condition)
+        self.resolve(stmt.body)
+
+    def visit_assign_expr(self, expr: Assign):
+        self.resolve(expr.value)
+
+        binding, is_local = self.lookup(expr.name)
+
+        if isinstance(binding, str):
+            binding = self.globals.setdefault(binding, PurityAnalyzer.Binding())
+
+        binding.assigned = True
+
+        if not is_local:
+            self.mark_impure()
+
+    def visit_binary_expr(self, expr: Binary):
+        self.resolve(expr.left)
+        self.resolve(expr.right)
+
+    def visit_call_expr(self, expr: Call):
+        if isinstance(expr.callee, Variable):
+            binding, is_local = self.lookup(expr.callee.name)
+
+            if is_local:
+                # Locals can hold any callable
+                self.mark_impure()
+            elif self.current is not None:
+                self.current.calls.append(binding)
+        elif isinstance(expr.callee, Get) and isinstance(expr.callee.object, Variable):
+            # A member of a native module, like math.sqrt, as long as the
+            # global isn't replaced
+            binding, _ = self.lookup(expr.callee.object.name)
+
+            if not isinstance(binding, str):
+                self.mark_impure()
+            elif self.current is not None:
+                self.current.calls.append((binding, expr.callee.name.lexeme))
+        else:
+            self.mark_impure()
+            self.resolve(expr.callee)
+
+        for arg in expr.arguments:
+            self.resolve(arg)
+
+    def visit_get_expr(self, expr: Get):
+        self.mark_impure()
+        self.resolve(expr.object)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self.resolve(expr.expression)
+
+    def visit_index_expr(self, expr: Index):
+        # Lists can change between two calls with the same arguments
+        self.mark_impure()
+        self.resolve(expr.object)
+        self.resolve(expr.index)
+
+    def visit_listliteral_expr(self, expr: ListLiteral):
+        # Each call has to return a new list
+        self.mark_impure()
+        self.resolve(expr.elements)
+
+    def visit_literal_expr(self, expr: Literal):
+        return
+
+    def visit_logical_expr(self, expr: Logical):
+        self.resolve(expr.left)
+        self.resolve(expr.right)
+
+    def visit_set_expr(self, expr: Set):
+        self.mark_impure()
+        self.resolve(expr.value)
+        self.resolve(expr.object)
+
+    def visit_mapliteral_expr(self, expr: MapLiteral):
+        # Each call has to return a new map
+        self.mark_impure()
+        self.resolve(expr.keys)
+        self.resolve(expr.values)
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        self.mark_impure()
+        self.resolve(expr.value)
+        self.resolve(expr.object)
+        self.resolve(expr.index)
+
+    def visit_super_expr(self, expr: Super):
+        self.mark_impure()
+
+    def visit_this_expr(self, expr: This):
+        self.mark_impure()
+
+    def visit_unary_expr(self, expr: Unary):
+        self.resolve(expr.right)
+
+    def visit_variable_expr(self, expr: Variable):
+        binding, is_local = self.lookup(expr.name)
+
+        if not is_local and self.current is not None:
+            self.current.reads.append(binding)
+
+    def resolve(self, expr_or_stmt: Expr | Stmt | list[Expr] | list[Stmt]):
+        if isinstance(expr_or_stmt, list):
+            for stmt in expr_or_stmt:
+                self.resolve(stmt)
+            return
+
+        expr_or_stmt.accept(self)
+
+    def resolve_function(self, function: Function, declaration: Function | None):
+        enclosing: PurityAnalyzer.FunctionInfo | None = self.current
+        self.current = PurityAnalyzer.FunctionInfo(declaration, len(self.scopes))
+        self.functions.append(self.current)
+        self.begin_scope()
+
+        for param in function.params:
+            self.declare(param, PurityAnalyzer.Binding())
+
+        self.resolve(function.body)
+        self.end_scope()
+        self.current = enclosing
+
+    def mark_impure(self):
+        if self.current is not None:
+            self.current.impure = True
+
+    def begin_scope(self):
+        self.scopes.append({})
+
+    def end_scope(self):
+        self.scopes.pop()
+
+    def declare(self, name: Token, binding: Binding):
+        if self.scopes:
+            self.scopes[-1][name.lexeme] = binding
+            return
+
+        # Redeclaring a global is the same as assigning it
+        if name.lexeme in self.globals:
+            self.globals[name.lexeme].assigned = True
+            binding.assigned = True
+
+        self.globals[name.lexeme] = binding
+
+    def lookup(self, name: Token) -> tuple[Binding | str, bool]:
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name.lexeme in self.scopes[i]:
+                is_local = self.current is None or i >= self.current.scope_index
+                return self.scopes[i][name.lexeme], is_local
+
+        # Globals are late bound, so they are looked up once everything
+        # has been declared
+        return name.lexeme, self.current is None
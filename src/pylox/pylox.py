@@ -1,16 +1,70 @@
+import os
 import sys
-import readline  # noqa: F401
 
 from pylox.error_handler import ErrorHandler
 from pylox.scanner import Scanner
 from pylox.parser import Parser
 from pylox.resolver import Resolver
+from pylox.resolving_parser import ResolvingParser
 from pylox.interpreter import Interpreter
+from pylox.memory_profiler import MemoryProfiler
+from pylox import modules
+from pylox.output import Output
+from pylox.profiler import Profiler
+from pylox.purity_analyzer import PurityAnalyzer
+from pylox.sampling_profiler import SamplingProfiler
 from pylox.stmt import Stmt
+from pylox.type_analyzer import TypeAnalyzer
 
 
 class PyLox:
     error_handler: ErrorHandler = ErrorHandler()
+    memoize: bool
+    memo_size: int
+    memo_stats: bool
+    infer_types: bool
+    type_report: bool
+    profile: bool
+    sample_profile: bool
+    mem_profile: bool
+    sample_interval: float
+    profile_output: str | None
+    output: Output | None
+    line_buffered: bool
+    single_pass: bool
+    profiler: Profiler | SamplingProfiler | MemoryProfiler | None = None
+
+    def __init__(
+        self,
+        memoize: bool = False,
+        memo_size: int = 1024,
+        memo_stats: bool = False,
+        infer_types: bool = False,
+        type_report: bool = False,
+        profile: bool = False,
+        sample_profile: bool = False,
+        mem_profile: bool = False,
+        sample_interval: float = 0.005,
+        profile_output: str | None = None,
+        output: Output | None = None,
+        line_buffered: bool = False,
+        single_pass: bool = False,
+    ):
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.memo_stats = memo_stats
+        # The report needs the analysis
+        self.infer_types = infer_types or type_report
+        self.type_report = type_report
+        self.profile = profile
+        self.sample_profile = sample_profile
+        self.mem_profile = mem_profile
+        self.sample_interval = sample_interval
+        self.profile_output = profile_output
+        # Hosts can pass their own output, print goes to stdout otherwise
+        self.output = output
+        self.line_buffered = line_buffered
+        self.single_pass = single_pass
 
     def run_file(self, file_path: str) -> None:
         source: str = ""
@@ -23,12 +77,32 @@ class PyLox:
             print(f"Error: No such file or directory '{file_path}'.")
             self.error_handler.had_error = True
 
-        self.run(source)
+        if self.sample_profile:
+            self.profiler = SamplingProfiler(self.sample_interval)
+        elif self.mem_profile:
+            self.profiler = MemoryProfiler()
+        elif self.profile or self.profile_output is not None:
+            self.profiler = Profiler(file_path)
+
+        self.run(source, path=file_path)
+
+        if self.profiler is not None:
+            self.write_profile()
 
         if self.error_handler.had_runtime_error or self.error_handler.had_error:
             sys.exit(70)
 
     def run_prompt(self) -> None:
+        # Line editing for input(), only the REPL needs it
+        import readline  # noqa: F401
+
+        if self.memoize:
+            # Purity is decided for the whole program, which the REPL only
+            # sees a line at a time: a later line could reassign what a
+            # memoized function reads and leave its cached results stale
+            print("--memoize has no effect in the REPL.", file=sys.stderr)
+            self.memoize = False
+
         print(
             "Pylox, an implementation of the Lox programming language written in Python."
         )
@@ -46,25 +120,87 @@ class PyLox:
                 print("\n")
                 continue
 
-    def run(self, source: str, is_repl: bool = False):
+    def run(self, source: str, is_repl: bool = False, path: str | None = None):
+        # Modules are imported relative to the file, or to the current
+        # directory in the REPL
         scanner: Scanner = Scanner(source, self.error_handler)
         tokens: list[str] = scanner.scan_tokens()
-        parser: Parser = Parser(tokens, self.error_handler)
-        interpreter: Interpreter = Interpreter(self.error_handler, is_repl)
-        resolver: Resolver = Resolver(interpreter, self.error_handler)
+        output = self.output
 
-        stmts: list[Stmt] = parser.parse()
+        if output is None:
+            output = Output(line_buffered=self.line_buffered or is_repl)
 
-        if self.error_handler.had_error:
-            return
+        interpreter: Interpreter = Interpreter(self.error_handler, is_repl, output)
+
+        if self.single_pass:
+            parser: Parser = ResolvingParser(tokens, self.error_handler, interpreter)
+            stmts: list[Stmt] = parser.parse()
+        else:
+            parser: Parser = Parser(tokens, self.error_handler)
+            stmts: list[Stmt] = parser.parse()
+
+            if self.error_handler.had_error:
+                return
+
+            Resolver(interpreter, self.error_handler).resolve(stmts)
+
+        if parser.imports and not self.error_handler.had_error:
+            if path is None:
+                directory = os.getcwd()
+            else:
+                directory = os.path.dirname(os.path.abspath(path))
+
+            modules.locate(parser.imports, directory, self.error_handler)
 
-        resolver.resolve(stmts)
+            if not self.error_handler.had_error:
+                modules.load(
+                    [stmt.module for stmt in parser.imports], self.error_handler
+                )
 
         # Stop if there was a syntax error
         if self.error_handler.had_error or self.error_handler.had_runtime_error:
             return
 
-        interpreter.interpret(stmts)
+        if self.memoize:
+            # With the modules, which can assign the program's globals
+            imported = [
+                stmt for module in modules.registry.values() for stmt in module.stmts
+            ]
+            pure_functions = PurityAnalyzer().analyze(imported + stmts)
+            interpreter.memoize(pure_functions, self.memo_size)
+
+        if self.infer_types:
+            analyzer = TypeAnalyzer()
+
+            for module in modules.registry.values():
+                analyzer.analyze(module.stmts, module._closures, module._cells)
+
+            analyzer.analyze(stmts, interpreter._closures, interpreter._cells)
+
+            if self.type_report:
+                for line in analyzer.report():
+                    print(line, file=sys.stderr)
+
+        if self.profiler is not None:
+            self.profiler.install(interpreter)
+            self.profiler.start()
+
+            try:
+                interpreter.interpret(stmts)
+            finally:
+                self.profiler.stop()
+        else:
+            interpreter.interpret(stmts)
+
+        if self.memo_stats:
+            for stats in interpreter.memo_stats.values():
+                print(stats, file=sys.stderr)
+
+    def write_profile(self) -> None:
+        self.profiler.report(sys.stderr)
+
+        if self.profile_output is not None:
+            self.profiler.dump(self.profile_output)
 
     def report(self, line: int, message: str) -> None:
         print(f"[{line}] Error: {message}")
@@ -9,35 +9,74 @@ from pylox.expr import (
     Call,
     Get,
     Grouping,
+    Index,
+    ListLiteral,
     Literal,
     Logical,
+    MapLiteral,
     Set,
+    SetIndex,
     Super,
     This,
     Unary,
+    Variable,
 )
 from pylox.interpreter import Interpreter
 from pylox.stmt import (
     Stmt,
     Block,
+    Break,
     Class,
     Expression,
+    For,
     Function,
     If,
+    Import,
     Print,
     Return,
     Var,
     While,
 )
 from pylox.token import Token
+from pylox.token_type import TokenType
 from pylox.visitor import Visitor
 
 
 class Resolver(Visitor):
     interpreter: Final[Interpreter]
     scopes: list[dict[str, bool]]
+    bindings: list[dict[str, "Resolver.Binding"]]
+    frames: list["Resolver.Frame"]
     error_handler: ErrorHandler
 
+    class Binding:
+        # A local variable. Closures copy the variables they use, unless the
+        # variable can change after it's captured: then it lives in a cell
+        # shared by its scope and the closures.
+        # Set once the parser has built it, when resolving while parsing
+        declaration: Stmt | Token | None
+        captured: bool = False
+        # How many assignments to it there are
+        assignments: int = 0
+        # True while the resolver is inside the variable's own declaration,
+        # where closures capture it before it has its value
+        initializing: bool = False
+        captured_early: bool = False
+
+        def __init__(self, declaration: Stmt | Token | None):
+            self.declaration = declaration
+
+    class Frame:
+        # A function being resolved. Its scopes start at index start (the
+        # 'this' scope for methods), variables found further out are captured
+        # in its closure.
+        start: Final[int]
+        captures: dict[str, None]
+
+        def __init__(self, start: int):
+            self.start = start
+            self.captures = {}
+
     class FunctionType(Enum):
         NONE = auto()
         FUNCTION = auto()
@@ -56,49 +95,92 @@ class Resolver(Visitor):
         self.interpreter = interpreter
         self.error_handler = error_handler
         self.scopes = []
+        self.bindings = []
+        self.frames = []
 
     def visit_block_stmt(self, stmt: Block):
+        # Blocks declaring nothing run in the enclosing environment
+        stmt.scoped = any(
+            isinstance(statement, (Var, Function, Class))
+            for statement in stmt.statements
+        )
+
+        if not stmt.scoped:
+            self.resolve_stmts(stmt.statements)
+            return
+
         self.begin_scope()
         self.resolve_stmts(stmt.statements)
         self.end_scope()
 
+    def visit_break_stmt(self, stmt: Break):
+        return
+
     def visit_class_stmt(self, stmt: Class):
+        enclosing_class, binding = self.begin_class(stmt, stmt.name, stmt.superclass)
+        methods = [(method, self.resolve_method(method)) for method in stmt.methods]
+        self.end_class(stmt.superclass, methods, enclosing_class, binding)
+
+    def begin_class(
+        self, stmt: Class | None, name: Token, superclass: Variable | None
+    ) -> tuple[ClassType, "Resolver.Binding | None"]:
+        # Up to the methods, which are resolved in the scope of 'this'
         enclosing_class = self.current_class
         self.current_class = Resolver.ClassType.CLASS
 
-        self.declare(stmt.name)
-        self.define(stmt.name)
+        self.declare(name, stmt)
+        self.define(name)
+        binding = self.bindings[-1][name.lexeme] if self.scopes else None
 
-        if (
-            stmt.superclass is not None
-            and stmt.name.lexeme == stmt.superclass.name.lexeme
-        ):
+        if superclass is not None and name.lexeme == superclass.name.lexeme:
             self.error_handler.error(
-                stmt.superclass.name, "A class can't inherit from itself."
+                superclass.name, "A class can't inherit from itself."
             )
 
-        if stmt.superclass is not None:
+        if superclass is not None:
             self.current_class = Resolver.ClassType.SUBCLASS
-            self.resolve(stmt.superclass)
+            self.resolve(superclass)
 
-        if stmt.superclass is not None:
+        if superclass is not None:
             self.begin_scope()
             self.scopes[-1]["super"] = True
+            self.bindings[-1]["super"] = Resolver.Binding(None)
 
         self.begin_scope()
         self.scopes[-1]["this"] = True
+        self.bindings[-1]["this"] = Resolver.Binding(None)
+
+        if binding is not None:
+            binding.initializing = True
+
+        return enclosing_class, binding
 
-        for method in stmt.methods:
-            declaration = Resolver.FunctionType.METHOD
+    def resolve_method(self, method: Function) -> tuple[list[str], list[str]]:
+        declaration = Resolver.FunctionType.METHOD
 
-            if method.name.lexeme == "init":
-                declaration = Resolver.FunctionType.INITIALIZER
+        if method.name.lexeme == "init":
+            declaration = Resolver.FunctionType.INITIALIZER
 
-            self.resolve_function(method, declaration)
+        return self.resolve_function(method, declaration)
 
+    def end_class(
+        self,
+        superclass: Variable | None,
+        methods: list[tuple[Function, tuple[list[str], list[str]]]],
+        enclosing_class: ClassType,
+        binding: "Resolver.Binding | None",
+    ):
         self.end_scope()
 
-        if stmt.superclass is not None:
+        # Methods are created next to 'super', without the 'this' scope,
+        # which bind() adds to each bound method
+        for method, (captures, cells) in methods:
+            self.resolve_closure(method, captures, cells)
+
+        if binding is not None:
+            binding.initializing = False
+
+        if superclass is not None:
             self.end_scope()
 
         self.current_class = enclosing_class
@@ -107,9 +189,33 @@ class Resolver(Visitor):
         self.resolve(stmt.expression)
 
     def visit_function_stmt(self, stmt: Function):
-        self.declare(stmt.name)
-        self.define(stmt.name)
-        self.resolve_function(stmt, Resolver.FunctionType.FUNCTION)
+        binding = self.declare_function(stmt.name, stmt)
+        captures, cells = self.resolve_function(stmt, Resolver.FunctionType.FUNCTION)
+        self.end_function_declaration(stmt, binding, captures, cells)
+
+    def declare_function(
+        self, name: Token, stmt: Function | None
+    ) -> "Resolver.Binding | None":
+        self.declare(name, stmt)
+        self.define(name)
+        binding = self.bindings[-1][name.lexeme] if self.scopes else None
+
+        if binding is not None:
+            binding.initializing = True
+
+        return binding
+
+    def end_function_declaration(
+        self,
+        stmt: Function,
+        binding: "Resolver.Binding | None",
+        captures: list[str],
+        cells: list[str],
+    ):
+        if binding is not None:
+            binding.initializing = False
+
+        self.resolve_closure(stmt, captures, cells)
 
     def visit_if_stmt(self, stmt: If):
         self.resolve(stmt.condition)
@@ -118,38 +224,96 @@ class Resolver(Visitor):
         if stmt.else_branch is not None:
             self.resolve(stmt.else_branch)
 
+    def visit_import_stmt(self, stmt: Import):
+        return
+
     def visit_print_stmt(self, stmt: Print):
         self.resolve(stmt.expression)
 
     def visit_return_stmt(self, stmt: Return):
+        self.check_return(stmt.keyword, stmt.value is not None)
+
+        if stmt.value is not None:
+            self.resolve(stmt.value)
+
+    def check_return(self, keyword: Token, has_value: bool):
         if self.current_function == Resolver.FunctionType.NONE:
             self.error_handler.error(
-                stmt.keyword,
+                keyword,
                 "Can't return from top-level code.",
             )
 
-        if stmt.value is not None:
-            if self.current_function == Resolver.FunctionType.INITIALIZER:
-                self.error_handler.error(
-                    stmt.keyword, "Can't return a value from an initializer."
-                )
-            self.resolve(stmt.value)
+        if has_value and self.current_function == Resolver.FunctionType.INITIALIZER:
+            self.error_handler.error(
+                keyword, "Can't return a value from an initializer."
+            )
 
     def visit_var_stmt(self, stmt: Var):
-        self.declare(stmt.name)
+        self.declare(stmt.name, stmt)
 
         if stmt.initializer is not None:
             self.resolve(stmt.initializer)
 
         self.define(stmt.name)
 
+    def visit_for_stmt(self, stmt: For):
+        # The initializer's variables are in a scope of their own, shared by
+        # all the iterations
+        if stmt.initializer is not None:
+            self.begin_scope()
+            self.resolve(stmt.initializer)
+
+        if stmt.condition is not None:
+            self.resolve(stmt.condition)
+
+        self.resolve(stmt.body)
+
+        if stmt.increment is not None:
+            self.resolve(stmt.increment)
+
+        if stmt.initializer is not None:
+            stmt.counted = self.is_counted(
+                stmt.initializer, stmt.condition, stmt.increment
+            )
+            self.end_scope()
+
+    def is_counted(
+        self, initializer: Stmt, condition: Expr | None, increment: Expr | None
+    ) -> bool:
+        # Whether the loop is 'var i = a; i < b; i = i + 1' (or i <= b) with
+        # the increment the only assignment to i and no closure capturing it,
+        # called once the loop is resolved, before its scope ends
+        if not isinstance(initializer, Var) or initializer.initializer is None:
+            return False
+
+        name = initializer.name.lexeme
+        binding = self.bindings[-1][name]
+
+        return (
+            binding.assignments == 1
+            and not binding.captured
+            and isinstance(condition, Binary)
+            and condition.operator.token_type in (TokenType.LESS, TokenType.LESS_EQUAL)
+            and isinstance(condition.left, Variable)
+            and condition.left.name.lexeme == name
+            and isinstance(increment, Assign)
+            and increment.name.lexeme == name
+            and isinstance(increment.value, Binary)
+            and increment.value.operator.token_type == TokenType.PLUS
+            and isinstance(increment.value.left, Variable)
+            and increment.value.left.name.lexeme == name
+            and isinstance(increment.value.right, Literal)
+            and type(increment.value.right.value) is float
+            and increment.value.right.value == 1
+        )
+
     def visit_while_stmt(self, stmt: While):
         self.resolve(stmt.condition)
         self.resolve(stmt.body)
 
     def visit_assign_expr(self, expr: Assign):
         self.resolve(expr.value)
-        self.resolve_local(expr, expr.name)
+        self.resolve_local(expr, expr.name, True)
 
     def visit_binary_expr(self, expr: Binary):
         self.resolve(expr.left)
@@ -167,6 +331,13 @@ class Resolver(Visitor):
     def visit_grouping_expr(self, expr: Grouping):
         self.resolve(expr.expression)
 
+    def visit_index_expr(self, expr: Index):
+        self.resolve(expr.object)
+        self.resolve(expr.index)
+
+    def visit_listliteral_expr(self, expr: ListLiteral):
+        self.resolve(expr.elements)
+
     def visit_literal_expr(self, expr: Literal):
         return
 
@@ -178,6 +349,15 @@ class Resolver(Visitor):
         self.resolve(expr.value)
         self.resolve(expr.object)
 
+    def visit_mapliteral_expr(self, expr: MapLiteral):
+        self.resolve(expr.keys)
+        self.resolve(expr.values)
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        self.resolve(expr.value)
+        self.resolve(expr.object)
+        self.resolve(expr.index)
+
     def visit_super_expr(self, expr: Super):
         if self.current_class == Resolver.ClassType.NONE:
             self.error_handler.error(
@@ -192,6 +372,13 @@ class Resolver(Visitor):
 
         self.resolve_local(expr, expr.keyword)
 
+        # A function nested in a method finds 'this' next to 'super' in its
+        # closure, so it captures both
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if "this" in self.scopes[i]:
+                self.depth_of("this", i)
+                break
+
     def visit_this_expr(self, expr: This):
         if self.current_class == Resolver.ClassType.NONE:
             return self.error_handler.error(
@@ -222,30 +409,87 @@ class Resolver(Visitor):
         self,
         function: Function,
         function_type: FunctionType,
-    ):
-        enclosing_function: Resolver.FunctionType = self.current_function
-        self.current_function = function_type
-        self.begin_scope()
+    ) -> tuple[list[str], list[str]]:
+        # Returns the variables the function captures from enclosing scopes
+        # and its parameters that live in cells
+        enclosing_function = self.begin_function(function_type)
 
         for param in function.params:
-            self.declare(param)
+            self.declare(param, param)
             self.define(param)
 
         self.resolve(function.body)
-        self.end_scope()
+        return self.end_function(function.params, enclosing_function)
+
+    def begin_function(self, function_type: FunctionType) -> FunctionType:
+        enclosing_function: Resolver.FunctionType = self.current_function
+        self.current_function = function_type
+
+        if function_type in (
+            Resolver.FunctionType.METHOD,
+            Resolver.FunctionType.INITIALIZER,
+        ):
+            frame = Resolver.Frame(len(self.scopes) - 1)
+        else:
+            frame = Resolver.Frame(len(self.scopes))
+
+        self.frames.append(frame)
+        self.begin_scope()
+        return enclosing_function
+
+    def end_function(
+        self, params: list[Token], enclosing_function: FunctionType
+    ) -> tuple[list[str], list[str]]:
+        cells = self.end_scope()
+        frame = self.frames.pop()
         self.current_function = enclosing_function
 
+        names = {param.lexeme for param in params}
+        return list(frame.captures), [name for name in cells if name in names]
+
+    def resolve_closure(
+        self,
+        function: Function,
+        captures: list[str],
+        cells: list[str],
+    ):
+        # Where each captured variable is found from the scope the function
+        # is created in. Capturing a variable that is itself captured by the
+        # enclosing function adds it to that function's closure as well.
+        distances: list[tuple[str, int]] = []
+        function.layout = tuple(param.lexeme for param in function.params)
+
+        for name in captures:
+            for i in range(len(self.scopes) - 1, -1, -1):
+                if name in self.scopes[i]:
+                    distances.append((name, self.depth_of(name, i)))
+                    break
+
+        self.interpreter.resolve_closure(function, distances, cells)
+
     def resolve_stmts(self, stmts: list[Stmt]):
         for stmt in stmts:
             self.resolve(stmt)
 
     def begin_scope(self):
         self.scopes.append({})
+        self.bindings.append({})
 
-    def end_scope(self):
+    def end_scope(self) -> list[str]:
+        # Returns the variables of the scope that live in cells
         self.scopes.pop()
+        cells: list[str] = []
+
+        for name, binding in self.bindings.pop().items():
+            if binding.captured and (binding.assignments or binding.captured_early):
+                cells.append(name)
+
+                if isinstance(binding.declaration, Stmt):
+                    self.interpreter.resolve_cell(binding.declaration)
+
+        return cells
 
-    def declare(self, name: Token):
+    def declare(self, name: Token, declaration: Stmt | Token | None):
         if not self.scopes:
             return
 
@@ -258,6 +502,7 @@ class Resolver(Visitor):
             )
 
         scope[name.lexeme] = False
+        self.bindings[-1][name.lexeme] = Resolver.Binding(declaration)
 
     def define(self, name: Token):
         if not self.scopes:
@@ -265,7 +510,29 @@ class Resolver(Visitor):
 
         self.scopes[-1][name.lexeme] = True
 
-    def resolve_local(self, expr: Expr, name: Token):
-        for i, scope in enumerate(reversed(self.scopes)):
-            if name.lexeme in scope:
-                self.interpreter.resolve(expr, i)
+    def resolve_local(self, expr: Expr, name: Token, assigned: bool = False):
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name.lexeme in self.scopes[i]:
+                if assigned:
+                    self.bindings[i][name.lexeme].assignments += 1
+
+                self.interpreter.resolve(expr, self.depth_of(name.lexeme, i))
+                return
+
+    def depth_of(self, name: str, i: int) -> int:
+        # Distance from the innermost scope to the environment holding the
+        # variable declared in scope i
+        if not self.frames or i >= self.frames[-1].start:
+            return len(self.scopes) - 1 - i
+
+        # Declared outside the current function, so it's read from the
+        # function's closure, right after its own scopes
+        frame = self.frames[-1]
+        frame.captures[name] = None
+        binding = self.bindings[i][name]
+        binding.captured = True
+
+        if binding.initializing:
+            binding.captured_early = True
+
+        return len(self.scopes) - frame.start
@@ -0,0 +1,263 @@
+from typing import Final
+
+from pylox.error_handler import ErrorHandler
+from pylox.expr import Assign, Expr, Super, This, Variable
+from pylox.interpreter import Interpreter
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.stmt import Class, For, Function, Return, Stmt, Var
+from pylox.token import Token
+from pylox.token_type import TokenType
+
+
+class ResolvingParser(Parser):
+    # Parser that resolves variables as it builds the tree, instead of a
+    # Resolver pass over the finished program. It drives a Resolver's scopes
+    # from where the parser enters and leaves them, so declarations, depths,
+    # closures and cells come out the same. As with a separate pass, the
+    # resolver's errors are only reported when the whole program parses.
+    class DeferredErrors(ErrorHandler):
+        errors: list[tuple[Token, str]]
+
+        def __init__(self):
+            self.errors = []
+
+        def error(self, token: Token, message: str):
+            self.errors.append((token, message))
+
+    resolver: Final[Resolver]
+    deferred: Final[DeferredErrors]
+
+    def __init__(
+        self,
+        tokens: list[Token],
+        error_handler: ErrorHandler,
+        interpreter: Interpreter,
+    ):
+        super().__init__(tokens, error_handler)
+        self.deferred = ResolvingParser.DeferredErrors()
+        self.resolver = Resolver(interpreter, self.deferred)
+
+    def parse(self) -> list[Stmt]:
+        stmts = super().parse()
+
+        if not self.error_handler.had_error:
+            for token, message in self.deferred.errors:
+                self.error_handler.error(token, message)
+
+        return stmts
+
+    def class_declaration(self) -> Class:
+        name: Token = self.consume(TokenType.IDENTIFIER, "Expect class name.")
+        superclass: Variable = None
+
+        if self.match(TokenType.LESS):
+            self.consume(TokenType.IDENTIFIER, "Expect superclass name.")
+            superclass = Variable(self.previous())
+
+        enclosing_class, binding = self.resolver.begin_class(None, name, superclass)
+        methods: list[tuple[Function, tuple[list[str], list[str]]]] = []
+
+        try:
+            self.consume(TokenType.LEFT_BRACE, "Expect '{' before class body.")
+
+            while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+                methods.append(self.resolved_function("method"))
+
+            self.consume(TokenType.RIGHT_BRACE, "Expect '}' after class body.")
+        finally:
+            self.resolver.end_class(superclass, methods, enclosing_class, binding)
+
+        stmt = Class(name, superclass, [method for method, _ in methods])
+
+        if binding is not None:
+            binding.declaration = stmt
+
+        return stmt
+
+    def statement(self) -> Stmt:
+        if not self.check(TokenType.LEFT_BRACE):
+            return super().statement()
+
+        # As in Resolver.visit_block_stmt, blocks declaring nothing get no
+        # scope, which has to be known before their body is resolved
+        scoped = self.declares()
+
+        if not scoped:
+            stmt = super().statement()
+            stmt.scoped = False
+            return stmt
+
+        self.resolver.begin_scope()
+
+        try:
+            return super().statement()
+        finally:
+            self.resolver.end_scope()
+
+    def declares(self) -> bool:
+        # Whether the block starting at the current '{' has a declaration of
+        # its own, outside nested blocks and parentheses
+        depth = 0
+
+        for token in self.tokens[self.current :]:
+            match token.token_type:
+                case TokenType.LEFT_BRACE | TokenType.LEFT_PAREN:
+                    depth += 1
+                case TokenType.RIGHT_BRACE | TokenType.RIGHT_PAREN:
+                    depth -= 1
+
+                    if depth == 0:
+                        return False
+                case TokenType.CLASS | TokenType.FUN | TokenType.VAR:
+                    if depth == 1:
+                        return True
+
+        return False
+
+    def for_statement(self) -> For:
+        # The initializer's variables are in a scope of their own, as in
+        # Resolver.visit_for_stmt
+        try:
+            self.loop_depth += 1
+
+            self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
+            initializer: Stmt | None = None
+            condition: Expr | None = None
+            increment: Expr | None = None
+            scoped = not self.check(TokenType.SEMICOLON)
+
+            if scoped:
+                self.resolver.begin_scope()
+
+            try:
+                if self.match(TokenType.SEMICOLON):
+                    initializer = None
+                elif self.match(TokenType.VAR):
+                    initializer = self.var_declaration()
+                else:
+                    initializer = self.expression_statement()
+
+                if not self.check(TokenType.SEMICOLON):
+                    condition = self.expression()
+
+                self.consume(TokenType.SEMICOLON, "Expect ';' after loop condition.")
+                # A separate pass resolves the increment after the body, so
+                # are its errors
+                count = len(self.deferred.errors)
+
+                if not self.check(TokenType.RIGHT_PAREN):
+                    increment = self.expression()
+
+                increment_errors = self.deferred.errors[count:]
+                del self.deferred.errors[count:]
+
+                self.consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
+                body: Stmt = self.statement()
+                self.deferred.errors += increment_errors
+                stmt = For(initializer, condition, increment, body)
+
+                if scoped:
+                    stmt.counted = self.resolver.is_counted(
+                        initializer, condition, increment
+                    )
+            finally:
+                if scoped:
+                    self.resolver.end_scope()
+
+            return stmt
+        finally:
+            self.loop_depth -= 1
+
+    def return_statement(self) -> Return:
+        self.resolver.check_return(self.previous(), not self.check(TokenType.SEMICOLON))
+        return super().return_statement()
+
+    def var_declaration(self) -> Var:
+        name: Token = self.consume(TokenType.IDENTIFIER, "Expect variable name.")
+        initializer: Expr = None
+        self.resolver.declare(name, None)
+
+        if self.match(TokenType.EQUAL):
+            initializer = self.expression()
+
+        self.resolver.define(name)
+        self.consume(TokenType.SEMICOLON, "Expect ';' after variable declaration.")
+        stmt = Var(name, initializer)
+
+        if self.resolver.scopes:
+            self.resolver.bindings[-1][name.lexeme].declaration = stmt
+
+        return stmt
+
+    def function(self, kind: str) -> Function:
+        return self.resolved_function(kind)[0]
+
+    def resolved_function(
+        self, kind: str
+    ) -> tuple[Function, tuple[list[str], list[str]]]:
+        # Methods are returned with what they capture, for the class to
+        # resolve their closures once its 'this' scope is closed
+        name: Token = self.consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
+        binding = None
+
+        if kind == "method":
+            function_type = Resolver.FunctionType.METHOD
+
+            if name.lexeme == "init":
+                function_type = Resolver.FunctionType.INITIALIZER
+        else:
+            function_type = Resolver.FunctionType.FUNCTION
+            binding = self.resolver.declare_function(name, None)
+
+        enclosing_function = self.resolver.begin_function(function_type)
+        params: list[Token] = []
+
+        try:
+            self.consume(TokenType.LEFT_PAREN, f"Expect '(' after {kind} name.")
+
+            if not self.check(TokenType.RIGHT_PAREN):
+                while True:
+                    param = self.consume(TokenType.IDENTIFIER, "Expect parameter name.")
+                    params.append(param)
+                    self.resolver.declare(param, param)
+                    self.resolver.define(param)
+
+                    if not self.match(TokenType.COMMA):
+                        break
+
+            self.consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters.")
+            self.consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body.")
+            body: list[Stmt] = self.block()
+        finally:
+            captures, cells = self.resolver.end_function(params, enclosing_function)
+
+        function = Function(name, params, body)
+
+        if kind != "method":
+            if binding is not None:
+                binding.declaration = function
+
+            self.resolver.end_function_declaration(function, binding, captures, cells)
+
+        return function, (captures, cells)
+
+    def assignment(self) -> Expr:
+        expr = super().assignment()
+
+        if isinstance(expr, Assign):
+            self.resolver.resolve_local(expr, expr.name, True)
+
+        return expr
+
+    def primary(self) -> Expr:
+        expr = super().primary()
+
+        if isinstance(expr, Variable):
+            # An assignment target is resolved with the assignment
+            if not self.check(TokenType.EQUAL):
+                self.resolver.visit_variable_expr(expr)
+        elif isinstance(expr, (This, Super)):
+            expr.accept(self.resolver)
+
+        return expr
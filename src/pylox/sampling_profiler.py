@@ -0,0 +1,106 @@
+import signal
+import sys
+import threading
+from typing import Final, TextIO
+
+
+# Statistical profiler which periodically looks at the interpreter's shadow
+# stack of Lox frames. A SIGPROF interval timer is used where available,
+# since the handler runs on the main thread between two bytecodes; otherwise
+# a background thread takes the samples.
+class SamplingProfiler:
+    interval: Final[float]
+    stacks: dict[str, int]
+    line_hits: dict[tuple[str, int], int]
+    samples: int
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = {}
+        self.line_hits = {}
+        self.samples = 0
+        self.frames: list[list] = []
+        self.thread: threading.Thread | None = None
+        self.stopped = threading.Event()
+        self.previous_handler = None
+        self.previous_switch_interval: float | None = None
+
+    def install(self, interpreter):
+        self.frames = interpreter.track_frames()
+
+    def start(self):
+        if hasattr(signal, "setitimer") and (
+            threading.current_thread() is threading.main_thread()
+        ):
+            self.previous_handler = signal.signal(signal.SIGPROF, self.on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            return
+
+        # Let the sampler get hold of the GIL at least once per interval
+        self.previous_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.previous_switch_interval, self.interval))
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler or signal.SIG_DFL)
+            return
+
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        sys.setswitchinterval(self.previous_switch_interval)
+
+    def on_signal(self, signum, frame):
+        self.sample()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        # Frames are copied first, the interpreter keeps going while the
+        # thread based sampler builds the key
+        frames = [tuple(frame) for frame in self.frames]
+
+        if not frames:
+            return
+
+        self.samples += 1
+
+        path = ";".join(name for name, _ in frames)
+        self.stacks[path] = self.stacks.get(path, 0) + 1
+
+        line = frames[-1]
+        self.line_hits[line] = self.line_hits.get(line, 0) + 1
+
+    def report(self, out: TextIO = sys.stderr, limit: int | None = 20):
+        print(f"{self.samples} samples every {self.interval * 1000:g} ms", file=out)
+        print(f"{'samples':>10} {'percent':>8}  line", file=out)
+
+        rows = sorted(self.line_hits.items(), key=lambda item: item[1], reverse=True)
+
+        for (name, line), hits in rows[:limit]:
+            percent = hits / self.samples * 100 if self.samples else 0.0
+            print(f"{hits:>10} {percent:>7.1f}%  {name} line {line}", file=out)
+
+    def dump(self, prefix: str):
+        self.dump_collapsed(f"{prefix}.collapsed")
+        self.dump_lines(f"{prefix}.lines")
+
+        with open(f"{prefix}.txt", "w") as f_obj:
+            self.report(f_obj, limit=None)
+
+    def dump_collapsed(self, file_path: str):
+        with open(file_path, "w") as f_obj:
+            for path, hits in sorted(self.stacks.items()):
+                f_obj.write(f"{path} {hits}\n")
+
+    def dump_lines(self, file_path: str):
+        with open(file_path, "w") as f_obj:
+            for (name, line), hits in sorted(self.line_hits.items()):
+                f_obj.write(f"{name}:{line} {hits}\n")
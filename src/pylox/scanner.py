@@ -1,3 +1,5 @@
+import sys
+
 from pylox.error_handler import ErrorHandler
 from pylox.token_type import TokenType
 from pylox.token import Token
@@ -20,6 +22,7 @@ class Scanner:
         "for": TokenType.FOR,
         "fun": TokenType.FUN,
         "if": TokenType.IF,
+        "import": TokenType.IMPORT,
         "nil": TokenType.NIL,
         "or": TokenType.OR,
         "print": TokenType.PRINT,
@@ -57,8 +60,14 @@ class Scanner:
                 self.add_token(TokenType.LEFT_BRACE)
             case "}":
                 self.add_token(TokenType.RIGHT_BRACE)
+            case "[":
+                self.add_token(TokenType.LEFT_BRACKET)
+            case "]":
+                self.add_token(TokenType.RIGHT_BRACKET)
             case ",":
                 self.add_token(TokenType.COMMA)
+            case ":":
+                self.add_token(TokenType.COLON)
             case ".":
                 self.add_token(TokenType.DOT)
             case "-":
@@ -96,6 +105,9 @@ class Scanner:
                         self.advance()
                 elif self.match("*"):
                     while self.peek() != "*" and not self.is_at_end():
+                        # Lines after a multi-line comment keep their numbers
+                        if self.peek() == "\n":
+                            self.line += 1
                         self.advance()
                 else:
                     self.add_token(TokenType.SLASH)
@@ -150,8 +162,9 @@ class Scanner:
         # Closing '"'
         self.advance()
 
-        # Trim surrounding quotes
-        value = self.source[self.start + 1 : self.current - 1]
+        # Trim surrounding quotes. Interned, so equal literals are one object
+        # and compare by identity
+        value = sys.intern(self.source[self.start + 1 : self.current - 1])
         self.add_token(TokenType.STRING, value)
 
     def number(self):
@@ -172,18 +185,26 @@ class Scanner:
         while self.peek().isalnum():
             self.advance()
 
-        # Check if is user-defined identifier
-        text = self.source[self.start : self.current]
+        # Check if is user-defined identifier. Names are interned, so lookups
+        # in environments, fields and methods hit on pointer equality
+        text = sys.intern(self.source[self.start : self.current])
         token_type: TokenType | None = self.keywords.get(text, None)
 
         if token_type is None:
             token_type = TokenType.IDENTIFIER
 
-        self.add_token(token_type)
+        self.add_token(token_type, lexeme=text)
+
+    def add_token(
+        self,
+        token_type: TokenType,
+        literal: object | None = None,
+        lexeme: str | None = None,
+    ):
+        if lexeme is None:
+            lexeme = self.source[self.start : self.current]
 
-    def add_token(self, token_type: TokenType, literal: object | None = None):
-        text = self.source[self.start : self.current]
-        self.tokens.append(Token(token_type, text, literal, self.line))
+        self.tokens.append(Token(token_type, lexeme, literal, self.line))
 
     def is_at_end(self):
         return self.current >= len(self.source)
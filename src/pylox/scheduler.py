@@ -0,0 +1,228 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Final
+
+from pylox.lox_function import LoxFunction
+from pylox.runtime_error import LoxRuntimeError
+
+
+class LoxTask:
+    scheduler: Final["Scheduler"]
+    interpreter: Final[object]
+    function: Final[LoxFunction | None]
+    # Released to let the task's thread run
+    wakeup: Final[threading.Semaphore]
+    done: Final[asyncio.Future]
+    thread: threading.Thread | None = None
+    waiting: Awaitable | None = None
+    # While waiting, whether only another task can let it continue
+    blocked: Callable[[], bool] | None = None
+    # Raised by suspend() instead of returning the value
+    error: str | None = None
+    value: object = None
+    result: object = None
+    finished: bool = False
+    ticks: int = 0
+
+    def __init__(
+        self,
+        scheduler: "Scheduler",
+        interpreter,
+        function: LoxFunction | None,
+    ):
+        self.scheduler = scheduler
+        self.interpreter = interpreter
+        self.function = function
+        self.wakeup = threading.Semaphore(0)
+        self.done = scheduler.loop.create_future()
+
+    def run(self):
+        self.wakeup.acquire()
+
+        try:
+            self.result = self.function.call(self.interpreter, [])
+        except LoxRuntimeError as err:
+            self.interpreter.output.flush()
+            self.interpreter.error_handler.runtime_error(err)
+        finally:
+            self.finished = True
+            self.scheduler.turn.release()
+
+    def __str__(self):
+        if self.function is None:
+            return "<task main>"
+
+        return f"<task {self.function.declaration.name.lexeme}>"
+
+
+class LoxChannel:
+    scheduler: Final["Scheduler"]
+    queue: Final[asyncio.Queue]
+
+    def __init__(self, scheduler: "Scheduler", size: int):
+        self.scheduler = scheduler
+        # A size of 0 makes the channel unbounded
+        self.queue = asyncio.Queue(size)
+
+    def __str__(self):
+        return "<channel>"
+
+
+class Scheduler:
+    # Cooperative tasks on top of an asyncio event loop. Each task, the main
+    # program included, has its own interpreter and thread, since the
+    # interpreter keeps its state on the Python stack, but only one of them
+    # runs at a time: a task runs until it waits on something (a sleep, a
+    # channel, another task) or has executed SLICE statements, then hands
+    # control back to the loop, which resumes the next task that is ready.
+    # Scripts that never spawn a task don't start a scheduler at all.
+    SLICE: Final[int] = 1000
+
+    loop: Final[asyncio.AbstractEventLoop]
+    # Released when the running task hands control back to the loop
+    turn: Final[threading.Semaphore]
+    main: Final[LoxTask]
+    # The tasks that haven't finished, the main one included
+    tasks: Final[list[LoxTask]]
+    thread: Final[threading.Thread]
+    # The asyncio task that drives the main one
+    runner: asyncio.Task | None = None
+
+    def __init__(self, interpreter):
+        self.loop = asyncio.new_event_loop()
+        self.turn = threading.Semaphore(0)
+        self.main = LoxTask(self, interpreter, None)
+        self.main.thread = threading.current_thread()
+        self.tasks = [self.main]
+        self.attach(interpreter, self.main)
+        self.thread = threading.Thread(target=self.run_loop, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def of(interpreter) -> "Scheduler":
+        if interpreter.scheduler is None:
+            interpreter.scheduler = Scheduler(interpreter)
+
+        return interpreter.scheduler
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.drive(self.main, running=True))
+
+        # Cancel the tasks still waiting, drive() stops the others before
+        # they resume
+        pending = asyncio.all_tasks(self.loop)
+
+        for task in pending:
+            task.cancel()
+
+        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.close()
+
+    async def drive(self, task: LoxTask, running: bool = False):
+        if task is self.main:
+            self.runner = asyncio.current_task()
+
+        while True:
+            if not running:
+                # The program ends with the main task, tasks nobody joined are
+                # dropped
+                if self.main.finished:
+                    return
+
+                if task.thread is None:
+                    task.thread = threading.Thread(target=task.run, daemon=True)
+                    task.thread.start()
+
+                task.wakeup.release()
+
+            running = False
+
+            # Block the loop, and so every other task, until this one yields
+            self.turn.acquire()
+
+            if task.finished:
+                self.tasks.remove(task)
+                task.done.set_result(task.result)
+
+                # The others may have been waiting on it, unless it's the main
+                # task and the program is over
+                if task is not self.main:
+                    self.check_deadlock()
+
+                return
+
+            if task.blocked is not None:
+                self.check_deadlock()
+
+            try:
+                task.value = await task.waiting
+            except asyncio.CancelledError:
+                # Woken up by check_deadlock(), suspend() raises the error
+                if task.error is None:
+                    raise
+
+    def check_deadlock(self):
+        # No task can continue if each one waits on a channel or on another
+        # task, the main task then stops with an error instead of waiting
+        # forever
+        if self.main.error is None and all(
+            task.blocked is not None and task.blocked() for task in self.tasks
+        ):
+            self.main.error = "deadlock: all tasks are waiting"
+            self.runner.cancel()
+
+    def attach(self, interpreter, task: LoxTask):
+        interpreter.scheduler = self
+        interpreter.task = task
+        self.preempt(interpreter, task)
+
+    def preempt(self, interpreter, task: LoxTask):
+        execute = interpreter.execute
+
+        # Shadow execute() on the instance, like Interpreter.instrument()
+        # does, to give up control every SLICE statements. The interpreter
+        # calls this again after switching execute() on or off its
+        # instrumented path.
+        def execute_preemptive(stmt):
+            task.ticks += 1
+
+            if task.ticks >= Scheduler.SLICE:
+                task.ticks = 0
+                self.suspend(task, asyncio.sleep(0))
+
+            execute(stmt)
+
+        interpreter.execute = execute_preemptive
+
+    def spawn(self, interpreter, function: LoxFunction) -> LoxTask:
+        task = LoxTask(self, interpreter.fork(), function)
+        self.tasks.append(task)
+        self.attach(task.interpreter, task)
+        self.loop.call_soon_threadsafe(self.loop.create_task, self.drive(task))
+        return task
+
+    def suspend(
+        self,
+        task: LoxTask,
+        awaitable: Awaitable,
+        blocked: Callable[[], bool] | None = None,
+    ) -> object:
+        # Called from the task's thread: hand control to the loop, which
+        # awaits for the task, and wait to be resumed with the result
+        task.waiting = awaitable
+        task.blocked = blocked
+        self.turn.release()
+        task.wakeup.acquire()
+        task.waiting = None
+        task.blocked = None
+
+        if task.error is not None:
+            raise ValueError(task.error)
+
+        return task.value
+
+    def finish(self):
+        self.main.finished = True
+        self.turn.release()
+        self.thread.join()
@@ -0,0 +1,213 @@
+import json
+import os
+import signal
+import socket
+import sys
+from argparse import ArgumentParser
+
+# Only the standard library is imported at the top: the client has to start
+# fast, the server imports the interpreter itself before forking
+
+# Received with the request, the rest of a long request is read afterwards
+CHUNK_SIZE = 65536
+
+# Runs once in the server so the children start with everything warm
+WARMUP = """
+class A { init(x) { this.x = x; } get() { return this.x; } }
+fun f(n) { return A(n).get() + len("a" + "b"); }
+var m = {"a": [1, 2]};
+print f(1) + m["a"][1];
+"""
+
+
+def default_socket_path() -> str:
+    import tempfile
+
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"pylox-{os.getuid()}.sock")
+
+
+def build_arg_parser() -> ArgumentParser:
+    arg_parser = ArgumentParser(prog="pylox serve")
+    arg_parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=None,
+        help="Unix socket to listen on",
+    )
+    return arg_parser
+
+
+def main(argv: list[str]):
+    args = build_arg_parser().parse_args(argv)
+    serve(args.socket or default_socket_path())
+
+
+def serve(path: str):
+    # Pay for the imports and the first interpreter once, in the server
+    from pylox.interpreter import Interpreter
+    from pylox.lox_native import registry
+    from pylox.output import Output
+    from pylox.pylox import PyLox
+    from pylox import process_pool  # noqa: F401
+
+    PyLox(output=Output([])).run(WARMUP)
+    PyLox.error_handler.had_error = False
+    PyLox.error_handler.had_runtime_error = False
+
+    # The globals are shared by every interpreter, and the children inherit
+    # them: only the natives may be left for the scripts
+    values = Interpreter._globals.values
+
+    for name in list(values):
+        if name not in registry:
+            del values[name]
+
+    listener = listen(path)
+    # Children are reaped by the kernel
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # Remove the socket when killed too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"pylox: serving on {path}", file=sys.stderr)
+
+    try:
+        while True:
+            conn, _ = listener.accept()
+
+            with conn:
+                fork_request(listener, conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        os.unlink(path)
+
+
+def listen(path: str) -> socket.socket:
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                # Left behind by a server that didn't shut down
+                os.unlink(path)
+            else:
+                sys.exit(f"pylox: a server is already running on {path}")
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen()
+    return listener
+
+
+def fork_request(listener: socket.socket, conn: socket.socket):
+    # The client sends its stdin, stdout and stderr along with a line of JSON
+    # holding its arguments and working directory
+    try:
+        data, fds, _, _ = socket.recv_fds(conn, CHUNK_SIZE, 3)
+
+        while data and not data.endswith(b"\n"):
+            chunk = conn.recv(CHUNK_SIZE)
+
+            if not chunk:
+                break
+
+            data += chunk
+
+        request = json.loads(data)
+    except (OSError, ValueError) as err:
+        print(f"pylox: bad request ({err})", file=sys.stderr)
+        return
+
+    if len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+
+        return
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    if os.fork() != 0:
+        for fd in fds:
+            os.close(fd)
+
+        return
+
+    # In the child, which never returns to the accept loop
+    status = 1
+
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # A server started in the background ignores Ctrl-C, the script shouldn't
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        listener.close()
+
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        os.chdir(request["cwd"])
+        # The client forwards Ctrl-C to this pid
+        conn.sendall(f"{os.getpid()}\n".encode())
+        status = run(request["argv"])
+        conn.sendall(f"{status}\n".encode())
+    finally:
+        os._exit(status)
+
+
+def run(argv: list[str]) -> int:
+    from pylox import build_arg_parser, run_args
+
+    sys.argv = ["pylox", *argv]
+
+    try:
+        run_args(build_arg_parser().parse_args(argv))
+        return 0
+    except SystemExit as exit:
+        if exit.code is None or isinstance(exit.code, int):
+            return exit.code or 0
+
+        print(exit.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def run_client(path: str, argv: list[str]) -> int:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        try:
+            conn.connect(path)
+        except OSError as err:
+            print(
+                f"pylox: can't reach a server on {path} ({err.strerror}), "
+                "start one with 'pylox serve'",
+                file=sys.stderr,
+            )
+            return 1
+
+        request = json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n"
+        socket.send_fds(conn, [request.encode()], [0, 1, 2])
+        replies = conn.makefile("r")
+        pid = int(replies.readline() or 0)
+
+        while True:
+            try:
+                status = replies.readline()
+                break
+            except KeyboardInterrupt:
+                if pid:
+                    os.kill(pid, signal.SIGINT)
+
+        # Nothing comes back if the child was killed
+        return int(status) if status else 1
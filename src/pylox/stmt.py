@@ -8,6 +8,7 @@ class Stmt:
 
 class Block(Stmt):
     statements: list[Stmt]
+    scoped: bool = True
 
     def __init__(self, statements):
         self.statements = statements
@@ -31,10 +32,29 @@ class Expression(Stmt):
         return visitor.visit_expression_stmt(self)
 
 
+class For(Stmt):
+    initializer: Stmt | None
+    condition: Expr | None
+    increment: Expr | None
+    body: Stmt
+    counted: bool = False
+    proven: object = None
+
+    def __init__(self, initializer, condition, increment, body):
+        self.initializer = initializer
+        self.condition = condition
+        self.increment = increment
+        self.body = body
+
+    def accept(self, visitor):
+        return visitor.visit_for_stmt(self)
+
+
 class Function(Stmt):
     name: Token
     params: list[Token]
     body: list[Stmt]
+    layout: tuple[str, ...] = ()
 
     def __init__(self, name, params, body):
         self.name = name
@@ -63,6 +83,7 @@ class If(Stmt):
     condition: Expr
     then_branch: Stmt
     else_branch: Stmt | None
+    proven: object = None
 
     def __init__(self, condition, then_branch, else_branch):
         self.condition = condition
@@ -73,6 +94,19 @@ class If(Stmt):
         return visitor.visit_if_stmt(self)
 
 
+class Import(Stmt):
+    keyword: Token
+    path: Token
+    module: str | None = None
+
+    def __init__(self, keyword, path):
+        self.keyword = keyword
+        self.path = path
+
+    def accept(self, visitor):
+        return visitor.visit_import_stmt(self)
+
+
 class Print(Stmt):
     expression: Expr
 
@@ -110,6 +144,7 @@ class Var(Stmt):
 class While(Stmt):
     condition: Expr
     body: Stmt
+    proven: object = None
 
     def __init__(self, condition, body):
         self.condition = condition
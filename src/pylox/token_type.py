@@ -7,7 +7,10 @@ class TokenType(Enum):
     RIGHT_PAREN = auto()
     LEFT_BRACE = auto()
     RIGHT_BRACE = auto()
+    LEFT_BRACKET = auto()
+    RIGHT_BRACKET = auto()
     COMMA = auto()
+    COLON = auto()
     DOT = auto()
     MINUS = auto()
     PLUS = auto()
@@ -39,6 +42,7 @@ class TokenType(Enum):
     FUN = auto()
     FOR = auto()
     IF = auto()
+    IMPORT = auto()
     NIL = auto()
     OR = auto()
     PRINT = auto()
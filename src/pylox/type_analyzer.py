@@ -0,0 +1,454 @@
+from enum import Enum, auto
+
+from pylox.expr import (
+    Expr,
+    Assign,
+    Binary,
+    Call,
+    Get,
+    Grouping,
+    Index,
+    ListLiteral,
+    Literal,
+    Logical,
+    MapLiteral,
+    Set,
+    SetIndex,
+    Super,
+    This,
+    Unary,
+    Variable,
+)
+from pylox.stmt import (
+    Stmt,
+    Block,
+    Break,
+    Class,
+    Expression,
+    For,
+    Function,
+    If,
+    Import,
+    Print,
+    Return,
+    Var,
+    While,
+)
+from pylox.token import Token
+from pylox.token_type import TokenType
+from pylox.visitor import Visitor
+
+
+class LoxType(Enum):
+    NUMBER = auto()
+    # A str or a LoxRope
+    STRING = auto()
+    BOOL = auto()
+    NIL = auto()
+
+
+# Operators whose operands the interpreter checks, and the type of their
+# result when both operands are numbers
+ARITHMETIC: dict[TokenType, LoxType] = {
+    TokenType.MINUS: LoxType.NUMBER,
+    TokenType.SLASH: LoxType.NUMBER,
+    TokenType.STAR: LoxType.NUMBER,
+    TokenType.PLUS: LoxType.NUMBER,
+    TokenType.GREATER: LoxType.BOOL,
+    TokenType.GREATER_EQUAL: LoxType.BOOL,
+    TokenType.LESS: LoxType.BOOL,
+    TokenType.LESS_EQUAL: LoxType.BOOL,
+}
+
+
+# Proves the types of operands and conditions where every run of the program
+# gives them the same type, so that the interpreter can skip checking them.
+# Only locals of the function being analyzed are followed, through
+# assignments and control flow: globals can be assigned by any call, and
+# variables living in cells by any closure. Operators are checked on numbers
+# and strings, and conditions on booleans; arrays, which also go through the
+# checks, are never proven. The results are stored on the nodes as 'proven'.
+class TypeAnalyzer(Visitor):
+    class Loop:
+        def __init__(self):
+            # The states at each break out of the loop
+            self.breaks: list[dict[object, LoxType] | None] = []
+
+    # What the resolver found, as in Interpreter
+    closures: dict[Function, tuple[list[tuple[str, int]], tuple[str, ...]]]
+    # Declarations and parameters living in cells
+    cells: set[Stmt | Token]
+    # Each scope maps names to the declaration they stand for
+    scopes: list[dict[str, object]]
+    # Scopes from this index on belong to the function being analyzed
+    function_start: int
+    # The types of the locals at the current point, None where it can't be
+    # reached
+    state: dict[object, LoxType] | None
+    loops: list[Loop]
+    # The type each node was given on every visit, None where they differ
+    results: dict[Expr | Stmt, LoxType | None]
+
+    def __init__(self):
+        self.closures = {}
+        self.cells = set()
+        self.scopes = []
+        self.function_start = 0
+        self.state = {}
+        self.loops = []
+        self.results = {}
+
+    def analyze(
+        self,
+        stmts: list[Stmt],
+        closures: dict[Function, tuple[list[tuple[str, int]], tuple[str, ...]]],
+        cells: set[Stmt],
+    ):
+        # Takes what the resolver found for the statements, from the
+        # interpreter or their module
+        self.closures = closures
+        self.cells = set(cells)
+        self.resolve(stmts)
+
+        for node, proven in self.results.items():
+            node.proven = proven
+
+    def report(self) -> list[str]:
+        # How many of the checks the interpreter would make are eliminated
+        operands = [0, 0]
+        conditions = [0, 0]
+
+        for node, proven in self.results.items():
+            if isinstance(node, Binary) or (
+                isinstance(node, Unary) and node.operator.token_type == TokenType.MINUS
+            ):
+                counts = operands
+            else:
+                counts = conditions
+
+            counts[0] += proven is not None
+            counts[1] += 1
+
+        lines = []
+
+        for name, (eliminated, total) in (
+            ("operand checks", operands),
+            ("truthiness tests", conditions),
+        ):
+            ratio = eliminated / total * 100 if total else 0.0
+            lines.append(f"{name}: {eliminated} of {total} eliminated ({ratio:.1f}%)")
+
+        return lines
+
+    def visit_block_stmt(self, stmt: Block):
+        if not stmt.scoped:
+            self.resolve(stmt.statements)
+            return
+
+        self.scopes.append({})
+        self.resolve(stmt.statements)
+        self.scopes.pop()
+
+    def visit_break_stmt(self, stmt: Break):
+        self.loops[-1].breaks.append(self.state)
+        self.state = None
+
+    def visit_class_stmt(self, stmt: Class):
+        self.declare(stmt.name, stmt, None)
+
+        if stmt.superclass is not None:
+            self.evaluate(stmt.superclass)
+
+        for method in stmt.methods:
+            self.resolve_function(method)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self.evaluate(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function):
+        self.declare(stmt.name, stmt, None)
+        self.resolve_function(stmt)
+
+    def visit_if_stmt(self, stmt: If):
+        self.condition(stmt, stmt.condition)
+        before = self.copy(self.state)
+        self.resolve(stmt.then_branch)
+
+        if stmt.else_branch is not None:
+            after_then = self.state
+            self.state = before
+            self.resolve(stmt.else_branch)
+            self.state = self.join(after_then, self.state)
+        else:
+            self.state = self.join(self.state, before)
+
+    def visit_import_stmt(self, stmt: Import):
+        # Modules only declare globals
+        return
+
+    def visit_print_stmt(self, stmt: Print):
+        self.evaluate(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            self.evaluate(stmt.value)
+
+        self.state = None
+
+    def visit_var_stmt(self, stmt: Var):
+        value_type = LoxType.NIL
+
+        if stmt.initializer is not None:
+            value_type = self.evaluate(stmt.initializer)
+
+        self.declare(stmt.name, stmt, None if stmt in self.cells else value_type)
+
+    def visit_while_stmt(self, stmt: While):
+        self.loop(stmt, stmt.condition, stmt.body, None)
+
+    def visit_for_stmt(self, stmt: For):
+        if stmt.initializer is None:
+            self.loop(stmt, stmt.condition, stmt.body, stmt.increment)
+            return
+
+        self.scopes.append({})
+        self.resolve(stmt.initializer)
+        self.loop(stmt, stmt.condition, stmt.body, stmt.increment)
+        self.scopes.pop()
+
+    def loop(
+        self,
+        stmt: While | For,
+        condition: Expr | None,
+        body: Stmt,
+        increment: Expr | None,
+    ):
+        # Goes around the loop until the state at its start stops changing,
+        # the types at the start being those of every way in
+        entry = self.copy(self.state)
+        start = entry
+
+        while True:
+            loop = TypeAnalyzer.Loop()
+            self.loops.append(loop)
+            self.state = self.copy(start)
+
+            if condition is not None:
+                self.condition(stmt, condition)
+
+            # Without a condition, breaks are the only way out
+            leaving = self.copy(self.state) if condition is not None else None
+            self.resolve(body)
+
+            if increment is not None:
+                self.evaluate(increment)
+
+            self.loops.pop()
+            following = self.join(entry, self.state)
+
+            if following == start:
+                break
+
+            start = following
+
+        for state in loop.breaks:
+            leaving = self.join(leaving, state)
+
+        self.state = leaving
+
+    def visit_assign_expr(self, expr: Assign) -> LoxType | None:
+        value_type = self.evaluate(expr.value)
+        key = self.lookup(expr.name)
+
+        if key is not None and self.state is not None:
+            if value_type is None or key in self.cells:
+                self.state.pop(key, None)
+            else:
+                self.state[key] = value_type
+
+        return value_type
+
+    def visit_binary_expr(self, expr: Binary) -> LoxType | None:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        operator = expr.operator.token_type
+
+        if operator in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+            return LoxType.BOOL
+
+        operands = left if left is right else None
+
+        if operands is LoxType.NUMBER:
+            result = ARITHMETIC[operator]
+        elif operands is LoxType.STRING and operator == TokenType.PLUS:
+            result = LoxType.STRING
+        else:
+            operands = None
+            result = None
+
+        self.record(expr, operands)
+        return result
+
+    def visit_call_expr(self, expr: Call):
+        self.evaluate(expr.callee)
+
+        for arg in expr.arguments:
+            self.evaluate(arg)
+
+    def visit_get_expr(self, expr: Get):
+        self.evaluate(expr.object)
+
+    def visit_grouping_expr(self, expr: Grouping) -> LoxType | None:
+        return self.evaluate(expr.expression)
+
+    def visit_index_expr(self, expr: Index):
+        self.evaluate(expr.object)
+        self.evaluate(expr.index)
+
+    def visit_listliteral_expr(self, expr: ListLiteral):
+        for element in expr.elements:
+            self.evaluate(element)
+
+    def visit_literal_expr(self, expr: Literal) -> LoxType | None:
+        match expr.value:
+            case None:
+                return LoxType.NIL
+            case bool():
+                return LoxType.BOOL
+            case float():
+                return LoxType.NUMBER
+            case str():
+                return LoxType.STRING
+
+    def visit_logical_expr(self, expr: Logical) -> LoxType | None:
+        # The right operand may not run, and the result is either operand
+        left = self.condition(expr, expr.left)
+        before = self.copy(self.state)
+        right = self.evaluate(expr.right)
+        self.state = self.join(self.state, before)
+        return left if left is right else None
+
+    def visit_set_expr(self, expr: Set):
+        self.evaluate(expr.object)
+        self.evaluate(expr.value)
+
+    def visit_mapliteral_expr(self, expr: MapLiteral):
+        for key, value in zip(expr.keys, expr.values):
+            self.evaluate(key)
+            self.evaluate(value)
+
+    def visit_setindex_expr(self, expr: SetIndex):
+        self.evaluate(expr.object)
+        self.evaluate(expr.index)
+        self.evaluate(expr.value)
+
+    def visit_super_expr(self, expr: Super):
+        return None
+
+    def visit_this_expr(self, expr: This):
+        return None
+
+    def visit_unary_expr(self, expr: Unary) -> LoxType | None:
+        right = self.evaluate(expr.right)
+
+        if expr.operator.token_type == TokenType.BANG:
+            self.record(expr, LoxType.BOOL if right is LoxType.BOOL else None)
+            return LoxType.BOOL
+
+        if right is LoxType.NUMBER:
+            self.record(expr, LoxType.NUMBER)
+            return LoxType.NUMBER
+
+        self.record(expr, None)
+        return None
+
+    def visit_variable_expr(self, expr: Variable) -> LoxType | None:
+        key = self.lookup(expr.name)
+
+        if key is None or self.state is None:
+            return None
+
+        return self.state.get(key)
+
+    def condition(self, node: Expr | Stmt, condition: Expr) -> LoxType | None:
+        # Conditions are only tested for truth without a check when they're
+        # booleans
+        condition_type = self.evaluate(condition)
+        self.record(node, LoxType.BOOL if condition_type is LoxType.BOOL else None)
+        return condition_type
+
+    def record(self, node: Expr | Stmt, proven: LoxType | None):
+        previous = self.results.get(node, proven)
+        self.results[node] = proven if previous is proven else None
+
+    def resolve(self, stmts: Stmt | list[Stmt]):
+        if isinstance(stmts, list):
+            for stmt in stmts:
+                stmt.accept(self)
+            return
+
+        stmts.accept(self)
+
+    def evaluate(self, expr: Expr) -> LoxType | None:
+        return expr.accept(self)
+
+    def resolve_function(self, function: Function):
+        # Parameters can be anything, and the enclosing function's locals are
+        # out of reach
+        enclosing = (self.function_start, self.state, self.loops)
+        self.function_start = len(self.scopes)
+        self.state = {}
+        self.loops = []
+        self.scopes.append({param.lexeme: param for param in function.params})
+
+        if function in self.closures:
+            names = self.closures[function][1]
+            self.cells.update(
+                param for param in function.params if param.lexeme in names
+            )
+        self.resolve(function.body)
+        self.scopes.pop()
+        self.function_start, self.state, self.loops = enclosing
+
+    def declare(self, name: Token, key: object, value_type: LoxType | None):
+        if not self.scopes:
+            return
+
+        self.scopes[-1][name.lexeme] = key
+
+        if self.state is None:
+            return
+
+        if value_type is None:
+            self.state.pop(key, None)
+        else:
+            self.state[key] = value_type
+
+    def lookup(self, name: Token) -> object | None:
+        # The declaration of a local of the current function, or None
+        for i in range(len(self.scopes) - 1, self.function_start - 1, -1):
+            if name.lexeme in self.scopes[i]:
+                return self.scopes[i][name.lexeme]
+
+        return None
+
+    @staticmethod
+    def copy(state: dict[object, LoxType] | None) -> dict[object, LoxType] | None:
+        return None if state is None else dict(state)
+
+    @staticmethod
+    def join(
+        first: dict[object, LoxType] | None, second: dict[object, LoxType] | None
+    ) -> dict[object, LoxType] | None:
+        # The types known on both ways in
+        if first is None:
+            return second
+
+        if second is None:
+            return first
+
+        return {
+            key: value_type
+            for key, value_type in first.items()
+            if second.get(key) is value_type
+        }
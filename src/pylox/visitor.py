@@ -1,6 +1,16 @@
 from abc import ABC, abstractmethod
 
-from pylox.stmt import Block, Expression, Function, If, Print, Return, Var, While
+from pylox.stmt import (
+    Block,
+    Expression,
+    For,
+    Function,
+    If,
+    Print,
+    Return,
+    Var,
+    While,
+)
 
 
 class Visitor(ABC):
@@ -28,6 +38,10 @@ class Visitor(ABC):
     def visit_while_stmt(self, stmt: While):
         pass
 
+    @abstractmethod
+    def visit_for_stmt(self, stmt: For):
+        pass
+
     @abstractmethod
     def visit_function_stmt(self, stmt: Function):
         pass
@@ -0,0 +1,32 @@
+import io
+from contextlib import redirect_stdout
+
+from pylox.error_handler import ErrorHandler
+from pylox.interpreter import Interpreter
+from pylox.output import Output
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.scanner import Scanner
+
+
+def new_interpreter() -> Interpreter:
+    # Its output is a list, read back by run()
+    return Interpreter(ErrorHandler(), False, Output([]))
+
+
+def run(source: str, interpreter: Interpreter | None = None) -> list[str]:
+    # What the program prints, its runtime error last. The globals are shared
+    # by every interpreter of the process, so tests use their own names.
+    if interpreter is None:
+        interpreter = new_interpreter()
+
+    error_handler = interpreter.error_handler
+    stmts = Parser(Scanner(source, error_handler).scan_tokens(), error_handler).parse()
+    Resolver(interpreter, error_handler).resolve(stmts)
+    assert not error_handler.had_error
+
+    # Runtime errors are printed to stdout
+    with redirect_stdout(io.StringIO()) as stdout:
+        interpreter.interpret(stmts)
+
+    return interpreter.output.target + stdout.getvalue().splitlines()
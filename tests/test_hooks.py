@@ -0,0 +1,41 @@
+import unittest
+
+from support import new_interpreter, run
+
+
+class TestHooks(unittest.TestCase):
+    def test_remove_missing_hook(self):
+        interpreter = new_interpreter()
+
+        with self.assertRaises(ValueError):
+            interpreter.remove_hook(print)
+
+    def test_tasks_switch_when_hooks_change(self):
+        # The hooks change once spawn() has started the scheduler, main then
+        # only lets the task run if it's still preempted
+        interpreter = new_interpreter()
+        events = []
+
+        def switch(event, node, arg):
+            if event == "return" and interpreter.scheduler is not None:
+                interpreter.remove_hook(switch)
+                interpreter.add_hook(count)
+
+        def count(event, node, arg):
+            events.append(event)
+
+        interpreter.add_hook(switch)
+        source = """
+        var finished = false;
+        fun finish() { finished = true; }
+        spawn(finish);
+        var spins = 0;
+        while (!finished and spins < 100000) spins = spins + 1;
+        print finished;
+        """
+        self.assertEqual(run(source, interpreter), ["true"])
+        self.assertIn("statement", events)
+
+
+if __name__ == "__main__":
+    unittest.main()
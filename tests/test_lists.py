@@ -0,0 +1,27 @@
+import unittest
+
+from support import run
+
+
+class TestLists(unittest.TestCase):
+    def test_pop_empty_list(self):
+        self.assertEqual(
+            run("var emptyList = []; pop(emptyList);"),
+            ["[Line 1] --> pop: pop from empty list"],
+        )
+
+    def test_slice(self):
+        self.assertEqual(
+            run("var sliced = [3, 1, 2]; print slice(sliced, 1, 3);"), ["[1, 2]"]
+        )
+
+    def test_slice_out_of_range(self):
+        for start, end in [(-5, 2), (0, 4), (2, 1)]:
+            self.assertEqual(
+                run(f"var outOfRange = [3, 1, 2]; slice(outOfRange, {start}, {end});"),
+                ["[Line 1] --> slice: slice out of range"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
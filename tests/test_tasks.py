@@ -0,0 +1,73 @@
+import unittest
+
+from support import run
+
+
+class TestTasks(unittest.TestCase):
+    def test_unjoined_tasks_are_dropped(self):
+        source = """
+        fun countdown() { for (var i = 0; i < 3; i = i + 1) { print i; sleep(0.1); } }
+        spawn(countdown);
+        sleep(0.05);
+        print "main done";
+        """
+        self.assertEqual(run(source), ["0", "main done"])
+
+    def test_unstarted_tasks_are_dropped(self):
+        source = """
+        fun neverStarted() { print "task"; }
+        spawn(neverStarted);
+        print "main done";
+        """
+        self.assertEqual(run(source), ["main done"])
+
+    def test_channels(self):
+        source = """
+        var numbers = channel(1);
+        fun produce() { for (var i = 0; i < 3; i = i + 1) send(numbers, i); }
+        spawn(produce);
+        for (var i = 0; i < 3; i = i + 1) print receive(numbers);
+        """
+        self.assertEqual(run(source), ["0", "1", "2"])
+
+    def test_deadlock(self):
+        source = """
+        var ping = channel(0);
+        var pong = channel(0);
+        fun player() { receive(ping); send(pong, 1); }
+        spawn(player);
+        receive(pong);
+        """
+        self.assertEqual(
+            run(source), ["[Line 6] --> receive: deadlock: all tasks are waiting"]
+        )
+
+    def test_deadlock_on_join(self):
+        source = """
+        var never = channel(0);
+        fun waitForever() { receive(never); }
+        join(spawn(waitForever));
+        """
+        self.assertEqual(
+            run(source), ["[Line 4] --> join: deadlock: all tasks are waiting"]
+        )
+
+    def test_channel_of_an_ended_program(self):
+        # As in the REPL, where each line is a program of its own
+        run("var oldChannel = channel(0); fun idle() {} var oldTask = spawn(idle);")
+        self.assertEqual(
+            run("send(oldChannel, 1);"),
+            ["[Line 1] --> send: channel belongs to a program that has ended"],
+        )
+        self.assertEqual(
+            run("receive(oldChannel);"),
+            ["[Line 1] --> receive: channel belongs to a program that has ended"],
+        )
+        self.assertEqual(
+            run("join(oldTask);"),
+            ["[Line 1] --> join: task belongs to a program that has ended"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
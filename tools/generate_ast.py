@@ -2,6 +2,36 @@ import os
 import sys
 from io import TextIOWrapper
 
+# What the resolver and the interpreter keep on the nodes, with its default
+ANNOTATIONS = {
+    # How many environments away the variable is declared, None standing
+    # for a global
+    "Assign": ["depth: int | None = None"],
+    "Super": ["depth: int | None = None"],
+    "This": ["depth: int | None = None"],
+    "Variable": ["depth: int | None = None"],
+    # Whether the block declares anything, and so needs an environment
+    "Block": ["scoped: bool = True"],
+    # Loops counting a local up by one, which the interpreter runs without
+    # going through the condition and increment expressions
+    "For": ["counted: bool = False", "proven: object = None"],
+    # The parameter names in order, to bind arguments by position
+    "Function": ["layout: tuple[str, ...] = ()"],
+    # The last callee the call site was checked against: the declaration of
+    # a function, bound methods being new objects each time, or the callee
+    "Call": ["target: object = None"],
+    # The file imported, once the directory of the importing one is known
+    "Import": ["module: str | None = None"],
+    # The LoxType the type analyzer proved the operands (or the condition, or
+    # the left operand of a logical operator) always have, None when they
+    # have to be checked
+    "Binary": ["proven: object = None"],
+    "Unary": ["proven: object = None"],
+    "Logical": ["proven: object = None"],
+    "If": ["proven: object = None"],
+    "While": ["proven: object = None"],
+}
+
 
 def main():
     if len(sys.argv) != 2:
@@ -19,9 +49,13 @@ def main():
             "Call     : Expr callee, Token paren, list[Expr] arguments",
             "Get      : Expr object, Token name",
             "Grouping : Expr expression",
+            "Index    : Expr object, Token bracket, Expr index",
+            "ListLiteral : Token bracket, list[Expr] elements",
             "Literal  : object value",
             "Logical  : Expr left, Token operator, Expr right",
+            "MapLiteral : Token brace, list[Expr] keys, list[Expr] values",
             "Set      : Expr object, Token name, Expr value",
+            "SetIndex : Expr object, Token bracket, Expr index, Expr value",
             "Super    : Token keyword, Token method",
             "This     : Token keyword",
             "Unary    : Token operator, Expr right",
@@ -36,9 +70,11 @@ def main():
             "Block      : list[Stmt] statements",
             "Break      :",
             "Expression : Expr expression",
+            "For        : Stmt|None initializer, Expr|None condition, Expr|None increment, Stmt body",
             "Function   : Token name, list[Token] params, list[Stmt] body",
             "Class      : Token name, Variable superclass, list[Function] methods",
             "If         : Expr condition, Stmt then_branch, Stmt|None else_branch",
+            "Import     : Token keyword, Token path",
             "Print      : Expr expression",
             "Return     : Token keyword, Expr value",
             "Var        : Token name, Expr initializer",
@@ -98,6 +134,9 @@ def define_type(file_obj: TextIOWrapper, basename: str, classname: str, fields:
         for field_name, field_type in field_tuple:
             file_obj.write(f"\t{field_name}: {field_type}\n")
 
+        for annotation in ANNOTATIONS.get(classname, []):
+            file_obj.write(f"\t{annotation}\n")
+
         # Field names as string
         field_names = str([field[0] for field in field_tuple])[1:-1].replace("'", "")
 